@@ -40,24 +40,47 @@ PACKAGE_PROVIDED_IMPORT_DEFINTIONS_DIR = here / "convert" / "import_definitions"
 
 
 CONVERTERS = {}
+VECTORIZED_CONVERTERS = {}
+ARROW_CONVERTERS = {}
 
 
-def column_converter(func):
+def column_converter(func=None, *, vectorized=False, arrow=False):
     """Adds column-converter to a dictionary.
 
+    Column-converters are called for every value in a column. Vectorized
+    column-converters get the whole column at once and are registered with
+    `@column_converter(vectorized=True)` under the name of the column-converter
+    they replace. Arrow column-converters do the same for a pyarrow-array and
+    are registered with `@column_converter(arrow=True)`.
+
     Args:
         func (function): Simple function that converts values in a pandas column.
+        vectorized (bool, optional): Function converts a pd.Series at once. Defaults to False.
+        arrow (bool, optional): Function converts a pa.Array at once. Defaults to False.
 
     Returns:
-        func: _description_
+        func: the function itself, or a decorator if no function is given.
     """
-    name = func.__name__
-    CONVERTERS[name] = func
-    return func
+
+    def register(func):
+        if arrow:
+            converters = ARROW_CONVERTERS
+        elif vectorized:
+            converters = VECTORIZED_CONVERTERS
+        else:
+            converters = CONVERTERS
+        converters[func.__name__] = func
+        return func
+
+    if func is None:
+        return register
+    return register(func)
 
 
 # import module so all column-converter-decorators are activated
 import_module("eencijfer.convert.column_converters")
+import_module("eencijfer.convert.vectorized_converters")
+import_module("eencijfer.convert.arrow_converters")
 
 
 FORMAT = "[%(filename)s:%(lineno)s - %(funcName)20s() ] %(message)s"
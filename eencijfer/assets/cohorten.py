@@ -1,181 +1,230 @@
-"""Data asset cohorten."""
+"""Data asset cohorten.
+
+The enrolment history is grouped once per student: the rows of the eencijfer
+are numbered per student and for every part of the history (inschrijving in
+year 2, propedeuse- and bachelordiplomas) the first row per student is found
+with group offsets. Columns of these rows are added to the cohort with take,
+instead of filtering copies of the eencijfer and merging them.
+"""
 
 import logging
-from pathlib import Path
+from typing import Optional, Tuple
 
 import numpy as np
 import pandas as pd
-
-from eencijfer.assets.eencijfer import _create_eencijfer_df
-from eencijfer.settings import config
+from pandas.api.extensions import take
 
 logger = logging.getLogger(__name__)
 
-
-def create_actief_hoofd_eerstejaar_instelling(source_dir: Path) -> pd.DataFrame:
-    """Create df with actieve hoofdinschrijving, eerste jaar instelling.
+FIELDS_JAAR2 = ["opleiding", "ActueleInstelling", "Opleidingsvorm", "OpleidingActueelEquivalent"]
+FIELDS_BACHELORDIPLOMA = [
+    "OpleidingActueelEquivalent",
+    "opleiding",
+    "DatumTekeningDiploma",
+    "Diplomajaar",
+    "Opleidingsvorm",
+    "Aantal",
+]
+
+# horizons in jaren van de indicatoren EenDiplomaBinnenNjaar en StatusNaNJaar.
+HORIZONS = range(1, 11)
+STATUS_NA_JAREN = [
+    "HoDiplomaInEersteJaar",
+    "DiplomaBehaald",
+    "SwitchBinnenInstelling",
+    "StudeertNogAanHsl",
+    "Uitgevallen",
+]
+
+
+def _filter_actief_hoofd_eerstejaar_instelling(eencijfer: pd.DataFrame) -> pd.Series:
+    """Filter on actieve hoofdinschrijving, eerste jaar instelling.
 
     Every student occurs only once every year (cohort year). Only
     inschrijvingen active at oktober 1. are present.
 
+    Args:
+        eencijfer (pd.DataFrame): Enriched eencijfer.
+
     Returns:
-        pd.DataFrame: Dataframe.
+        pd.Series: True for rows in the instroom.
     """
     # Actief op 1 oktober
-    eencijfer = _create_eencijfer_df(source_dir)
     filter_actiefopPeildatum = eencijfer.IndicatieActiefOpPeildatum == 1
     # Hoofdinschrijving
     filter_soortinschrijving_ho = eencijfer.SoortInschrijvingHogerOnderwijs == 1
     # Eerstejaar
     filter_eerstejaar_instelling = eencijfer.Inschrijvingsjaar == eencijfer.EersteJaarAanDezeActueleInstelling
 
-    instroom = eencijfer[
-        (filter_eerstejaar_instelling) & (filter_soortinschrijving_ho) & (filter_actiefopPeildatum)
-    ].copy()
-    return instroom
+    return (filter_eerstejaar_instelling) & (filter_soortinschrijving_ho) & (filter_actiefopPeildatum)
 
 
-def create_inschrijving_jaar2(source_dir: Path) -> pd.DataFrame:
-    """Filters eencijfer for second year institution with hoofdopleiding.
+def _filter_inschrijving_jaar2(eencijfer: pd.DataFrame) -> pd.Series:
+    """Filter on second year institution with hoofdopleiding.
+
+    Args:
+        eencijfer (pd.DataFrame): Enriched eencijfer.
 
     Returns:
-        pd.DataFrame: Df with hoofdinschrijvingen in year 2.
+        pd.Series: True for hoofdinschrijvingen in year 2.
     """
-    eencijfer = _create_eencijfer_df(source_dir)
-
     filter_tweede_jaar = eencijfer.Inschrijvingsjaar == eencijfer.EersteJaarAanDezeActueleInstelling + 1
     filter_soortinschrijving_ho = eencijfer.SoortInschrijvingHogerOnderwijs == 1
+    return (filter_tweede_jaar) & (filter_soortinschrijving_ho)
 
-    fields_jaar2 = [
-        "PersoonsgebondenNummer",
-        "opleiding",
-        "ActueleInstelling",
-        "Opleidingsvorm",
-        "OpleidingActueelEquivalent",
-    ]
 
-    inschrijvingen_tweede_jaar = eencijfer[(filter_tweede_jaar) & (filter_soortinschrijving_ho)][fields_jaar2].copy()
-    return inschrijvingen_tweede_jaar
+def _filter_propedeuse_diplomas(eencijfer: pd.DataFrame) -> pd.Series:
+    """Filter on propedeuse-diplomas.
+
+    Args:
+        eencijfer (pd.DataFrame): Enriched eencijfer.
+
+    Returns:
+        pd.Series: True for rows with a propedeuse-diploma.
+    """
+    return (eencijfer.Diplomajaar.notnull()) & (eencijfer.OpleidingsfaseActueelVanHetDiploma == "D")
+
 
+def _filter_bachelordiplomas(eencijfer: pd.DataFrame) -> pd.Series:
+    """Filter on bachelor-degrees.
 
-def create_propedeuse_diplomas() -> pd.DataFrame:
-    """Create a table with propedeuse-diplomas.
+    Args:
+        eencijfer (pd.DataFrame): Enriched eencijfer.
 
     Returns:
-        pd.DataFrame: _description_
+        pd.Series: True for rows with a bachelor-degree.
     """
-    source_dir = config.getpath('default', 'source_dir')
-    eencijfer = _create_eencijfer_df(source_dir)
-
-    fields = [
-        "PersoonsgebondenNummer",
-        "OpleidingActueelEquivalent",
-        "EersteJaarAanDezeActueleInstelling",
-        "DatumTekeningDiploma",
-        "opleiding",
-        "Diplomajaar",
-    ]
+    return (eencijfer.Diplomajaar != 0) & (eencijfer.OpleidingsfaseActueelVanHetDiploma == "B")
 
-    # Alleen het eerst gehaalde propedeuse-diploma telt mee.
-    propedeusediplomas = (
-        eencijfer[(eencijfer.Diplomajaar.notnull()) & (eencijfer.OpleidingsfaseActueelVanHetDiploma == "D")][fields]
-        .sort_values(by="Diplomajaar", ascending=True)
-        .drop_duplicates(
-            subset=[
-                "PersoonsgebondenNummer",
-            ],
-            keep="first",
-        )
-        .copy()
-    )
-    propedeusediplomas = propedeusediplomas.rename(
-        columns={
-            "Diplomajaar": "JaarPropedeuseDiploma",
-        }
-    )
 
-    return propedeusediplomas
+def _get_groups(eencijfer: pd.DataFrame, fields: list) -> Tuple[np.ndarray, int]:
+    """Group-number per row for the combination of values of fields.
+
+    A missing value is a value of its own, like when merging.
+
+    Args:
+        eencijfer (pd.DataFrame): Enriched eencijfer.
+        fields (list): fields that make up the groups.
+
+    Returns:
+        Tuple[np.ndarray, int]: group-number per row and number of groups.
+    """
+    groups, n_groups = np.zeros(len(eencijfer), dtype=np.int64), 1
+    for field in fields:
+        codes, values = pd.factorize(eencijfer[field], use_na_sentinel=False)
+        groups, keys = pd.factorize(groups * len(values) + codes)
+        n_groups = len(keys)
+    return groups, n_groups
+
 
+def _get_first_rows(
+    groups: np.ndarray, n_groups: int, mask: pd.Series, order: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """First row per group of the rows in mask.
 
-def merge_cohort_inschrijving_jaar2(instroom: pd.DataFrame, inschrijvingen_tweede_jaar: pd.DataFrame) -> pd.DataFrame:
-    """Merge of instroom with inschrijving jaar 2.
+    The rows are sorted by group (and order) and the first row of every group
+    is found at the offset where the group starts. Rows with the same order
+    keep the order of the eencijfer.
 
     Args:
-        instroom (pd.DataFrame): instroom table.
-        inschrijvingen_tweede_jaar (pd.DataFrame): tweede jaar inschrijving.
+        groups (np.ndarray): group-number per row, from 0 to n_groups.
+        n_groups (int): number of groups.
+        mask (pd.Series): rows to choose from.
+        order (Optional[np.ndarray], optional): the row with the lowest value is first, missing values last.
+            Defaults to None, then the first row in the eencijfer is first.
 
     Returns:
-        pd.DataFrame: _description_
+        Tuple[np.ndarray, np.ndarray]: position of the first row per group (-1 without rows) and number of rows
+            per group.
     """
-    instroom_uitval_switch = pd.merge(
-        instroom,
-        inschrijvingen_tweede_jaar,
-        left_on="PersoonsgebondenNummer",
-        right_on="PersoonsgebondenNummer",
-        how="left",
-        suffixes=["", "_2ejaar"],
-    )
+    rows = np.flatnonzero(np.asarray(mask, dtype=bool))
+    if order is None:
+        rows = rows[np.argsort(groups[rows], kind="stable")]
+    else:
+        rows = rows[np.lexsort((order[rows], groups[rows]))]
 
-    if not len(instroom) == len(instroom_uitval_switch):
-        raise Exception("Merging gave too much rows.")
+    sorted_groups = groups[rows]
+    offsets = np.flatnonzero(np.diff(sorted_groups, prepend=-1) != 0)
 
-    return instroom_uitval_switch
+    first_rows = np.full(n_groups, -1)
+    first_rows[sorted_groups[offsets]] = rows[offsets]
+    n_rows = np.zeros(n_groups, dtype=np.int64)
+    n_rows[sorted_groups[offsets]] = np.diff(offsets, append=len(rows))
+    return first_rows, n_rows
 
 
-def create_bachelordiplomas(eencijfer: pd.DataFrame) -> pd.DataFrame:
-    """Create table with bachelor-degrees.
+def _add_fields_of_rows(
+    data: pd.DataFrame, eencijfer: pd.DataFrame, rows: np.ndarray, fields: list, suffix: str
+) -> pd.DataFrame:
+    """Add fields of rows of the eencijfer to data, like a left merge.
+
+    Fields that are already in data get the suffix, rows without a match (-1) get missing values.
 
     Args:
-        eencijfer (pd.DataFrame): Eencijfer-table.
+        data (pd.DataFrame): cohort.
+        eencijfer (pd.DataFrame): Enriched eencijfer.
+        rows (np.ndarray): position in the eencijfer per row of data.
+        fields (list): fields to add.
+        suffix (str): suffix for fields that are already in data.
 
     Returns:
-        pd.DataFrame: Df with bachelor-degrees.
+        pd.DataFrame: data with the fields added.
     """
+    columns = {
+        (field + suffix if field in data.columns else field): take(eencijfer[field].array, rows, allow_fill=True)
+        for field in fields
+    }
+    return pd.concat([data, pd.DataFrame(columns, index=data.index)], axis=1)
 
-    fields = [
-        "PersoonsgebondenNummer",
-        "OpleidingActueelEquivalent",
-        "opleiding",
-        "DatumTekeningDiploma",
-        "Diplomajaar",
-        "Opleidingsvorm",
-        "Aantal",
-    ]
 
-    bachelordiplomas = eencijfer[(eencijfer.Diplomajaar != 0) & (eencijfer.OpleidingsfaseActueelVanHetDiploma == "B")][
-        fields
-    ].copy()
-    return bachelordiplomas
+def _get_inschrijvingen_per_jaar(
+    eencijfer: pd.DataFrame, groups: np.ndarray, n_groups: int, jaren: int = max(HORIZONS)
+) -> np.ndarray:
+    """Year-offset matrix with the hoofdinschrijving per group and year at the instelling.
 
+    Column 0 is the first year at the instelling, column n the year n years later.
 
-def add_propedeuse_in_1_jaar(data: pd.DataFrame) -> pd.DataFrame:
+    Args:
+        eencijfer (pd.DataFrame): Enriched eencijfer.
+        groups (np.ndarray): group-number per row, like student and instelling.
+        n_groups (int): number of groups.
+        jaren (int, optional): number of years after the first year. Defaults to the largest horizon.
+
+    Returns:
+        np.ndarray: position of the hoofdinschrijving per group and year, -1 without hoofdinschrijving.
+    """
+    jaar = (eencijfer.Inschrijvingsjaar - eencijfer.EersteJaarAanDezeActueleInstelling).to_numpy(
+        dtype=float, na_value=np.nan
+    )
+    mask = np.asarray(eencijfer.SoortInschrijvingHogerOnderwijs == 1, dtype=bool) & (jaar >= 0) & (jaar <= jaren)
+    jaar = np.where(mask, jaar, 0).astype(np.int64)
+
+    first_rows, _ = _get_first_rows(groups * (jaren + 1) + jaar, n_groups * (jaren + 1), mask)
+    return first_rows.reshape(n_groups, jaren + 1)
+
+
+def add_propedeuse_in_1_jaar(data: pd.DataFrame, eencijfer: pd.DataFrame, p_diploma_rows: np.ndarray) -> pd.DataFrame:
     """Add 1/0 column with propedeuse in 1 year and Uitval1JaarMetPropedeuse.
 
     Args:
-        data (pd.DataFrame): Eencijfer-df.
+        data (pd.DataFrame): cohort.
+        eencijfer (pd.DataFrame): Enriched eencijfer.
+        p_diploma_rows (np.ndarray): position of the first propedeuse-diploma of the student per row of data.
 
     Returns:
-        pd.DataFrame: Eencijfer with 2 columns added.
+        pd.DataFrame: Cohort with 4 columns added.
     """
+    # Alleen het eerst gehaalde propedeuse-diploma telt mee, als float zodat ontbrekende jaren NaN zijn.
+    eerste_jaar, jaar_propedeuse_diploma = [
+        take(eencijfer[field].to_numpy(dtype=float, na_value=np.nan), p_diploma_rows, allow_fill=True)
+        for field in ["EersteJaarAanDezeActueleInstelling", "Diplomajaar"]
+    ]
 
-    # p_diploma = data.OpleidingsfaseActueelVanHetDiploma=='D'
-    p_diplomas = create_propedeuse_diplomas()
-    pgn_p_in_cohort_jaar = p_diplomas[
-        p_diplomas.EersteJaarAanDezeActueleInstelling == p_diplomas.JaarPropedeuseDiploma
-    ].PersoonsgebondenNummer.tolist()
-    pgn_p_in_cohort_jaar_plus_1 = p_diplomas[
-        p_diplomas.EersteJaarAanDezeActueleInstelling + 1 == p_diplomas.JaarPropedeuseDiploma
-    ].PersoonsgebondenNummer.tolist()
-    #    p_in_cohort_jaar_plus_1 = data.EersteJaarAanDezeActueleInstelling + 1 == p_diploma.Diplomajaar
-
-    data["PropedeuseIn1Jaar"] = np.where(data.PersoonsgebondenNummer.isin(pgn_p_in_cohort_jaar), 1, 0)
-
-    data["PropedeuseIn2Jaar"] = np.where(data.PersoonsgebondenNummer.isin(pgn_p_in_cohort_jaar), 1, 0)
-    data["PropedeuseIn2Jaar"] = np.where(
-        data.PersoonsgebondenNummer.isin(pgn_p_in_cohort_jaar_plus_1),
-        1,
-        data["PropedeuseIn2Jaar"],
-    )
+    p_in_cohort_jaar = eerste_jaar == jaar_propedeuse_diploma
+    p_in_cohort_jaar_plus_1 = eerste_jaar + 1 == jaar_propedeuse_diploma
+
+    data["PropedeuseIn1Jaar"] = np.where(p_in_cohort_jaar, 1, 0)
+    data["PropedeuseIn2Jaar"] = np.where(p_in_cohort_jaar | p_in_cohort_jaar_plus_1, 1, 0)
 
     data["Uitval1JaarMetPropedeuse"] = np.where((data.UitvalEerstejaar == 1) & (data.PropedeuseIn1Jaar == 1), 1, 0)
 
@@ -200,80 +249,47 @@ def _add_herinschrijver_met_propedeuse(data: pd.DataFrame) -> pd.DataFrame:
     return data
 
 
-def _add_een_diploma(data: pd.DataFrame, bachelordiplomas: pd.DataFrame) -> pd.DataFrame:
-    """Add column with 'een bachelordiploma'.
+def _add_een_diploma(
+    data: pd.DataFrame, eencijfer: pd.DataFrame, bachelordiploma_rows: np.ndarray, horizons: range = HORIZONS
+) -> pd.DataFrame:
+    """Add column with 'een bachelordiploma' and EenDiplomaBinnenNjaar per horizon.
 
     Args:
-        data (pd.DataFrame): _description_
-        bachelordiplomas (pd.DataFrame): _description_
+        data (pd.DataFrame): cohort.
+        eencijfer (pd.DataFrame): Enriched eencijfer.
+        bachelordiploma_rows (np.ndarray): position of the first bachelordiploma of the student per row of data.
+        horizons (range, optional): horizons in years. Defaults to HORIZONS.
 
     Returns:
-        pd.DataFrame: Eencijfer or cohort added columns.
+        pd.DataFrame: Cohort with added columns.
     """
-    een_bachelordiploma = (
-        bachelordiplomas.sort_values(by="Diplomajaar", ascending=True)
-        .drop_duplicates(
-            subset=[
-                "PersoonsgebondenNummer",
-            ],
-            keep="first",
-        )
-        .copy()
-    )
-    result = pd.merge(
-        data,
-        een_bachelordiploma,
-        left_on="PersoonsgebondenNummer",
-        right_on="PersoonsgebondenNummer",
-        how="left",
-        suffixes=["", "_EenDiploma"],
-    )
+    result = _add_fields_of_rows(data, eencijfer, bachelordiploma_rows, FIELDS_BACHELORDIPLOMA, "_EenDiploma")
     result["BachelorDiploma"] = result["Aantal_EenDiploma"].fillna(0)
     result["JaarTotEenDiploma"] = result.Diplomajaar_EenDiploma - result.EersteJaarAanDezeActueleInstelling
-    result["EenDiplomaBinnen4jaar"] = np.where(result["JaarTotEenDiploma"] <= 3, 1, 0)
-    result["EenDiplomaBinnen5jaar"] = np.where(result["JaarTotEenDiploma"] <= 4, 1, 0)
-    result["EenDiplomaBinnen6jaar"] = np.where(result["JaarTotEenDiploma"] <= 5, 1, 0)
-    result["EenDiplomaBinnen7jaar"] = np.where(result["JaarTotEenDiploma"] <= 6, 1, 0)
-    result["EenDiplomaBinnen8jaar"] = np.where(result["JaarTotEenDiploma"] <= 7, 1, 0)
-
-    if not len(data) == len(result):
-        raise Exception('Something went wrong with merge.')
+    for jaren in horizons:
+        result[f"EenDiplomaBinnen{jaren}jaar"] = (result["JaarTotEenDiploma"] <= jaren - 1).astype("int8")
 
     return result
 
 
-def _add_dit_diploma(data: pd.DataFrame, bachelordiplomas: pd.DataFrame) -> pd.DataFrame:
+def _add_dit_diploma(data: pd.DataFrame, eencijfer: pd.DataFrame, bachelordiploma_rows: np.ndarray) -> pd.DataFrame:
     """Add column with 'dit diploma', indicating same croho as in first year.
 
     Args:
-        data (pd.DataFrame): _description_
-        bachelordiplomas (pd.DataFrame): _description_
+        data (pd.DataFrame): cohort.
+        eencijfer (pd.DataFrame): Enriched eencijfer.
+        bachelordiploma_rows (np.ndarray): position of the first bachelordiploma of the student in the same
+            opleiding per row of data.
 
     Returns:
-        pd.DataFrame: _description_
+        pd.DataFrame: Cohort with added columns.
     """
-
-    dit_bachelordiploma = (
-        bachelordiplomas.sort_values(by="Diplomajaar", ascending=True)
-        .drop_duplicates(subset=["PersoonsgebondenNummer", "opleiding"], keep="first")
-        .copy()
-    )
-    result = pd.merge(
-        data,
-        dit_bachelordiploma,
-        left_on=["PersoonsgebondenNummer", "opleiding"],
-        right_on=["PersoonsgebondenNummer", "opleiding"],
-        how="left",
-        suffixes=["", "_DitDiploma"],
-    )
-    if not len(data) == len(result):
-        raise Exception('Something went wrong with merge.')
-
-    return result
+    fields = [field for field in FIELDS_BACHELORDIPLOMA if field != "opleiding"]
+    return _add_fields_of_rows(data, eencijfer, bachelordiploma_rows, fields, "_DitDiploma")
 
 
 def _add_status_student(data: pd.DataFrame, field: str = "StatusNa1Jaar") -> pd.DataFrame:
-    """Add StatusNa1Jaar.
+    """Add StatusNa1Jaar, with the same categories as StatusNaNJaar of the other horizons.
 
     Args:
         data (pd.DataFrame): _description_
@@ -289,31 +305,86 @@ def _add_status_student(data: pd.DataFrame, field: str = "StatusNa1Jaar") -> pd.
 
     data[field] = data[field].replace(
         {
-            1: "ValtUitInJaar1",
+            1: "Uitgevallen",
             3: "DiplomaBehaald",
             4: "HoDiplomaInEersteJaar",
             6: "SwitchBinnenInstelling",
         }
     )
-    data[field] = data[field].fillna("StudeertNogAanHsl")
+    data[field] = data[field].fillna("StudeertNogAanHsl").astype(pd.CategoricalDtype(STATUS_NA_JAREN))
     return data
 
 
-def create_cohorten_met_indicatoren(source_dir: Path) -> pd.DataFrame:
+def _add_status_na_jaren(
+    data: pd.DataFrame, eencijfer: pd.DataFrame, inschrijvingen_per_jaar: np.ndarray, horizons: range = HORIZONS
+) -> pd.DataFrame:
+    """Add StatusNaNJaar per horizon of more than 1 year, StatusNa1Jaar is added by _add_status_student.
+
+    A student with a ho-diploma in the first year or a bachelordiploma within N years has a diploma. Otherwise,
+    a student with a hoofdinschrijving at the instelling N years after the first year studies there in the same
+    or in another opleiding (switch), other students are uitgevallen.
+
+    Args:
+        data (pd.DataFrame): cohort with EenDiplomaBinnenNjaar.
+        eencijfer (pd.DataFrame): Enriched eencijfer.
+        inschrijvingen_per_jaar (np.ndarray): year-offset matrix of the student at the instelling per row of data.
+        horizons (range, optional): horizons in years. Defaults to HORIZONS.
+
+    Returns:
+        pd.DataFrame: cohort with categorical StatusNaNJaar.
+    """
+    for jaren in [jaren for jaren in horizons if jaren > 1]:
+        rows = inschrijvingen_per_jaar[:, jaren]
+        zelfde_opleiding = np.zeros(len(data), dtype=bool)
+        for field in ["opleiding", "OpleidingActueelEquivalent"]:
+            opleiding_na_jaren = pd.Series(take(eencijfer[field].array, rows, allow_fill=True), index=data.index)
+            zelfde_opleiding |= np.asarray(opleiding_na_jaren == data[field], dtype=bool)
+
+        status = np.select(
+            [
+                data.HoDiplomaInEersteJaar == 1,
+                data[f"EenDiplomaBinnen{jaren}jaar"] == 1,
+                (rows != -1) & ~zelfde_opleiding,
+                rows != -1,
+            ],
+            range(4),
+            default=4,
+        )
+        data[f"StatusNa{jaren}Jaar"] = pd.Categorical.from_codes(status, categories=STATUS_NA_JAREN)
+    return data
+
+
+def create_cohorten_met_indicatoren(eencijfer: pd.DataFrame) -> pd.DataFrame:
     """Create cohorten-table from all parts.
 
+    Args:
+        eencijfer (pd.DataFrame): Enriched eencijfer, it is not changed.
+
     Returns:
         pd.DataFrame: _description_
     """
 
     """Levert een cohortbestand met indicatoren eerste jaar."""
-    eencijfer = _create_eencijfer_df(source_dir)
-    instroom = create_actief_hoofd_eerstejaar_instelling(source_dir)
-    inschrijvingen_tweede_jaar = create_inschrijving_jaar2(source_dir)
-    # propedeusediplomas = _propedeuse_diplomas(eencijfer)
-    bachelordiplomas = create_bachelordiplomas(eencijfer)
+    # de inschrijvingen per student, NaN is een student zoals bij mergen.
+    studenten, n_studenten = _get_groups(eencijfer, ["PersoonsgebondenNummer"])
+    student_opleidingen, n_student_opleidingen = _get_groups(eencijfer, ["PersoonsgebondenNummer", "opleiding"])
+    student_instellingen, n_student_instellingen = _get_groups(
+        eencijfer, ["PersoonsgebondenNummer", "ActueleInstelling"]
+    )
+    diplomajaar = eencijfer.Diplomajaar.to_numpy(dtype=float, na_value=np.nan)
 
-    result = merge_cohort_inschrijving_jaar2(instroom, inschrijvingen_tweede_jaar)
+    instroom = np.flatnonzero(_filter_actief_hoofd_eerstejaar_instelling(eencijfer))
+    cohort_studenten = studenten[instroom]
+    result = eencijfer.iloc[instroom].reset_index(drop=True)
+
+    inschrijvingen_tweede_jaar, n_inschrijvingen_tweede_jaar = _get_first_rows(
+        studenten, n_studenten, _filter_inschrijving_jaar2(eencijfer)
+    )
+    if (n_inschrijvingen_tweede_jaar[cohort_studenten] > 1).any():
+        raise Exception("Merging gave too much rows.")
+    result = _add_fields_of_rows(
+        result, eencijfer, inschrijvingen_tweede_jaar[cohort_studenten], FIELDS_JAAR2, "_2ejaar"
+    )
 
     result["UitvalEerstejaar"] = np.where(
         ((result.ActueleInstelling == result.ActueleInstelling_2ejaar) | (result.HoDiplomaInEersteJaar == 1)),
@@ -338,18 +409,21 @@ def create_cohorten_met_indicatoren(source_dir: Path) -> pd.DataFrame:
         0,
     )
 
-    if not len(instroom) == len(result):
-        raise Exception('Something went wrong with merge.')
-
     # diploma in 1 jaar:
-    result = add_propedeuse_in_1_jaar(result)
+    propedeusediplomas, _ = _get_first_rows(studenten, n_studenten, _filter_propedeuse_diplomas(eencijfer), diplomajaar)
+    result = add_propedeuse_in_1_jaar(result, eencijfer, propedeusediplomas[cohort_studenten])
 
     result = _add_herinschrijver_met_propedeuse(result)
 
-    # een bachelordiploma:
-    result = _add_een_diploma(result, bachelordiplomas)
-    result = _add_dit_diploma(result, bachelordiplomas)
+    # een bachelordiploma, en een bachelordiploma van de opleiding van het eerste jaar:
+    bachelordiplomas = _filter_bachelordiplomas(eencijfer)
+    een_diploma, _ = _get_first_rows(studenten, n_studenten, bachelordiplomas, diplomajaar)
+    result = _add_een_diploma(result, eencijfer, een_diploma[cohort_studenten])
+    dit_diploma, _ = _get_first_rows(student_opleidingen, n_student_opleidingen, bachelordiplomas, diplomajaar)
+    result = _add_dit_diploma(result, eencijfer, dit_diploma[student_opleidingen[instroom]])
     result = _add_status_student(result)
+    inschrijvingen_per_jaar = _get_inschrijvingen_per_jaar(eencijfer, student_instellingen, n_student_instellingen)
+    result = _add_status_na_jaren(result, eencijfer, inschrijvingen_per_jaar[student_instellingen[instroom]])
     print("Voeg Cohort toe")
     result["Cohort"] = result["Inschrijvingsjaar"]
     result["CohortType"] = result["InPACohortDefinitie"].replace({"Ja": "EersteKeerHO", "Nee": "EersteKeerHsl"})
@@ -0,0 +1,54 @@
+"""Data shared by the assets of one run of create-assets."""
+
+import logging
+import threading
+from functools import cached_property
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+from eencijfer.assets.eencijfer import AssetBackend, _create_eencijfer_df
+
+logger = logging.getLogger(__name__)
+
+
+class AssetContext:
+    """Sources of the assets, every source is loaded at most once per run.
+
+    The enriched eencijfer is created the first time it is asked for and then
+    shared by all assets that need it. Asset-builders should not change it in
+    place, they filter or copy it instead. Built assets are kept in assets, so
+    assets that are made from other assets can use them.
+    """
+
+    def __init__(self, source_dir: Path, backend: AssetBackend = AssetBackend.pandas, from_year: Optional[int] = None):
+        """Context for the converted eencijfer-files in source_dir.
+
+        Args:
+            source_dir (Path): Path to directory with converted eencijfer-files.
+            backend (AssetBackend, optional): Backend for enriching the eencijfer. Defaults to AssetBackend.pandas.
+            from_year (Optional[int], optional): Only read inschrijvingen and eindexamens from this year on.
+                Defaults to None, all years.
+        """
+        self.source_dir = source_dir
+        self.backend = backend
+        self.from_year = from_year
+        self.assets: dict = {}
+        self._lock = threading.Lock()
+
+    @cached_property
+    def eencijfer(self) -> pd.DataFrame:
+        """Enriched eencijfer.
+
+        Returns:
+            pd.DataFrame: eencijfer with information about vooropleiding and opleiding.
+        """
+        # assets are built on several threads, the eencijfer should still be created only once.
+        with self._lock:
+            if "eencijfer" not in self.__dict__:
+                logger.info(f"Creating enriched eencijfer with {self.backend.value}...")
+                self.__dict__["eencijfer"] = _create_eencijfer_df(
+                    self.source_dir, backend=self.backend, from_year=self.from_year
+                )
+        return self.__dict__["eencijfer"]
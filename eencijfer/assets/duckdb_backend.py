@@ -0,0 +1,851 @@
+"""Data assets, created with duckdb.
+
+The converted parquet-files are registered as duckdb-relations and the assets
+eencijfer, cohorten and eindexamencijfers are expressed as SQL-views on top of
+them. Duckdb only reads the columns that are needed and runs the views out of
+core and in parallel, so this also works for histories that do not fit in memory.
+
+The views follow the pandas-pipelines in `eencijfer.assets` step by step, including
+the way pd.merge names columns, so both backends give the same assets. Every view
+has a column ROW_NUMBER with the order of the rows in the pandas-asset, it is
+removed when an asset is saved.
+"""
+
+import logging
+from pathlib import Path
+from typing import Optional
+
+import duckdb
+import pandas as pd
+
+from eencijfer.assets.cohorten import HORIZONS
+from eencijfer.assets.transformations.diploma import SOORT_DIPLOMA
+from eencijfer.assets.transformations.opleiding import CROHO_SECTOREN, DATASETS_DIR, TYPE_OPLEIDING
+from eencijfer.assets.transformations.vooropleiding import (
+    _add_profiel_havo_vwo,
+    _add_vooropleiding_kort,
+    _get_rename_fields_instelling_vooropleiding,
+)
+from eencijfer.io.files import ExportFormat, _save_to_file
+from eencijfer.io.reference import _get_reference_table
+from eencijfer.utils.detect_eencijfer_files import _get_eencijfer_datafile, _get_eindexamen_datafile
+
+logger = logging.getLogger(__name__)
+
+ROW_NUMBER = "__row_number"
+NUMERIC_TYPES = ["TINYINT", "SMALLINT", "INTEGER", "BIGINT", "HUGEINT", "FLOAT", "DOUBLE", "DECIMAL"]
+CIJFER_FIELDS = [
+    "CijferEersteCentraalExamen",
+    "CijferTweedeCentraalExamen",
+    "CijferDerdeCentraalExamen",
+    "CijferSchoolexamen",
+]
+
+
+def _quote(name: str) -> str:
+    """Quote name of column or relation for use in SQL."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _literal(value) -> str:
+    """Write value as SQL-literal."""
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    return str(value)
+
+
+def _get_column_types(con: duckdb.DuckDBPyConnection, relation: str) -> dict:
+    """Columns of relation with their duckdb-type, in order.
+
+    Args:
+        con (duckdb.DuckDBPyConnection): connection
+        relation (str): name of table or view
+
+    Returns:
+        dict: duckdb-type per column.
+    """
+    return {name: column_type for name, column_type, *_ in con.execute(f"DESCRIBE {_quote(relation)}").fetchall()}
+
+
+def _is_numeric(column_type: str) -> bool:
+    """Checks whether a duckdb-type is a number (unsigned types included)."""
+    return any(column_type.upper().lstrip("U").startswith(numeric_type) for numeric_type in NUMERIC_TYPES)
+
+
+def _get_from_year_where(column: str, from_year: Optional[int]) -> str:
+    """Where-clause for rows from a year on, duckdb pushes it down to the parquet-reader.
+
+    Args:
+        column (str): SQL-expression of the column with the year, like e.Diplomajaar.
+        from_year (Optional[int]): first year, None for all years.
+
+    Returns:
+        str: where-clause, empty for all rows.
+    """
+    return "" if from_year is None else f"WHERE {column} >= {int(from_year)}"
+
+
+def _create_view(con: duckdb.DuckDBPyConnection, name: str, query: str) -> None:
+    """Create or replace a temporary view.
+
+    Args:
+        con (duckdb.DuckDBPyConnection): connection
+        name (str): name of view
+        query (str): select-statement
+
+    Returns:
+        None: creates a view.
+    """
+    logger.debug(f"...creating view {name}")
+    con.execute(f"CREATE OR REPLACE TEMP VIEW {_quote(name)} AS {query}")
+    return None
+
+
+def _check_unique(con: duckdb.DuckDBPyConnection, relation: str, keys: list) -> None:
+    """Checks that a reference-table has one row per key, so a left join does not add rows.
+
+    Args:
+        con (duckdb.DuckDBPyConnection): connection
+        relation (str): name of table or view
+        keys (list): columns that should be unique together
+
+    Raises:
+        Exception: keys are not unique.
+
+    Returns:
+        None: None
+    """
+    columns = ", ".join(_quote(key) for key in keys)
+    query = f"SELECT count(*) FROM (SELECT {columns} FROM {_quote(relation)} GROUP BY ALL HAVING count(*) > 1)"
+    if con.execute(query).fetchone()[0] > 0:
+        raise Exception(f"Lengths of dataframes do not match, {keys} in {relation} is not unique.")
+    return None
+
+
+def _merge(
+    con: duckdb.DuckDBPyConnection,
+    name: str,
+    left: str,
+    right: str,
+    left_on: list,
+    right_on: list,
+    suffix: str,
+) -> None:
+    """Create view with a left join that names the columns like pd.merge(how="left", suffixes=["", suffix]).
+
+    Keys with the same name on both sides become one column, other columns of right
+    that are also in left get the suffix. Like pandas, missing keys match each other.
+
+    Args:
+        con (duckdb.DuckDBPyConnection): connection
+        name (str): name of the new view
+        left (str): left relation
+        right (str): right relation, should have one row per key
+        left_on (list): keys in left
+        right_on (list): keys in right
+        suffix (str): suffix for columns of right that are also in left
+
+    Returns:
+        None: creates a view.
+    """
+    left_columns = list(_get_column_types(con, left))
+    right_columns = list(_get_column_types(con, right))
+    shared_keys = [left_key for left_key, right_key in zip(left_on, right_on) if left_key == right_key]
+
+    select = [f"l.{_quote(column)}" for column in left_columns]
+    for column in right_columns:
+        if column in shared_keys:
+            continue
+        new_name = column + suffix if column in left_columns else column
+        select.append(f"r.{_quote(column)} AS {_quote(new_name)}")
+
+    condition = " AND ".join(
+        f"l.{_quote(left_key)} IS NOT DISTINCT FROM r.{_quote(right_key)}"
+        for left_key, right_key in zip(left_on, right_on)
+    )
+    _create_view(
+        con, name, f"SELECT {', '.join(select)} FROM {_quote(left)} AS l LEFT JOIN {_quote(right)} AS r ON {condition}"
+    )
+    return None
+
+
+def _replace_values(column: str, mapping: dict, column_type: str) -> str:
+    """SQL that replaces values of column like pd.Series.replace does.
+
+    pandas only replaces values of the same type as the keys, for example integer
+    keys do not replace the strings in a column with codes.
+
+    Args:
+        column (str): name of column
+        mapping (dict): new value per value
+        column_type (str): duckdb-type of column
+
+    Returns:
+        str: SQL-expression.
+    """
+    key_type = (int, float) if _is_numeric(column_type) else str
+    cases = [
+        f"WHEN {_literal(key)} THEN {_literal(value)}" for key, value in mapping.items() if isinstance(key, key_type)
+    ]
+    if not cases:
+        return _quote(column)
+    return f"CASE {_quote(column)} {' '.join(cases)} ELSE CAST({_quote(column)} AS VARCHAR) END"
+
+
+def _equals_value(column: str, value, column_type: str) -> str:
+    """SQL that compares column with a value like pandas does, values of another type are never equal.
+
+    Args:
+        column (str): name of column
+        value (Any): value to compare with
+        column_type (str): duckdb-type of column
+
+    Returns:
+        str: SQL-expression.
+    """
+    if isinstance(value, str) == _is_numeric(column_type):
+        return "false"
+    return f"({_quote(column)} = {_literal(value)})"
+
+
+def _register_vooropleiding(con: duckdb.DuckDBPyConnection, reference_dir: Path) -> None:
+    """Register Dec_vopl with profiel and short description of vooropleiding.
+
+    Dec_vopl is small, so this is done with the functions of the pandas-pipeline.
+
+    Args:
+        con (duckdb.DuckDBPyConnection): connection
+        reference_dir (Path): directory with converted reference-tables.
+
+    Returns:
+        None: registers the relation vooropleiding.
+    """
+    Dec_vopl = _get_reference_table('Dec_vopl', key='VooropleidingCode', source_dir=reference_dir)
+    con.register("vooropleiding", _add_vooropleiding_kort(_add_profiel_havo_vwo(Dec_vopl)))
+    _check_unique(con, "vooropleiding", ["VooropleidingCode"])
+    return None
+
+
+def _create_eencijfer_view(
+    con: duckdb.DuckDBPyConnection, source_dir: Path, reference_dir: Path, from_year: Optional[int] = None
+) -> None:
+    """Create view eencijfer, enriched like `_create_eencijfer_df` does.
+
+    Args:
+        con (duckdb.DuckDBPyConnection): connection
+        source_dir (Path): directory with the converted eencijfer.
+        reference_dir (Path): directory with converted reference-tables.
+        from_year (Optional[int], optional): Only inschrijvingen from this Inschrijvingsjaar on.
+            Defaults to None, all years.
+
+    Raises:
+        Exception: No eencijfer found or reference-tables do not match the eencijfer.
+
+    Returns:
+        None: creates the view eencijfer.
+    """
+    eencijfer_fname = _get_eencijfer_datafile(source_dir)
+    if not eencijfer_fname:
+        raise Exception(f'No data found {eencijfer_fname}')
+    eencijfer_fpath = Path(source_dir / eencijfer_fname).with_suffix('.parquet')
+    vooropleiding_field = "HoogsteVooropleiding"
+
+    _create_view(
+        con,
+        "ev",
+        f"SELECT * EXCLUDE (file_row_number), 1::BIGINT AS Aantal, file_row_number AS {ROW_NUMBER} "
+        f"FROM read_parquet({_literal(eencijfer_fpath.as_posix())}, file_row_number = true) "
+        f"{_get_from_year_where(_quote('Inschrijvingsjaar'), from_year)}",
+    )
+
+    # voeg informatie over vooropleiding toe:
+    _register_vooropleiding(con, reference_dir)
+    _merge(con, "ev_vopl", "ev", "vooropleiding", [vooropleiding_field], ["VooropleidingCode"], "_Vooropleiding")
+    rename_fields = {
+        "OmschrijvingVooropleiding": vooropleiding_field + "Volledig",
+        "ProfielVooropleiding": vooropleiding_field + "Profiel",
+        "VooropleidingCode": vooropleiding_field + "Code",
+    }
+    _create_view(con, "ev_vopl_renamed", _select_renamed(con, "ev_vopl", rename_fields))
+
+    rename_fields = _get_rename_fields_instelling_vooropleiding(vooropleiding_field)
+    _create_view(
+        con,
+        "Dec_brinvestigingsnummer",
+        f"SELECT * FROM read_parquet({_literal((reference_dir / 'Dec_brinvestigingsnummer.parquet').as_posix())})",
+    )
+    _create_view(con, "instelling_vooropleiding", _select_renamed(con, "Dec_brinvestigingsnummer", rename_fields))
+    keys = [rename_fields["Brinnummer"], rename_fields["Vestigingsnummer"]]
+    _check_unique(con, "instelling_vooropleiding", keys)
+    _merge(con, "ev_instelling", "ev_vopl_renamed", "instelling_vooropleiding", keys, keys, "_Vooropleiding")
+
+    # voeg informatie over inschrijving toe:
+    for reference in ["Dec_isat", "Dec_ho_ISCED"]:
+        reference_fpath = (reference_dir / f'{reference}.parquet').as_posix()
+        _create_view(con, reference, f"SELECT * FROM read_parquet({_literal(reference_fpath)})")
+        _check_unique(con, reference, ["Opleidingscode"])
+    _merge(
+        con, "ev_isat", "ev_instelling", "Dec_isat", ["OpleidingActueelEquivalent"], ["Opleidingscode"], "_opleiding"
+    )
+    columns = [column for column in _get_column_types(con, "ev_isat") if "_opleiding" not in column]
+    _create_view(
+        con,
+        "ev_naam_opleiding",
+        _select_renamed(con, "ev_isat", {"NaamOpleiding": "NaamOpleidingCroho"}, columns=columns),
+    )
+    if con.execute("SELECT count(*) FROM ev_naam_opleiding WHERE NaamOpleidingCroho IS NULL").fetchone()[0] > 0:
+        raise Exception("Niet alle opleidingen hebben een naam")
+
+    types = _get_column_types(con, "ev_naam_opleiding")
+    croho_onderdeel = _replace_values(
+        "CrohoOnderdeelActueleOpleiding", CROHO_SECTOREN, types["CrohoOnderdeelActueleOpleiding"]
+    )
+    soort_diploma = _replace_values(
+        "OpleidingsfaseActueelVanHetDiploma", SOORT_DIPLOMA, types["OpleidingsfaseActueelVanHetDiploma"]
+    )
+    type_opleiding = _replace_values("Opleidingsfase", TYPE_OPLEIDING, types["Opleidingsfase"])
+    _create_view(
+        con,
+        "ev_opleiding",
+        f"""
+        SELECT
+            *,
+            coalesce(OpleidingHistorischEquivalent, OpleidingActueelEquivalent) AS opleiding,
+            coalesce({croho_onderdeel}, 'onbekend') AS CrohoOnderdeel,
+            {soort_diploma} AS SoortDiploma,
+            CASE WHEN SoortDiplomaSoortHogerOnderwijs >= 3 AND SoortDiplomaSoortHogerOnderwijs <= 10
+                AND Diplomajaar = EersteJaarAanDezeActueleInstelling THEN 1 ELSE 0 END::BIGINT
+                AS HoDiplomaInEersteJaar,
+            coalesce({type_opleiding}, 'onbekend') AS TypeOpleiding
+        FROM ev_naam_opleiding""",
+    )
+
+    lokale_namen_fpath = DATASETS_DIR / "21RI" / "croho_naam_opleiding_faculteit.csv"
+    if not lokale_namen_fpath.exists():
+        raise Exception(f"Bestand {lokale_namen_fpath} bestaat niet!")
+    _create_view(
+        con,
+        "lokale_namen",
+        f"SELECT * FROM read_csv({_literal(lokale_namen_fpath.as_posix())}, delim = ';', header = true, "
+        "all_varchar = true)",
+    )
+    _merge(
+        con,
+        "ev_lokale_naam",
+        "ev_opleiding",
+        "lokale_namen",
+        ["OpleidingActueelEquivalent"],
+        ["Opleidingscode"],
+        "_naam",
+    )
+    columns = [column for column in _get_column_types(con, "ev_lokale_naam") if column != "Opleidingscode_naam"]
+    _create_view(con, "ev_lokale_naam_opleiding", _select_renamed(con, "ev_lokale_naam", {}, columns=columns))
+
+    types = _get_column_types(con, "ev_lokale_naam_opleiding")
+    in_pa_cohort = " AND ".join(
+        [
+            _equals_value("IndicatieActiefOpPeildatum", 1, types["IndicatieActiefOpPeildatum"]),
+            _equals_value("SoortInschrijvingHogerOnderwijs", 1, types["SoortInschrijvingHogerOnderwijs"]),
+            _equals_value(
+                "TypeHogerOnderwijsBinnenSoortHogerOnderwijs",
+                "ba",
+                types["TypeHogerOnderwijsBinnenSoortHogerOnderwijs"],
+            ),
+            "NOT coalesce(starts_with(CAST(Opleidingscode AS VARCHAR), '80'), false)",
+            "Opleidingsvorm = 'voltijd'",
+            "HoogsteVooropleiding = HoogsteVooropleidingVoorHetHo",
+            "EersteJaarInHetHogerOnderwijs = Inschrijvingsjaar",
+        ]
+    )
+    _create_view(
+        con,
+        "ev_pa_cohort",
+        f"SELECT *, CASE WHEN {in_pa_cohort} THEN 'Ja' ELSE 'Nee' END AS InPACohortDefinitie "
+        "FROM ev_lokale_naam_opleiding",
+    )
+
+    _merge(con, "eencijfer", "ev_pa_cohort", "Dec_ho_ISCED", ["Opleidingscode"], ["Opleidingscode"], "_opleiding")
+    if con.execute("SELECT count(*) FROM eencijfer WHERE ISCEDF2013Rubriek IS NULL").fetchone()[0] > 0:
+        raise Exception("Not all rows have ISCEDF2013Rubriek")
+    return None
+
+
+def _select_renamed(
+    con: duckdb.DuckDBPyConnection, relation: str, rename_fields: dict, columns: Optional[list] = None
+) -> str:
+    """Select-statement that renames columns and keeps their order.
+
+    Args:
+        con (duckdb.DuckDBPyConnection): connection
+        relation (str): name of table or view
+        rename_fields (dict): new name per column, columns that are not in relation are skipped.
+        columns (Optional[list], optional): Columns to select, all columns when None.
+
+    Returns:
+        str: select-statement.
+    """
+    columns = columns or list(_get_column_types(con, relation))
+    select = [f"{_quote(column)} AS {_quote(rename_fields.get(column, column))}" for column in columns]
+    return f"SELECT {', '.join(select)} FROM {_quote(relation)}"
+
+
+def _first_per_key(relation: str, keys: list, where: str, columns: list) -> str:
+    """Select-statement with the row with the lowest Diplomajaar per key.
+
+    Args:
+        relation (str): name of table or view
+        keys (list): rows are deduplicated on these columns
+        where (str): SQL-condition for rows to keep
+        columns (list): columns to select
+
+    Returns:
+        str: select-statement.
+    """
+    partition = ", ".join(_quote(key) for key in keys)
+    return f"""
+        SELECT {', '.join(_quote(column) for column in columns)}
+        FROM {_quote(relation)}
+        WHERE {where}
+        QUALIFY row_number() OVER (PARTITION BY {partition} ORDER BY Diplomajaar NULLS LAST, {ROW_NUMBER}) = 1"""
+
+
+def _create_inschrijvingen_per_jaar_view(con: duckdb.DuckDBPyConnection, hoofdinschrijving: str) -> None:
+    """Create view with the hoofdinschrijving per student and instelling for every horizon, like the year-offset matrix.
+
+    Args:
+        con (duckdb.DuckDBPyConnection): connection with the view eencijfer.
+        hoofdinschrijving (str): SQL-condition for hoofdinschrijvingen.
+
+    Returns:
+        None: creates the view inschrijvingen_per_jaar.
+    """
+    horizons = [jaren for jaren in HORIZONS if jaren > 1]
+    per_jaar = ",\n".join(
+        f"""bool_or(jaar = {jaren}) AS ingeschreven_na_{jaren},
+            max(opleiding) FILTER (WHERE jaar = {jaren}) AS opleiding_na_{jaren},
+            max(OpleidingActueelEquivalent) FILTER (WHERE jaar = {jaren}) AS equivalent_na_{jaren}"""
+        for jaren in horizons
+    )
+    _create_view(
+        con,
+        "inschrijvingen_per_jaar",
+        f"""
+        SELECT PersoonsgebondenNummer, ActueleInstelling, {per_jaar}
+        FROM (
+            SELECT *, Inschrijvingsjaar - EersteJaarAanDezeActueleInstelling AS jaar
+            FROM eencijfer
+            WHERE {hoofdinschrijving}
+                AND Inschrijvingsjaar - EersteJaarAanDezeActueleInstelling BETWEEN {min(horizons)} AND {max(horizons)}
+            QUALIFY row_number() OVER (
+                PARTITION BY PersoonsgebondenNummer, ActueleInstelling, jaar ORDER BY {ROW_NUMBER}
+            ) = 1
+        )
+        GROUP BY PersoonsgebondenNummer, ActueleInstelling""",
+    )
+    return None
+
+
+def _get_status_na_jaren(jaren: int) -> str:
+    """SQL-expression for StatusNaNJaar, like `_add_status_na_jaren` does.
+
+    Args:
+        jaren (int): horizon in years.
+
+    Returns:
+        str: SQL-expression.
+    """
+    ingeschreven = f"coalesce(j.ingeschreven_na_{jaren}, false)"
+    zelfde_opleiding = (
+        f"coalesce(j.opleiding_na_{jaren} = c.opleiding, false) "
+        f"OR coalesce(j.equivalent_na_{jaren} = c.OpleidingActueelEquivalent, false)"
+    )
+    return f"""CASE
+                WHEN HoDiplomaInEersteJaar = 1 THEN 'HoDiplomaInEersteJaar'
+                WHEN EenDiplomaBinnen{jaren}jaar = 1 THEN 'DiplomaBehaald'
+                WHEN {ingeschreven} AND NOT ({zelfde_opleiding}) THEN 'SwitchBinnenInstelling'
+                WHEN {ingeschreven} THEN 'StudeertNogAanHsl'
+                ELSE 'Uitgevallen'
+            END AS StatusNa{jaren}Jaar"""
+
+
+def _create_cohorten_view(con: duckdb.DuckDBPyConnection) -> None:
+    """Create view cohorten from view eencijfer, like `create_cohorten_met_indicatoren` does.
+
+    Args:
+        con (duckdb.DuckDBPyConnection): connection with the view eencijfer.
+
+    Raises:
+        Exception: A student has more than one inschrijving in the second year.
+
+    Returns:
+        None: creates the view cohorten.
+    """
+    types = _get_column_types(con, "eencijfer")
+    actief = _equals_value("IndicatieActiefOpPeildatum", 1, types["IndicatieActiefOpPeildatum"])
+    hoofdinschrijving = _equals_value("SoortInschrijvingHogerOnderwijs", 1, types["SoortInschrijvingHogerOnderwijs"])
+
+    _create_view(
+        con,
+        "instroom",
+        f"""SELECT * FROM eencijfer
+        WHERE Inschrijvingsjaar = EersteJaarAanDezeActueleInstelling AND {hoofdinschrijving} AND {actief}""",
+    )
+    fields_jaar2 = [
+        "PersoonsgebondenNummer",
+        "opleiding",
+        "ActueleInstelling",
+        "Opleidingsvorm",
+        "OpleidingActueelEquivalent",
+    ]
+    _create_view(
+        con,
+        "inschrijvingen_tweede_jaar",
+        f"""SELECT {', '.join(fields_jaar2)} FROM eencijfer
+        WHERE Inschrijvingsjaar = EersteJaarAanDezeActueleInstelling + 1 AND {hoofdinschrijving}""",
+    )
+    _merge(
+        con,
+        "instroom_jaar2",
+        "instroom",
+        "inschrijvingen_tweede_jaar",
+        ["PersoonsgebondenNummer"],
+        ["PersoonsgebondenNummer"],
+        "_2ejaar",
+    )
+    if (
+        con.execute("SELECT count(*) FROM instroom_jaar2").fetchone()[0]
+        != con.execute("SELECT count(*) FROM instroom").fetchone()[0]
+    ):
+        raise Exception("Merging gave too much rows.")
+
+    _create_view(
+        con,
+        "instroom_uitval",
+        """
+        SELECT
+            *,
+            CASE WHEN ActueleInstelling = ActueleInstelling_2ejaar OR HoDiplomaInEersteJaar = 1 THEN 0 ELSE 1 END
+                AS UitvalEerstejaar,
+            CASE WHEN OpleidingActueelEquivalent = OpleidingActueelEquivalent_2ejaar OR opleiding = opleiding_2ejaar
+                THEN 1 ELSE 0 END AS opleiding_gelijk,
+            CASE WHEN ActueleInstelling = ActueleInstelling_2ejaar THEN 1 ELSE 0 END AS HerinschrijvingInstelling
+        FROM instroom_jaar2""",
+    )
+    _create_view(
+        con,
+        "propedeusediplomas",
+        _first_per_key(
+            "eencijfer",
+            ["PersoonsgebondenNummer"],
+            "Diplomajaar IS NOT NULL AND OpleidingsfaseActueelVanHetDiploma = 'D'",
+            ["PersoonsgebondenNummer", "EersteJaarAanDezeActueleInstelling", "Diplomajaar"],
+        ),
+    )
+    _create_view(
+        con,
+        "instroom_propedeuse",
+        """
+        SELECT
+            *,
+            CASE WHEN opleiding_gelijk = 0 AND UitvalEerstejaar = 0 AND HoDiplomaInEersteJaar = 0 THEN 1 ELSE 0 END
+                AS SwitchBinnenInstelling,
+            CASE WHEN PersoonsgebondenNummer IN (
+                SELECT PersoonsgebondenNummer FROM propedeusediplomas
+                WHERE EersteJaarAanDezeActueleInstelling = Diplomajaar
+            ) THEN 1 ELSE 0 END AS PropedeuseIn1Jaar,
+            CASE WHEN PersoonsgebondenNummer IN (
+                SELECT PersoonsgebondenNummer FROM propedeusediplomas
+                WHERE EersteJaarAanDezeActueleInstelling = Diplomajaar
+                    OR EersteJaarAanDezeActueleInstelling + 1 = Diplomajaar
+            ) THEN 1 ELSE 0 END AS PropedeuseIn2Jaar
+        FROM instroom_uitval""",
+    )
+    _create_view(
+        con,
+        "instroom_herinschrijving",
+        """
+        SELECT
+            *,
+            CASE WHEN UitvalEerstejaar = 1 AND PropedeuseIn1Jaar = 1 THEN 1 ELSE 0 END AS Uitval1JaarMetPropedeuse,
+            CASE WHEN HerinschrijvingInstelling = 1 AND PropedeuseIn1Jaar = 1 THEN 1 ELSE 0 END
+                AS HerinschrijvingMetPropedeuse
+        FROM instroom_propedeuse""",
+    )
+
+    # een bachelordiploma:
+    fields = [
+        "PersoonsgebondenNummer",
+        "OpleidingActueelEquivalent",
+        "opleiding",
+        "DatumTekeningDiploma",
+        "Diplomajaar",
+        "Opleidingsvorm",
+        "Aantal",
+    ]
+    # like pandas, a missing Diplomajaar is not equal to 0.
+    bachelordiploma = "(Diplomajaar != 0 OR Diplomajaar IS NULL) AND OpleidingsfaseActueelVanHetDiploma = 'B'"
+    _create_view(
+        con, "een_bachelordiploma", _first_per_key("eencijfer", ["PersoonsgebondenNummer"], bachelordiploma, fields)
+    )
+    _merge(
+        con,
+        "instroom_een_diploma",
+        "instroom_herinschrijving",
+        "een_bachelordiploma",
+        ["PersoonsgebondenNummer"],
+        ["PersoonsgebondenNummer"],
+        "_EenDiploma",
+    )
+    binnen_jaren = ",\n".join(
+        f"(CASE WHEN JaarTotEenDiploma <= {jaren - 1} THEN 1 ELSE 0 END)::TINYINT AS EenDiplomaBinnen{jaren}jaar"
+        for jaren in HORIZONS
+    )
+    _create_view(
+        con,
+        "instroom_jaar_tot_diploma",
+        """
+        SELECT
+            *,
+            coalesce(Aantal_EenDiploma, 0) AS BachelorDiploma,
+            Diplomajaar_EenDiploma - EersteJaarAanDezeActueleInstelling AS JaarTotEenDiploma
+        FROM instroom_een_diploma""",
+    )
+    _create_view(con, "instroom_binnen_jaren", f"SELECT *, {binnen_jaren} FROM instroom_jaar_tot_diploma")
+
+    keys = ["PersoonsgebondenNummer", "opleiding"]
+    _create_view(con, "dit_bachelordiploma", _first_per_key("eencijfer", keys, bachelordiploma, fields))
+    _merge(con, "instroom_dit_diploma", "instroom_binnen_jaren", "dit_bachelordiploma", keys, keys, "_DitDiploma")
+
+    _create_inschrijvingen_per_jaar_view(con, hoofdinschrijving)
+    status_na_jaren = ",\n".join(_get_status_na_jaren(jaren) for jaren in HORIZONS if jaren > 1)
+
+    types = _get_column_types(con, "instroom_dit_diploma")
+    cohort_type = _replace_values(
+        "InPACohortDefinitie", {"Ja": "EersteKeerHO", "Nee": "EersteKeerHsl"}, types["InPACohortDefinitie"]
+    )
+    type_opleiding = _replace_values(
+        "TypeHogerOnderwijsBinnenSoortHogerOnderwijs",
+        {"ba": "bachelor", "ma": "master", "ad": "associate degree"},
+        types["TypeHogerOnderwijsBinnenSoortHogerOnderwijs"],
+    )
+    _create_view(
+        con,
+        "cohorten",
+        f"""
+        SELECT
+            c.* REPLACE ({type_opleiding} AS TypeOpleiding),
+            CASE
+                WHEN HoDiplomaInEersteJaar = 1 THEN 'HoDiplomaInEersteJaar'
+                WHEN SwitchBinnenInstelling = 1 THEN 'SwitchBinnenInstelling'
+                WHEN UitvalEerstejaar = 1 THEN 'Uitgevallen'
+                ELSE 'StudeertNogAanHsl'
+            END AS StatusNa1Jaar,
+            {status_na_jaren},
+            Inschrijvingsjaar AS Cohort,
+            {cohort_type} AS CohortType
+        FROM instroom_dit_diploma AS c
+        LEFT JOIN inschrijvingen_per_jaar AS j
+            ON c.PersoonsgebondenNummer IS NOT DISTINCT FROM j.PersoonsgebondenNummer
+            AND c.ActueleInstelling IS NOT DISTINCT FROM j.ActueleInstelling""",
+    )
+    return None
+
+
+def _create_eindexamencijfers_view(
+    con: duckdb.DuckDBPyConnection, source_dir: Path, reference_dir: Path, from_year: Optional[int] = None
+) -> None:
+    """Create view eindexamencijfers with the last attempt per vak, like `_create_eindexamencijfer_df` does.
+
+    Args:
+        con (duckdb.DuckDBPyConnection): connection
+        source_dir (Path): directory with the converted eindexamens.
+        reference_dir (Path): directory with converted reference-tables.
+        from_year (Optional[int], optional): Only eindexamens from this Diplomajaar on. Defaults to None, all years.
+
+    Raises:
+        Exception: No eindexamens found.
+
+    Returns:
+        None: creates the view eindexamencijfers.
+    """
+    eindexamencijfers_fname = _get_eindexamen_datafile(source_dir)
+    if eindexamencijfers_fname is None:
+        raise Exception('No eindexamenfile found!')
+    eindexamencijfers_fpath = Path(source_dir / eindexamencijfers_fname).with_suffix('.parquet')
+
+    Dec_vooropl = _get_reference_table('Dec_vooropl', key='VooropleidingOorspronkelijkeCode', source_dir=reference_dir)
+    con.register(
+        "vooropleiding_oorspronkelijk",
+        _add_vooropleiding_kort(Dec_vooropl, source_column="OmschrijvingVooropleidingOorspronkelijkeCode"),
+    )
+    _check_unique(con, "vooropleiding_oorspronkelijk", ["VooropleidingOorspronkelijkeCode"])
+
+    id_fields = ["PersoonsgebondenNummer", "Vooropleiding", "Diplomajaar", "VakCode", "VakAfkorting"]
+    _create_view(
+        con,
+        "eindexamens",
+        f"""
+        SELECT
+            {', '.join(f'e.{_quote(field)}' for field in id_fields if field != 'Vooropleiding')},
+            v.Vooropleiding,
+            {', '.join(f'e.{_quote(field)}' for field in CIJFER_FIELDS)},
+            e.file_row_number AS {ROW_NUMBER}
+        FROM read_parquet({_literal(eindexamencijfers_fpath.as_posix())}, file_row_number = true) AS e
+        LEFT JOIN vooropleiding_oorspronkelijk AS v
+            ON e.VooropleidingOorspronkelijkeCode IS NOT DISTINCT FROM v.VooropleidingOorspronkelijkeCode
+        {_get_from_year_where('e.Diplomajaar', from_year)}""",
+    )
+
+    # melt: een rij per cijfer, lege waarden weghalen.
+    melted = "\nUNION ALL\n".join(
+        f"""SELECT {', '.join(id_fields)}, {_literal(field)} AS variable, {_quote(field)} AS value,
+            {index} AS variable_index, {ROW_NUMBER}
+        FROM eindexamens WHERE {_quote(field)} IS NOT NULL""" for index, field in enumerate(CIJFER_FIELDS)
+    )
+    _create_view(
+        con,
+        "cijfers",
+        f"""
+        SELECT
+            *,
+            CASE
+                WHEN contains(variable, 'Eerste') THEN 1
+                WHEN contains(variable, 'Tweede') THEN 2
+                WHEN contains(variable, 'Derde') THEN 3
+                ELSE 1
+            END::DOUBLE AS Poging,
+            CASE WHEN contains(variable, 'Centraal') THEN 'CSE' ELSE 'School' END AS SoortExamen
+        FROM ({melted})""",
+    )
+
+    # de laatste poging per vak, in de volgorde van de eindexamens zoals in de pandas-pipeline.
+    exam_keys = ["PersoonsgebondenNummer", "Vooropleiding", "SoortExamen", "VakAfkorting", "VakCode"]
+    _create_view(
+        con,
+        "laatste_cijfers",
+        f"""
+        SELECT *
+        FROM cijfers
+        QUALIFY row_number() OVER (
+            PARTITION BY {', '.join(exam_keys)} ORDER BY Poging DESC, variable_index, {ROW_NUMBER}
+        ) = 1""",
+    )
+    _create_view(
+        con,
+        "eindexamencijfers",
+        f"""
+        SELECT
+            {', '.join(id_fields)},
+            value AS Cijfer,
+            Poging,
+            SoortExamen,
+            row_number() OVER (ORDER BY {ROW_NUMBER}, SoortExamen) AS {ROW_NUMBER}
+        FROM laatste_cijfers""",
+    )
+    return None
+
+
+def _get_asset_query(view: str) -> str:
+    """Select-statement for an asset, in the order of the pandas-asset."""
+    return f"SELECT * EXCLUDE ({ROW_NUMBER}) FROM {_quote(view)} ORDER BY {ROW_NUMBER}"
+
+
+def _read_asset(con: duckdb.DuckDBPyConnection, view: str) -> pd.DataFrame:
+    """Read asset as pandas-dataframe.
+
+    Args:
+        con (duckdb.DuckDBPyConnection): connection with the view of the asset.
+        view (str): name of the asset.
+
+    Returns:
+        pd.DataFrame: asset.
+    """
+    return con.execute(_get_asset_query(view)).df()
+
+
+def _create_eencijfer_df_duckdb(source_dir: Path, reference_dir: Path, from_year: Optional[int] = None) -> pd.DataFrame:
+    """Pipeline voor verrijken van eencijfer-basisbestand met duckdb.
+
+    Args:
+        source_dir (Path): directory with the converted eencijfer.
+        reference_dir (Path): directory with converted reference-tables.
+        from_year (Optional[int], optional): Only inschrijvingen from this Inschrijvingsjaar on.
+            Defaults to None, all years.
+
+    Returns:
+        pd.DataFrame: enriched eencijfer.
+    """
+    with duckdb.connect() as con:
+        _create_eencijfer_view(con, source_dir=source_dir, reference_dir=reference_dir, from_year=from_year)
+        return _read_asset(con, "eencijfer")
+
+
+def _save_asset(con: duckdb.DuckDBPyConnection, view: str, dir: Path, export_format: ExportFormat) -> None:
+    """Save asset in the export_format, csv and parquet are written by duckdb without loading the asset.
+
+    For the export_format duckdb the asset becomes a table in the db of the connection.
+
+    Args:
+        con (duckdb.DuckDBPyConnection): connection with the view of the asset.
+        view (str): name of the asset, also used as file-name.
+        dir (Path): assets-directory.
+        export_format (ExportFormat): The export format.
+
+    Returns:
+        None: writes out a file or table.
+    """
+    query = _get_asset_query(view)
+    fpath = Path(dir / view).with_suffix(f".{export_format.value}")
+
+    if export_format.value == 'parquet':
+        logger.info(f"Saving {view} to {fpath}...")
+        con.execute(f"COPY ({query}) TO {_literal(fpath.as_posix())} (FORMAT PARQUET)")
+    elif export_format.value == 'csv':
+        logger.info(f"Saving {view} to {fpath}...")
+        con.execute(f"COPY ({query}) TO {_literal(fpath.as_posix())} (FORMAT CSV, HEADER, DELIMITER ',')")
+    elif export_format.value == 'duckdb':
+        logger.info(f"Saving {view} to table {view}...")
+        con.execute(f"CREATE OR REPLACE TABLE {_quote(view)} AS {query}")
+    else:
+        _save_to_file(con.execute(query).fetch_arrow_table(), dir=dir, fname=view, export_format=export_format)
+    return None
+
+
+def _create_assets_duckdb(
+    source_dir: Path,
+    reference_dir: Path,
+    assets_dir: Path,
+    export_format: ExportFormat = ExportFormat.parquet,
+    db_name: str = 'eencijfer.duckdb',
+    assets: Optional[list] = None,
+    from_year: Optional[int] = None,
+) -> None:
+    """Create the assets eencijfer, cohorten and eindexamencijfers with duckdb.
+
+    Views are lazy, so only the requested assets are computed when they are saved.
+
+    Args:
+        source_dir (Path): directory with the converted eencijfer and eindexamens.
+        reference_dir (Path): directory with converted reference-tables.
+        assets_dir (Path): directory where assets are saved.
+        export_format (ExportFormat, optional): The export format. Defaults to ExportFormat.parquet.
+        db_name (str, optional): Name of duckdb in assets_dir for export_format duckdb.
+            Defaults to 'eencijfer.duckdb'.
+        assets (Optional[list], optional): Names of assets to save. Defaults to all assets.
+        from_year (Optional[int], optional): Only inschrijvingen from this Inschrijvingsjaar on and
+            eindexamens from this Diplomajaar on. Defaults to None, all years.
+
+    Returns:
+        None: saves the assets.
+    """
+    assets = assets or ["eencijfer", "cohorten", "eindexamencijfers"]
+    database = (assets_dir / db_name).as_posix() if export_format.value == 'duckdb' else ':memory:'
+    with duckdb.connect(database) as con:
+        if "eencijfer" in assets or "cohorten" in assets:
+            _create_eencijfer_view(con, source_dir=source_dir, reference_dir=reference_dir, from_year=from_year)
+            _create_cohorten_view(con)
+        if "eindexamencijfers" in assets:
+            _create_eindexamencijfers_view(con, source_dir=source_dir, reference_dir=reference_dir, from_year=from_year)
+        for name in assets:
+            _save_asset(con, name, dir=assets_dir, export_format=export_format)
+    return None
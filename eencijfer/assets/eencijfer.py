@@ -1,10 +1,13 @@
 """Eencijfer data asset."""
 
 import logging
+from enum import Enum
 from pathlib import Path
+from typing import Optional
 
 import pandas as pd
 
+from eencijfer.assets.duckdb_backend import _create_eencijfer_df_duckdb
 from eencijfer.assets.transformations.diploma import _add_ho_diploma_eerstejaar, _add_soort_diploma
 from eencijfer.assets.transformations.opleiding import (
     _add_croho_onderdeel,
@@ -16,17 +19,55 @@ from eencijfer.assets.transformations.opleiding import (
 )
 from eencijfer.assets.transformations.prestatieafspraken import _add_pa_cohort
 from eencijfer.assets.transformations.vooropleiding import _add_naam_instelling_vooropleiding, _add_vooropleiding
+from eencijfer.io.files import _get_from_year_filter, _read_parquet
+from eencijfer.settings import config
 from eencijfer.utils.detect_eencijfer_files import _get_eencijfer_datafile
 
 logger = logging.getLogger(__name__)
 
 
-def _create_eencijfer_df(source_dir: Path):
-    """Pipeline voor verrijken van eencijfer-basisbestand."""
+class AssetBackend(str, Enum):
+    """Backend for creating the assets.
+
+    pandas runs every step eagerly, polars runs all steps as one lazy query
+    (needs polars to be installed) and duckdb runs all steps as SQL-views on the
+    parquet-files, out of core.
+    """
+
+    pandas = "pandas"
+    polars = "polars"
+    duckdb = "duckdb"
+
+
+def _create_eencijfer_df(
+    source_dir: Path, backend: AssetBackend = AssetBackend.pandas, from_year: Optional[int] = None
+):
+    """Pipeline voor verrijken van eencijfer-basisbestand.
+
+    Args:
+        source_dir (Path): Path to directory with converted eencijfer-files.
+        backend (AssetBackend, optional): Backend for enriching the eencijfer. Defaults to AssetBackend.pandas.
+        from_year (Optional[int], optional): Only read inschrijvingen from this Inschrijvingsjaar on,
+            row-groups of earlier years are skipped. Defaults to None, all years.
+
+    Returns:
+        pd.DataFrame: eencijfer with information about vooropleiding and opleiding.
+    """
+    if backend.value == 'polars':
+        from eencijfer.assets.eencijfer_polars import _create_eencijfer_df_polars
+
+        return _create_eencijfer_df_polars(source_dir, from_year=from_year)
+    if backend.value == 'duckdb':
+        return _create_eencijfer_df_duckdb(
+            source_dir, reference_dir=config.getpath('default', 'source_dir'), from_year=from_year
+        )
 
     eencijfer_fname = _get_eencijfer_datafile(source_dir)
     if eencijfer_fname:
-        eencijfer = pd.read_parquet(Path(source_dir / eencijfer_fname).with_suffix('.parquet'))
+        eencijfer = _read_parquet(
+            Path(source_dir / eencijfer_fname).with_suffix('.parquet'),
+            filter=_get_from_year_filter("Inschrijvingsjaar", from_year),
+        )
 
     if not isinstance(eencijfer, pd.DataFrame):
         raise Exception(f'No data found {eencijfer_fname}')
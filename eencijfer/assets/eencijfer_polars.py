@@ -0,0 +1,318 @@
+"""Eencijfer data asset, enriched with polars.
+
+The same enrichment as the pandas-pipeline in `eencijfer.assets.eencijfer`, but
+expressed as one lazy query: polars optimizes the joins and projections together
+and runs them multi-threaded. The result is converted to a pandas-dataframe that
+equals the one of the pandas-pipeline, so the other assets can use either.
+
+Polars is an optional dependency, it is only imported when this backend is used.
+"""
+
+import logging
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from eencijfer.assets.transformations.diploma import SOORT_DIPLOMA
+from eencijfer.assets.transformations.opleiding import CROHO_SECTOREN, DATASETS_DIR, TYPE_OPLEIDING
+from eencijfer.assets.transformations.vooropleiding import (
+    PROFIELEN,
+    _determine_vooropleiding,
+    _get_rename_fields_instelling_vooropleiding,
+)
+from eencijfer.settings import config
+from eencijfer.utils.detect_eencijfer_files import _get_eencijfer_datafile
+
+if TYPE_CHECKING:
+    import polars as pl
+
+logger = logging.getLogger(__name__)
+
+ROW_NUMBER = "__row_number"
+JOIN_KEY = "__join_key"
+
+
+def _import_polars():
+    """Import polars.
+
+    Raises:
+        Exception: polars is not installed.
+
+    Returns:
+        module: polars
+    """
+    try:
+        import polars as pl
+    except ImportError as e:
+        raise Exception("The polars-backend needs polars, install it with `pip install eencijfer[polars]`.") from e
+    return pl
+
+
+def _join_left(left: "pl.LazyFrame", right: "pl.LazyFrame", left_on: str, right_on: str, suffix: str) -> "pl.LazyFrame":
+    """Left join that keeps the key-columns of both sides when their names differ, like pd.merge.
+
+    Args:
+        left (pl.LazyFrame): left side
+        right (pl.LazyFrame): right side, keys should be unique
+        left_on (str): key in left
+        right_on (str): key in right
+        suffix (str): suffix for columns of right that are also in left
+
+    Returns:
+        pl.LazyFrame: left with the columns of right added.
+    """
+    pl = _import_polars()
+    if left_on == right_on:
+        return left.join(right, on=left_on, how="left", suffix=suffix)
+    right = right.with_columns(pl.col(right_on).alias(JOIN_KEY))
+    return left.join(right, left_on=left_on, right_on=JOIN_KEY, how="left", suffix=suffix)
+
+
+def _replace_values(column: str, mapping: dict, schema: "pl.Schema") -> "pl.Expr":
+    """Replace values of column like pd.Series.replace does.
+
+    pandas only replaces values of the same type as the keys, for example integer
+    keys do not replace the strings in a column with codes.
+
+    Args:
+        column (str): name of column
+        mapping (dict): new value per value
+        schema (pl.Schema): schema of the frame with column
+
+    Returns:
+        pl.Expr: column with values replaced.
+    """
+    pl = _import_polars()
+    key_type = (int, float) if schema[column].is_numeric() else str
+    mapping = {key: value for key, value in mapping.items() if isinstance(key, key_type)}
+    if not mapping:
+        return pl.col(column)
+    return pl.col(column).replace(mapping)
+
+
+def _equals_value(column: str, value, schema: "pl.Schema") -> "pl.Expr":
+    """Compare column with a value like pandas does, values of another type are never equal.
+
+    Args:
+        column (str): name of column
+        value (Any): value to compare with
+        schema (pl.Schema): schema of the frame with column
+
+    Returns:
+        pl.Expr: boolean expression.
+    """
+    pl = _import_polars()
+    if isinstance(value, str) == schema[column].is_numeric():
+        return pl.lit(False)
+    return pl.col(column) == value
+
+
+def _read_vooropleiding(source_dir: Path) -> "pl.DataFrame":
+    """Read Dec_vopl with profiel and short description of vooropleiding.
+
+    Args:
+        source_dir (Path): directory with converted eencijfer-files.
+
+    Returns:
+        pl.DataFrame: Dec_vopl with ProfielVooropleiding and Vooropleiding.
+    """
+    pl = _import_polars()
+    Dec_vopl = pl.read_parquet(source_dir / 'Dec_vopl.parquet')
+    profielen = pl.DataFrame(
+        {"VooropleidingCode": list(PROFIELEN.keys()), "ProfielVooropleiding": list(PROFIELEN.values())}
+    )
+    vooropleiding = Dec_vopl.join(profielen, on="VooropleidingCode", how="left")
+    if len(vooropleiding) != len(Dec_vopl):
+        raise Exception('Lengths of dataframes do not match, something went wrong merging.')
+
+    # Dec_vopl is small, so the short description is determined in python like the pandas-pipeline does.
+    return vooropleiding.with_columns(
+        pl.col("OmschrijvingVooropleiding")
+        .map_elements(_determine_vooropleiding, return_dtype=pl.Utf8)
+        .alias("Vooropleiding")
+    )
+
+
+def _read_unique(source_dir: Path, fname: str) -> "pl.LazyFrame":
+    """Read reference-table that should have one row per Opleidingscode.
+
+    Args:
+        source_dir (Path): directory with converted eencijfer-files.
+        fname (str): name of the parquet-file.
+
+    Raises:
+        Exception: Opleidingscode is not unique.
+
+    Returns:
+        pl.LazyFrame: reference-table.
+    """
+    pl = _import_polars()
+    data = pl.read_parquet(source_dir / fname)
+    if not len(data) == data["Opleidingscode"].n_unique():
+        raise Exception(f'Something went, Opleidingscode in {fname} is not unique.')
+    return data.lazy()
+
+
+def _create_eencijfer_lazyframe(
+    eencijfer_fpath: Path, source_dir: Path, from_year: Optional[int] = None
+) -> "pl.LazyFrame":
+    """Lazy query that enriches the eencijfer like `_create_eencijfer_df` does.
+
+    Args:
+        eencijfer_fpath (Path): parquet-file with eencijfer.
+        source_dir (Path): directory with converted reference-tables.
+        from_year (Optional[int], optional): Only inschrijvingen from this Inschrijvingsjaar on,
+            the filter is pushed down to the parquet-reader. Defaults to None, all years.
+
+    Returns:
+        pl.LazyFrame: enriched eencijfer, with ROW_NUMBER for keeping the order.
+    """
+    pl = _import_polars()
+    vooropleiding_field = "HoogsteVooropleiding"
+
+    eencijfer = pl.scan_parquet(eencijfer_fpath)
+    if from_year is not None:
+        eencijfer = eencijfer.filter(pl.col("Inschrijvingsjaar") >= from_year)
+    eencijfer = eencijfer.with_row_index(ROW_NUMBER).with_columns(pl.lit(1).alias("Aantal"))
+
+    # voeg informatie over vooropleiding toe:
+    eencijfer = _join_left(
+        eencijfer,
+        _read_vooropleiding(source_dir).lazy(),
+        left_on=vooropleiding_field,
+        right_on="VooropleidingCode",
+        suffix="_Vooropleiding",
+    )
+    rename_fields = {
+        "OmschrijvingVooropleiding": vooropleiding_field + "Volledig",
+        "ProfielVooropleiding": vooropleiding_field + "Profiel",
+        "VooropleidingCode": vooropleiding_field + "Code",
+    }
+    eencijfer = eencijfer.rename(rename_fields)
+
+    rename_fields = _get_rename_fields_instelling_vooropleiding(vooropleiding_field)
+    instelling_vooropleiding = pl.scan_parquet(source_dir / 'Dec_brinvestigingsnummer.parquet').rename(rename_fields)
+    eencijfer = eencijfer.join(
+        instelling_vooropleiding,
+        on=[rename_fields["Brinnummer"], rename_fields["Vestigingsnummer"]],
+        how="left",
+        suffix="_Vooropleiding",
+    )
+
+    # voeg informatie over inschrijving toe:
+    eencijfer = _join_left(
+        eencijfer,
+        _read_unique(source_dir, 'Dec_isat.parquet'),
+        left_on="OpleidingActueelEquivalent",
+        right_on="Opleidingscode",
+        suffix="_opleiding",
+    ).rename({"NaamOpleiding": "NaamOpleidingCroho"})
+    eencijfer = eencijfer.drop([col for col in eencijfer.collect_schema().names() if "_opleiding" in col])
+
+    schema = eencijfer.collect_schema()
+    eencijfer = eencijfer.with_columns(
+        pl.when(pl.col("OpleidingHistorischEquivalent").is_not_null())
+        .then(pl.col("OpleidingHistorischEquivalent"))
+        .otherwise(pl.col("OpleidingActueelEquivalent"))
+        .alias("opleiding"),
+        _replace_values("CrohoOnderdeelActueleOpleiding", CROHO_SECTOREN, schema)
+        .fill_null("onbekend")
+        .alias("CrohoOnderdeel"),
+        _replace_values("OpleidingsfaseActueelVanHetDiploma", SOORT_DIPLOMA, schema).alias("SoortDiploma"),
+        pl.when(
+            (pl.col("SoortDiplomaSoortHogerOnderwijs") >= 3)
+            & (pl.col("SoortDiplomaSoortHogerOnderwijs") <= 10)
+            & (pl.col("Diplomajaar") == pl.col("EersteJaarAanDezeActueleInstelling"))
+        )
+        .then(1)
+        .otherwise(0)
+        .cast(pl.Int64)
+        .alias("HoDiplomaInEersteJaar"),
+        _replace_values("Opleidingsfase", TYPE_OPLEIDING, schema).fill_null("onbekend").alias("TypeOpleiding"),
+    )
+
+    lokale_namen_fpath = DATASETS_DIR / "21RI" / "croho_naam_opleiding_faculteit.csv"
+    if not lokale_namen_fpath.exists():
+        raise Exception(f"Bestand {lokale_namen_fpath} bestaat niet!")
+    lokale_namen = pl.scan_csv(lokale_namen_fpath, separator=";", infer_schema_length=0)
+    eencijfer = _join_left(
+        eencijfer, lokale_namen, left_on="OpleidingActueelEquivalent", right_on="Opleidingscode", suffix="_naam"
+    )
+    if "Opleidingscode_naam" in eencijfer.collect_schema().names():
+        eencijfer = eencijfer.drop("Opleidingscode_naam")
+
+    schema = eencijfer.collect_schema()
+    in_pa_cohort = (
+        _equals_value("IndicatieActiefOpPeildatum", 1, schema)
+        & _equals_value("SoortInschrijvingHogerOnderwijs", 1, schema)
+        & _equals_value("TypeHogerOnderwijsBinnenSoortHogerOnderwijs", "ba", schema)
+        & ~pl.col("Opleidingscode").cast(pl.Utf8).str.starts_with("80").fill_null(False)
+        & (pl.col("Opleidingsvorm").cast(pl.Utf8) == "voltijd")
+        & (pl.col("HoogsteVooropleiding") == pl.col("HoogsteVooropleidingVoorHetHo"))
+        & (pl.col("EersteJaarInHetHogerOnderwijs") == pl.col("Inschrijvingsjaar"))
+    )
+    eencijfer = eencijfer.with_columns(
+        pl.when(in_pa_cohort).then(pl.lit("Ja")).otherwise(pl.lit("Nee")).alias("InPACohortDefinitie")
+    )
+
+    eencijfer = _join_left(
+        eencijfer,
+        _read_unique(source_dir, 'Dec_ho_ISCED.parquet'),
+        left_on="Opleidingscode",
+        right_on="Opleidingscode",
+        suffix="_opleiding",
+    )
+    return eencijfer
+
+
+def _create_eencijfer_df_polars(source_dir: Path, from_year: Optional[int] = None) -> pd.DataFrame:
+    """Pipeline voor verrijken van eencijfer-basisbestand met polars.
+
+    Args:
+        source_dir (Path): directory with converted eencijfer-files.
+        from_year (Optional[int], optional): Only inschrijvingen from this Inschrijvingsjaar on.
+            Defaults to None, all years.
+
+    Raises:
+        Exception: No eencijfer found or reference-tables do not match the eencijfer.
+
+    Returns:
+        pd.DataFrame: enriched eencijfer, equal to the result of the pandas-pipeline.
+    """
+    pl = _import_polars()
+
+    eencijfer_fname = _get_eencijfer_datafile(source_dir)
+    if not eencijfer_fname:
+        raise Exception(f'No data found {eencijfer_fname}')
+    eencijfer_fpath = Path(source_dir / eencijfer_fname).with_suffix('.parquet')
+
+    # reference-tables are read from the source_dir in the config, like the pandas-pipeline.
+    reference_dir = config.getpath('default', 'source_dir')
+    eencijfer = _create_eencijfer_lazyframe(eencijfer_fpath, reference_dir, from_year=from_year)
+
+    logger.debug("...collecting enriched eencijfer")
+    result = eencijfer.sort(ROW_NUMBER).drop(ROW_NUMBER).with_columns(pl.col("Aantal").cast(pl.Int64)).collect()
+
+    if result["NaamOpleidingCroho"].null_count() > 0:
+        raise Exception("Niet alle opleidingen hebben een naam")
+    if result["ISCEDF2013Rubriek"].null_count() > 0:
+        raise Exception("Not all rows have ISCEDF2013Rubriek")
+    if result["CodeOpleiding"].null_count() > 0:
+        logger.info("Er zijn opleidingen zonder lokale naam.")
+
+    # polars does not know the pandas-dtypes of the eencijfer (like Int8 or category), these are restored
+    # from the pandas-metadata in the parquet-file.
+    eencijfer_df = result.to_pandas()
+    dtypes = pq.read_schema(eencijfer_fpath).empty_table().to_pandas().dtypes
+    for column, dtype in dtypes.items():
+        if column not in eencijfer_df:
+            continue
+        if isinstance(dtype, pd.CategoricalDtype):
+            # the empty table has no categories, these come from the values, sorted like the dictionary in the file.
+            eencijfer_df[column] = eencijfer_df[column].astype(object).astype("category")
+        elif eencijfer_df[column].dtype != dtype:
+            eencijfer_df[column] = eencijfer_df[column].astype(dtype)
+
+    return eencijfer_df
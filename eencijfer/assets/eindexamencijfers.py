@@ -1,22 +1,161 @@
 """Code for eindexamencijfers."""
 
 import logging
+from itertools import compress, repeat
 from pathlib import Path
+from typing import Iterable, Optional
 
 import numpy as np
 import pandas as pd
 
-from eencijfer.assets.transformations.vooropleiding import _add_oorspronkelijke_vooropleiding, _add_vooropleiding_kort
+from eencijfer.assets.transformations.vooropleiding import _add_vooropleiding_kort
+from eencijfer.io.files import _get_from_year_filter, _iter_parquet_row_groups
+from eencijfer.io.reference import _get_reference_index, _get_reference_table, _join_unique
 from eencijfer.utils.detect_eencijfer_files import _get_eindexamen_datafile
 
 logger = logging.getLogger(__name__)
 
 
-def _create_eindexamencijfer_df(source_dir: Path) -> pd.DataFrame:
+ID_FIELDS = ["PersoonsgebondenNummer", "Vooropleiding", "Diplomajaar", "VakCode", "VakAfkorting"]
+EXAMEN_KEYS = ["PersoonsgebondenNummer", "Vooropleiding", "SoortExamen", "VakAfkorting", "VakCode"]
+
+# pogingen van het centraal examen, van de eerste tot de laatste.
+POGINGEN_CENTRAAL_EXAMEN = {
+    1: "CijferEersteCentraalExamen",
+    2: "CijferTweedeCentraalExamen",
+    3: "CijferDerdeCentraalExamen",
+}
+
+
+def _get_laatste_pogingen(eindexamens: pd.DataFrame) -> pd.DataFrame:
+    """Last attempt of the centraal examen and the schoolexamen, per row of eindexamens.
+
+    The cijfer of the last attempt is selected from the wide columns, rows
+    without cijfer are left out.
+
+    Args:
+        eindexamens (pd.DataFrame): eindexamens with Vooropleiding.
+
+    Returns:
+        pd.DataFrame: a row per cijfer with Cijfer, Poging and SoortExamen, with the index of its row in eindexamens.
+    """
+    cijfer = eindexamens[POGINGEN_CENTRAAL_EXAMEN[1]]
+    poging = np.where(cijfer.notna(), 1.0, np.nan)
+    for nummer in [2, 3]:
+        heeft_cijfer = eindexamens[POGINGEN_CENTRAAL_EXAMEN[nummer]].notna()
+        cijfer = cijfer.where(~heeft_cijfer, eindexamens[POGINGEN_CENTRAAL_EXAMEN[nummer]])
+        poging = np.where(heeft_cijfer, float(nummer), poging)
+
+    centraal_examen = eindexamens[ID_FIELDS].assign(Cijfer=cijfer, Poging=poging, SoortExamen="CSE")
+    schoolexamen = eindexamens[ID_FIELDS].assign(
+        Cijfer=eindexamens.CijferSchoolexamen, Poging=1.0, SoortExamen="School"
+    )
+    return pd.concat([centraal_examen[centraal_examen.Cijfer.notna()], schoolexamen[schoolexamen.Cijfer.notna()]])
+
+
+def _keep_laatste_poging(cijfers: pd.DataFrame) -> pd.DataFrame:
+    """Keep the cijfer of the last attempt per student, vooropleiding, soort examen and vak.
+
+    Of cijfers with the same attempt, the one that comes first in cijfers is kept.
+
+    Args:
+        cijfers (pd.DataFrame): cijfers with Poging.
+
+    Returns:
+        pd.DataFrame: a cijfer per student, vooropleiding, soort examen and vak.
+    """
+    return cijfers.sort_values("Poging", ascending=False, kind="stable").drop_duplicates(subset=EXAMEN_KEYS)
+
+
+def _get_keys(cijfers: pd.DataFrame) -> list:
+    """Key of every cijfer as a tuple, with None for missing values.
+
+    Args:
+        cijfers (pd.DataFrame): cijfers with the EXAMEN_KEYS.
+
+    Returns:
+        list: a tuple per cijfer.
+    """
+    columns = []
+    for key in EXAMEN_KEYS:
+        values = cijfers[key]
+        if values.hasnans:
+            values = values.astype(object).where(values.notna(), None)
+        columns.append(values.tolist())
+    return list(zip(*columns))
+
+
+def _keep_laatste_poging_over_row_groups(row_groups: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """Keep the cijfer of the last attempt per key over all row-groups.
+
+    Every row-group has one cijfer per key already. The attempt of the kept
+    cijfer per key is carried from one row-group to the next, so only keys that
+    occur in more than one row-group are resolved: a later attempt replaces the
+    cijfer, of equal attempts the one of the earlier row-group is kept. Of every
+    row-group only the cijfers that are kept when it is read are held.
+
+    Args:
+        row_groups (Iterable[pd.DataFrame]): cijfers per row-group, with Poging and a row per key.
+
+    Raises:
+        Exception: there are no row-groups.
+
+    Returns:
+        pd.DataFrame: a cijfer per student, vooropleiding, soort examen and vak, in the order of the row-groups.
+    """
+    frames = []
+    # position of every key in the arrays with the attempt of its kept cijfer, its row-group and its row in the
+    # kept cijfers of that row-group. The arrays grow with the number of keys, not with the number of row-groups.
+    laatste: dict = {}
+    poging_of = np.empty(0, dtype=float)
+    frame_of = np.empty(0, dtype=np.int64)
+    row_of = np.empty(0, dtype=np.int64)
+
+    for frame, cijfers in enumerate(row_groups):
+        keys = _get_keys(cijfers)
+        positions = np.fromiter(map(laatste.get, keys, repeat(-1)), dtype=np.int64, count=len(keys))
+        poging = cijfers.Poging.to_numpy(dtype=float)
+
+        new = positions == -1
+        positions[new] = np.arange(len(laatste), len(laatste) + new.sum())
+        laatste.update(zip(compress(keys, new), positions[new].tolist()))
+        if len(laatste) > len(poging_of):
+            extra = max(len(poging_of), len(laatste) - len(poging_of))
+            poging_of = np.concatenate([poging_of, np.empty(extra, dtype=float)])
+            frame_of = np.concatenate([frame_of, np.empty(extra, dtype=np.int64)])
+            row_of = np.concatenate([row_of, np.empty(extra, dtype=np.int64)])
+
+        # keys of earlier row-groups are only replaced by a later attempt.
+        kept = new.copy()
+        kept[~new] = poging[~new] > poging_of[positions[~new]]
+        poging_of[positions[kept]] = poging[kept]
+        frame_of[positions[kept]] = frame
+        row_of[positions[kept]] = np.arange(kept.sum())
+        frames.append(cijfers[kept])
+
+    if not frames:
+        raise Exception('No eindexamens found!')
+
+    # cijfers that were replaced by a later row-group are left out.
+    frame_of, row_of = frame_of[: len(laatste)], row_of[: len(laatste)]
+    current = [np.zeros(len(cijfers), dtype=bool) for cijfers in frames]
+    for frame, mask in enumerate(current):
+        mask[row_of[frame_of == frame]] = True
+    return pd.concat([cijfers[mask] for cijfers, mask in zip(frames, current)], ignore_index=True)
+
+
+def _create_eindexamencijfer_df(source_dir: Path, from_year: Optional[int] = None) -> pd.DataFrame:
     """Create table with eindexamencijfers.
 
+    The eindexamens are read per row-group, so only one row-group of the
+    wide eindexamens is in memory at a time. Only the columns that are needed
+    are read and row-groups before from_year are skipped. The cijfers are in
+    the order of the rows of the eindexamens they come from, there is no sort
+    over all cijfers.
+
     Args:
         source_dir (Path): Path to directory with converted eencijfer-files.
+        from_year (Optional[int], optional): Only eindexamens from this Diplomajaar on. Defaults to None, all years.
 
     Raises:
         Exception: _description_
@@ -28,77 +167,40 @@ def _create_eindexamencijfer_df(source_dir: Path) -> pd.DataFrame:
     eindexamencijfers_fname = _get_eindexamen_datafile(source_dir)
     if eindexamencijfers_fname is None:
         raise Exception('No eindexamenfile found!')
-    eindexamencijfers = pd.read_parquet(Path(source_dir / eindexamencijfers_fname).with_suffix('.parquet'))
-    eindexamencijfers = _add_oorspronkelijke_vooropleiding(eindexamencijfers)
-    eindexamencijfers = _add_vooropleiding_kort(
-        eindexamencijfers,
+    eindexamencijfers_fpath = Path(source_dir / eindexamencijfers_fname).with_suffix('.parquet')
+
+    vooropleidingen = _add_vooropleiding_kort(
+        _get_reference_table('Dec_vooropl', key='VooropleidingOorspronkelijkeCode'),
         source_column="OmschrijvingVooropleidingOorspronkelijkeCode",
         new_column="Vooropleiding",
-    )
+    )[["VooropleidingOorspronkelijkeCode", "Vooropleiding"]]
 
-    fields = [
-        "PersoonsgebondenNummer",
-        "Diplomajaar",
-        "VakCode",
-        "VakAfkorting",
-        "Vooropleiding",
-        "CijferEersteCentraalExamen",
-        "CijferTweedeCentraalExamen",
-        "CijferDerdeCentraalExamen",
+    fields = [field for field in ID_FIELDS if field != "Vooropleiding"] + [
+        "VooropleidingOorspronkelijkeCode",
         "CijferSchoolexamen",
+        *POGINGEN_CENTRAAL_EXAMEN.values(),
     ]
     logger.debug("Filter op kolommen:")
     logger.debug("")
     logger.debug(f"{fields}")
 
-    logger.debug("...melt...")
-    result = pd.melt(
-        eindexamencijfers[fields],
-        id_vars=[
-            "PersoonsgebondenNummer",
-            "Vooropleiding",
-            "Diplomajaar",
-            "VakCode",
-            "VakAfkorting",
-        ],
-    )
-    logger.debug("...lege waarden weghalen...")
-    result = result.dropna(subset=["value"])
-
-    result["Poging"] = np.where(result.variable.str.contains("Eerste"), 1, np.nan)
-    result["Poging"] = np.where(result.variable.str.contains("Tweede"), 2, result["Poging"])
-    result["Poging"] = np.where(result.variable.str.contains("Derde"), 3, result["Poging"])
-    result["Poging"] = result["Poging"].fillna(1)
-
-    result["SoortExamen"] = np.where(result.variable.str.contains("Centraal"), "CSE", "School")
-
-    # sorteer de pogingen van hoog naar laag, dan ontdubbelen en de eerste waarde (de laatste poging dus)
-    # vasthouden.
-    laatste_cijfer = result.sort_values(
-        by=[
-            "PersoonsgebondenNummer",
-            "Vooropleiding",
-            "SoortExamen",
-            "VakAfkorting",
-            "VakCode",
-            "Poging",
-        ],
-        ascending=False,
-    ).drop_duplicates(
-        subset=[
-            "PersoonsgebondenNummer",
-            "Vooropleiding",
-            "SoortExamen",
-            "VakAfkorting",
-            "VakCode",
-        ],
-        keep="first",
-        ignore_index=True,
-    )
-
-    laatste_cijfer.rename(columns={"value": "Cijfer"}, inplace=True)
-
-    if "variable" in laatste_cijfer:
-        del laatste_cijfer["variable"]
-
-    return laatste_cijfer
+    def laatste_pogingen():
+        row_groups = _iter_parquet_row_groups(
+            eindexamencijfers_fpath, columns=fields, filter=_get_from_year_filter("Diplomajaar", from_year)
+        )
+        for row_group, data in enumerate(row_groups):
+            logger.debug(f"...laatste pogingen van row-group {row_group}...")
+            eindexamens = _join_unique(
+                data,
+                vooropleidingen,
+                left_on="VooropleidingOorspronkelijkeCode",
+                right_on="VooropleidingOorspronkelijkeCode",
+                index=_get_reference_index('Dec_vooropl', 'VooropleidingOorspronkelijkeCode'),
+            )
+            # in de volgorde van de eindexamens, per rij het centraal examen voor het schoolexamen.
+            yield _keep_laatste_poging(_get_laatste_pogingen(eindexamens)).sort_index(kind="stable")
+
+    try:
+        return _keep_laatste_poging_over_row_groups(laatste_pogingen())
+    except Exception as e:
+        raise Exception(f'No eindexamens found from {from_year} on!') from e
@@ -0,0 +1,184 @@
+"""Graph of data assets and a scheduler that creates them in parallel.
+
+Every asset declares the converted eencijfer-files it reads and the assets it
+is made from. Only the requested assets and the assets they depend on are
+created. Assets that do not depend on each other, like the eindexamencijfers
+and the cohorten, are created at the same time on a thread-pool.
+"""
+
+import logging
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, NamedTuple, Optional
+
+import pandas as pd
+
+from eencijfer.assets.cohorten import create_cohorten_met_indicatoren
+from eencijfer.assets.context import AssetContext
+from eencijfer.assets.eindexamencijfers import _create_eindexamencijfer_df
+from eencijfer.utils.detect_eencijfer_files import _get_eencijfer_datafile, _get_eindexamen_datafile
+
+logger = logging.getLogger(__name__)
+
+EENCIJFER = "EV"
+EINDEXAMENS = "VAKHAVW"
+
+
+class Asset(NamedTuple):
+    """Data asset.
+
+    build creates the asset from the context, assets it depends on are in
+    context.assets by then. sources are the converted eencijfer-files it reads:
+    EV, VAKHAVW or the name of a Dec-file.
+    """
+
+    name: str
+    build: Callable[[AssetContext], pd.DataFrame]
+    sources: tuple = ()
+    assets: tuple = ()
+
+
+ASSETS = {
+    asset.name: asset
+    for asset in [
+        Asset(
+            "eencijfer",
+            build=lambda context: context.eencijfer,
+            sources=(EENCIJFER, "Dec_vopl", "Dec_brinvestigingsnummer", "Dec_isat", "Dec_ho_ISCED"),
+        ),
+        Asset(
+            "cohorten",
+            build=lambda context: create_cohorten_met_indicatoren(context.assets["eencijfer"]),
+            assets=("eencijfer",),
+        ),
+        Asset(
+            "eindexamencijfers",
+            build=lambda context: _create_eindexamencijfer_df(context.source_dir, from_year=context.from_year),
+            sources=(EINDEXAMENS, "Dec_vooropl"),
+        ),
+    ]
+}
+
+
+def _get_assets_to_build(names: list, assets: dict = ASSETS) -> list:
+    """Requested assets and the assets they depend on, every asset after its dependencies.
+
+    Args:
+        names (list): names of requested assets.
+        assets (dict, optional): Asset per name. Defaults to ASSETS.
+
+    Raises:
+        Exception: Unknown asset or assets that depend on each other.
+
+    Returns:
+        list: Assets in an order in which they can be built.
+    """
+    ordered: list = []
+    visiting: set = set()
+
+    def visit(name: str) -> None:
+        if name not in assets:
+            raise Exception(f"Unknown asset {name}, choose from {', '.join(assets)}.")
+        if name in visiting:
+            raise Exception(f"Asset {name} depends on itself.")
+        if assets[name] in ordered:
+            return
+        visiting.add(name)
+        for dependency in assets[name].assets:
+            visit(dependency)
+        visiting.remove(name)
+        ordered.append(assets[name])
+
+    for name in names:
+        visit(name)
+    return ordered
+
+
+def _get_missing_sources(assets: list, source_dir: Path) -> list:
+    """Sources of assets that are not in source_dir.
+
+    Args:
+        assets (list): assets to build.
+        source_dir (Path): Path to directory with converted eencijfer-files.
+
+    Returns:
+        list: names of missing sources.
+    """
+    missing = []
+    for source in sorted({source for asset in assets for source in asset.sources}):
+        if source == EENCIJFER:
+            found = _get_eencijfer_datafile(source_dir) is not None
+        elif source == EINDEXAMENS:
+            found = _get_eindexamen_datafile(source_dir) is not None
+        else:
+            found = (Path(source_dir) / f"{source}.parquet").is_file()
+        if not found:
+            missing.append(source)
+    return missing
+
+
+def _build_assets(
+    names: list,
+    context: AssetContext,
+    save: Callable[[str, pd.DataFrame], None],
+    jobs: Optional[int] = None,
+    assets: dict = ASSETS,
+) -> None:
+    """Build requested assets and their dependencies, independent assets are built in parallel.
+
+    Args:
+        names (list): names of requested assets, only these are saved.
+        context (AssetContext): context of this run, built assets are added to context.assets.
+        save (Callable[[str, pd.DataFrame], None]): saves an asset by name.
+        jobs (Optional[int], optional): Number of assets built at the same time. Defaults to the number of CPUs.
+        assets (dict, optional): Asset per name. Defaults to ASSETS.
+
+    Raises:
+        Exception: Sources of the assets are missing.
+
+    Returns:
+        None: None
+    """
+    to_build = _get_assets_to_build(names, assets=assets)
+    missing = _get_missing_sources(to_build, context.source_dir)
+    if missing:
+        raise Exception(f"Missing converted files in {context.source_dir}: {', '.join(missing)}.")
+
+    def run(asset: Asset) -> pd.DataFrame:
+        logger.info(f"Creating asset {asset.name}...")
+        data = asset.build(context)
+        if asset.name in names:
+            save(asset.name, data)
+        return data
+
+    jobs = jobs or os.cpu_count() or 1
+    pending = list(to_build)
+    running: dict = {}
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        while pending or running:
+            for asset in [asset for asset in pending if all(name in context.assets for name in asset.assets)]:
+                pending.remove(asset)
+                running[executor.submit(run, asset)] = asset
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                asset = running.pop(future)
+                context.assets[asset.name] = _get_result(future, running)
+    return None
+
+
+def _get_result(future: Future, running: dict) -> pd.DataFrame:
+    """Result of a finished asset, when it failed the assets that did not start yet are cancelled.
+
+    Args:
+        future (Future): finished asset.
+        running (dict): asset per future that is not finished.
+
+    Returns:
+        pd.DataFrame: asset.
+    """
+    if future.exception() is not None:
+        for other in running:
+            other.cancel()
+    return future.result()
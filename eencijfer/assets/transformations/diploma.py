@@ -7,6 +7,14 @@ import pandas as pd
 
 logger = logging.getLogger(__name__)
 
+SOORT_DIPLOMA = {
+    "D": "propedeuse",
+    "A": "associate degree",
+    "B": "bachelor",
+    "M": "master",
+    "Q": "post-initiele master",
+}
+
 
 def _add_ho_diploma_eerstejaar(eencijfer: pd.DataFrame) -> pd.DataFrame:
     """Add column indicating ho-diploma in first year.
@@ -44,16 +52,9 @@ def _add_soort_diploma(eencijfer: pd.DataFrame) -> pd.DataFrame:
         raise Exception("OpleidingsfaseActueelVanHetDiploma mist in eencijfer")
 
     logger.info("Toevoegen SoortDiploma...")
-    soort_diploma = {
-        "D": "propedeuse",
-        "A": "associate degree",
-        "B": "bachelor",
-        "M": "master",
-        "Q": "post-initiele master",
-    }
 
     logger.debug("...voeg SoortDiploma toe op basis van OpleidingsfaseActueelVanHetDiploma")
 
-    eencijfer["SoortDiploma"] = eencijfer.OpleidingsfaseActueelVanHetDiploma.replace(soort_diploma)
+    eencijfer["SoortDiploma"] = eencijfer.OpleidingsfaseActueelVanHetDiploma.replace(SOORT_DIPLOMA)
 
     return eencijfer
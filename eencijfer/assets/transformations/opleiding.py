@@ -6,12 +6,41 @@ from pathlib import Path
 import numpy as np
 import pandas as pd
 
-from eencijfer.settings import config
+from eencijfer.io.reference import _get_reference_index, _get_reference_table, _join_unique
 
 HERE = Path(__file__).parent.absolute()
 DATASETS_DIR = HERE / "datasets"
 logger = logging.getLogger(__name__)
 
+CROHO_SECTOREN = {
+    1: "onderwijs",
+    2: "landbouw en natuurlijke omgeving",
+    3: "natuur",
+    4: "techniek",
+    5: "gezondheidszorg",
+    6: "economie",
+    7: "recht",
+    8: "gedrag en maatschappij",
+    9: "taal en cultuur",
+    0: "sectoroverstijgend",
+}
+
+TYPE_OPLEIDING = {
+    "O": "oude stijl (toegestaan t/m studiejaar 1992-1993)",
+    "P": "propedeuse",
+    "1": "1e fase (WO); hoofdfase (HBO) (toegestaan t/m studiejaar 92-93)",
+    "2": "2e fase (toegestaan t/m studiejaar 1996-1997)",
+    "I": "initiële opleiding (toegestaan vanaf studiejaar 1993-1994)",
+    "V": "vervolgopleiding (toegestaan vanaf studiejaar 1993-1994)",
+    "K": "kandidaatsfase",
+    "D": "propedeuse bachelor",
+    "B": "bachelor",
+    "M": "master",
+    "A": "associate degree",
+    "T": "tussentijds doctoraal",
+    "Q": "post-initiële master",
+}
+
 
 def _add_naam_opleiding(eencijfer: pd.DataFrame) -> pd.DataFrame:
     """Add column with Croho-name.
@@ -23,20 +52,16 @@ def _add_naam_opleiding(eencijfer: pd.DataFrame) -> pd.DataFrame:
         pd.DataFrame: _description_
     """
     logger.debug("Controleer of Dec_isat maar 1 naam per Croho bevat.")
-    source_dir = config.getpath('default', 'source_dir')
-    Dec_isat = pd.read_parquet(source_dir / 'Dec_isat.parquet')
-
-    if not len(Dec_isat) == Dec_isat.Opleidingscode.nunique():
-        raise Exception('Something went, Isat is not unique.')
+    Dec_isat = _get_reference_table('Dec_isat', key='Opleidingscode')
 
     logger.debug("Merge eencijfer met Dec_isat")
-    result = pd.merge(
+    result = _join_unique(
         eencijfer,
         Dec_isat,
         left_on="OpleidingActueelEquivalent",
         right_on="Opleidingscode",
-        how="left",
-        suffixes=["", "_opleiding"],
+        suffix="_opleiding",
+        index=_get_reference_index('Dec_isat', 'Opleidingscode'),
     )
 
     logger.debug("Controleer het resultaat...")
@@ -79,25 +104,18 @@ def _add_isced(eencijfer: pd.DataFrame) -> pd.DataFrame:
         pd.DataFrame: _description_
     """
     logger.debug("Check whether Dec_ho_ISCED has Opleidingscode as index.")
-    source_dir = config.getpath('default', 'source_dir')
-    Dec_ho_ISCED = pd.read_parquet(source_dir / 'Dec_ho_ISCED.parquet')
-
-    if not len(Dec_ho_ISCED) == Dec_ho_ISCED.Opleidingscode.nunique():
-        raise Exception('Something went, Opleidingscode is not unique.')
+    Dec_ho_ISCED = _get_reference_table('Dec_ho_ISCED', key='Opleidingscode')
 
     logger.debug("Merge eencijfer with Dec_ho_ISCED")
-    result = pd.merge(
+    result = _join_unique(
         eencijfer,
         Dec_ho_ISCED,
         left_on="Opleidingscode",
         right_on="Opleidingscode",
-        how="left",
-        suffixes=["", "_opleiding"],
+        suffix="_opleiding",
+        index=_get_reference_index('Dec_ho_ISCED', 'Opleidingscode'),
     )
 
-    if not len(result) == len(eencijfer):
-        raise Exception("Something went wrong when merging.")
-
     if not result.ISCEDF2013Rubriek.isnull().sum() == 0:
         raise Exception("Not all rows have ISCEDF2013Rubriek")
 
@@ -165,23 +183,8 @@ def _add_type_opleiding(eencijfer: pd.DataFrame) -> pd.DataFrame:
     """
     result = eencijfer.copy()
 
-    typeOpleiding = {
-        "O": "oude stijl (toegestaan t/m studiejaar 1992-1993)",
-        "P": "propedeuse",
-        "1": "1e fase (WO); hoofdfase (HBO) (toegestaan t/m studiejaar 92-93)",
-        "2": "2e fase (toegestaan t/m studiejaar 1996-1997)",
-        "I": "initiële opleiding (toegestaan vanaf studiejaar 1993-1994)",
-        "V": "vervolgopleiding (toegestaan vanaf studiejaar 1993-1994)",
-        "K": "kandidaatsfase",
-        "D": "propedeuse bachelor",
-        "B": "bachelor",
-        "M": "master",
-        "A": "associate degree",
-        "T": "tussentijds doctoraal",
-        "Q": "post-initiële master",
-    }
     logger.debug("...voeg TypeOpleiding toe op basis van Opleidingsfase")
-    result["TypeOpleiding"] = result.Opleidingsfase.replace(typeOpleiding)
+    result["TypeOpleiding"] = result.Opleidingsfase.replace(TYPE_OPLEIDING)
     result["TypeOpleiding"] = result["TypeOpleiding"].fillna("onbekend")
 
     nieuwe_cols = set(result.columns) - set(eencijfer.columns)
@@ -222,19 +225,7 @@ def _add_croho_onderdeel(eencijfer: pd.DataFrame) -> pd.DataFrame:
 
     result = eencijfer.copy()
 
-    croho_sectoren = {
-        1: "onderwijs",
-        2: "landbouw en natuurlijke omgeving",
-        3: "natuur",
-        4: "techniek",
-        5: "gezondheidszorg",
-        6: "economie",
-        7: "recht",
-        8: "gedrag en maatschappij",
-        9: "taal en cultuur",
-        0: "sectoroverstijgend",
-    }
     logger.debug("...voeg CrohoOnderdeel toe op basis van CrohoOnderdeelActueleOpleiding")
-    result["CrohoOnderdeel"] = result.CrohoOnderdeelActueleOpleiding.replace(croho_sectoren).fillna("onbekend")
+    result["CrohoOnderdeel"] = result.CrohoOnderdeelActueleOpleiding.replace(CROHO_SECTOREN).fillna("onbekend")
 
     return result
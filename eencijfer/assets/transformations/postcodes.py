@@ -5,7 +5,7 @@ from pathlib import Path
 
 import pandas as pd
 
-from eencijfer.settings import config
+from eencijfer.io.reference import _get_reference_table
 
 HERE = Path(__file__).parent.absolute()
 DATASETS_DIR = HERE / "datasets"
@@ -22,11 +22,7 @@ def _add_isced(eencijfer: pd.DataFrame) -> pd.DataFrame:
         pd.DataFrame: _description_
     """
     logger.debug("Check whether Dec_ho_ISCED has Opleidingscode as index.")
-    source_dir = config.getpath('default', 'source_dir')
-    Dec_ho_ISCED = pd.read_parquet(source_dir / 'Dec_ho_ISCED.parquet')
-
-    if not len(Dec_ho_ISCED) == Dec_ho_ISCED.Opleidingscode.nunique():
-        raise Exception('Something went, Opleidingscode is not unique.')
+    Dec_ho_ISCED = _get_reference_table('Dec_ho_ISCED', key='Opleidingscode')
 
     logger.debug("Merge eencijfer with Dec_ho_ISCED")
     result = pd.merge(
@@ -4,11 +4,39 @@ import logging
 import re
 
 import pandas as pd
+from pandas.api.extensions import take
 
-from eencijfer.settings import config
+from eencijfer.io.reference import _get_reference_index, _get_reference_table, _join_unique
 
 logger = logging.getLogger(__name__)
 
+PROFIELEN = {
+    "00200": "ONB",
+    "00201": "ALG",
+    "00202": "CM",
+    "00203": "EM",
+    "00204": "EM & CM",
+    "00205": "NG",
+    "00206": "NG & CM",
+    "00207": "NG & EM",
+    "00208": "NT",
+    "00209": "NT & CM",
+    "00210": "NT & EM",
+    "00211": "NT & NG",
+    "00400": "ONG",
+    "00401": "ALG",
+    "00402": "CM",
+    "00403": "EM",
+    "00404": "EM & CM",
+    "00405": "NG",
+    "00406": "NG & CM",
+    "00407": "NG & EM",
+    "00408": "NT",
+    "00409": "NT & CM",
+    "00410": "NT & EM",
+    "00411": "NT & NG",
+}
+
 # In het eencijfer zitten 3 velden die betrekking hebben op de vooropleiding:
 # het gaat om:
 # 1. HoogsteVooropleiding: hoogste vooropleiding
@@ -77,7 +105,11 @@ def _add_vooropleiding_kort(
         pd.DataFrame: _description_
     """
     logger.info("...voeg korte omschrijving vooropleiding toe (mbo, vwo, etc)")
-    Dec_vopl[new_column] = Dec_vopl[source_column].apply(_determine_vooropleiding)
+    # there are few different descriptions, also in the eindexamencijfers, so every
+    # description is classified once and the result is spread over the rows by its code.
+    codes, omschrijvingen = pd.factorize(Dec_vopl[source_column])
+    vooropleidingen = pd.Series([_determine_vooropleiding(omschrijving) for omschrijving in omschrijvingen])
+    Dec_vopl[new_column] = take(vooropleidingen.array, codes, allow_fill=True)
     return Dec_vopl
 
 
@@ -90,34 +122,8 @@ def _add_profiel_havo_vwo(Dec_vopl: pd.DataFrame) -> pd.DataFrame:
     Returns:
         pd.DataFrame: _description_
     """
-    profielen = {
-        "00200": "ONB",
-        "00201": "ALG",
-        "00202": "CM",
-        "00203": "EM",
-        "00204": "EM & CM",
-        "00205": "NG",
-        "00206": "NG & CM",
-        "00207": "NG & EM",
-        "00208": "NT",
-        "00209": "NT & CM",
-        "00210": "NT & EM",
-        "00211": "NT & NG",
-        "00400": "ONG",
-        "00401": "ALG",
-        "00402": "CM",
-        "00403": "EM",
-        "00404": "EM & CM",
-        "00405": "NG",
-        "00406": "NG & CM",
-        "00407": "NG & EM",
-        "00408": "NT",
-        "00409": "NT & CM",
-        "00410": "NT & EM",
-        "00411": "NT & NG",
-    }
     profielen_df = (
-        pd.DataFrame.from_dict(profielen, orient="index")
+        pd.DataFrame.from_dict(PROFIELEN, orient="index")
         .reset_index()
         .rename(columns={"index": "VooropleidingCode", 0: "ProfielVooropleiding"})
     )
@@ -150,21 +156,17 @@ def _add_vooropleiding(
         pd.DataFrame: eencijfer verrijkt met vooropleiding (profiel en verkorte notatie)
     """
 
-    source_dir = config.getpath('default', 'source_dir')
-    Dec_vopl = pd.read_parquet(source_dir / 'Dec_vopl.parquet')
+    Dec_vopl = _get_reference_table('Dec_vopl', key='VooropleidingCode')
     vooropleiding = _add_profiel_havo_vwo(Dec_vopl)
     vooropleiding = _add_vooropleiding_kort(vooropleiding)
 
-    result = pd.merge(
+    result = _join_unique(
         eencijfer,
         vooropleiding,
         left_on=vooropleiding_field,
         right_on="VooropleidingCode",
-        how="left",
-        suffixes=["", "_Vooropleiding"],
+        suffix="_Vooropleiding",
     )
-    if not len(result) == len(eencijfer):
-        raise Exception("Something went wrong merging.")
 
     # toekomst: 'VooropleidingKort' bestaat niet, want die heet 'Vooropleiding' (hierin staat de korte omschrijving),
     # maar als je 'Vooropleiding' omzet naar vooropleiding_field, wat 'HoogsteVooropleiding' is
@@ -194,19 +196,37 @@ def _add_oorspronkelijke_vooropleiding(data: pd.DataFrame) -> pd.DataFrame:
     Returns:
         pd.DataFrame: dataframe met extra informatie over voorpleiding
     """
-    source_dir = config.getpath('default', 'source_dir')
-    Dec_vooropl = pd.read_parquet(source_dir / 'Dec_vooropl.parquet')
+    Dec_vooropl = _get_reference_table('Dec_vooropl', key='VooropleidingOorspronkelijkeCode')
 
-    result = pd.merge(
+    return _join_unique(
         data,
         Dec_vooropl,
-        left_on=["VooropleidingOorspronkelijkeCode"],
-        right_on=["VooropleidingOorspronkelijkeCode"],
-        how="left",
+        left_on="VooropleidingOorspronkelijkeCode",
+        right_on="VooropleidingOorspronkelijkeCode",
+        index=_get_reference_index('Dec_vooropl', 'VooropleidingOorspronkelijkeCode'),
     )
-    if len(data) != len(result):
-        raise Exception('Lengths of dataframes do not match, something went wrong merging.')
-    return result
+
+
+def _get_rename_fields_instelling_vooropleiding(vooropleiding: str) -> dict:
+    """Names of the columns of Dec_brinvestigingsnummer for given vooropleiding.
+
+    Args:
+        vooropleiding (str): HoogsteVooropleiding, HoogsteVooroplVoorHetHo or HoogsteVooroplBinnenHetHo.
+
+    Returns:
+        dict: new name per column of Dec_brinvestigingsnummer.
+    """
+    return {
+        "Brinnummer": "InstellingVanDe" + vooropleiding,
+        "Vestigingsnummer": "VestigingsnummerVanDe" + vooropleiding,
+        "NaamInstellingVooropleiding": "NaamInstelling" + vooropleiding,
+        "PostcodeInstellingVooropleiding": "PostcodeInstelling" + vooropleiding,
+        "PlaatsInstellingVooropleiding": "PlaatsInstelling" + vooropleiding,
+        "DatumOprichtingInstellingVooropleiding": "DatumOprichtingInstelling" + vooropleiding,
+        "DatumOpheffingInstellingVooropleiding": "DatumOpheffingInstelling" + vooropleiding,
+        "DenominatieInstellingVooropleidingCode": "CodeDenominatieInstelling" + vooropleiding,
+        "NaamDenominatieInstellingVooropleiding": "DenominatieInstelling" + vooropleiding,
+    }
 
 
 def _add_naam_instelling_vooropleiding(
@@ -222,8 +242,7 @@ def _add_naam_instelling_vooropleiding(
     Returns:
         pd.DataFrame: _description_
     """
-    source_dir = config.getpath('default', 'source_dir')
-    Dec_brinvestigingsnummer = pd.read_parquet(source_dir / 'Dec_brinvestigingsnummer.parquet')
+    Dec_brinvestigingsnummer = _get_reference_table('Dec_brinvestigingsnummer', key=['Brinnummer', 'Vestigingsnummer'])
 
     if vooropleiding not in [
         "HoogsteVooropleiding",
@@ -234,29 +253,14 @@ def _add_naam_instelling_vooropleiding(
 
     brin = "InstellingVanDe" + vooropleiding
     vestiging = "VestigingsnummerVanDe" + vooropleiding
-
-    rename_fields = {
-        "Brinnummer": brin,
-        "Vestigingsnummer": vestiging,
-        "NaamInstellingVooropleiding": "NaamInstelling" + vooropleiding,
-        "PostcodeInstellingVooropleiding": "PostcodeInstelling" + vooropleiding,
-        "PlaatsInstellingVooropleiding": "PlaatsInstelling" + vooropleiding,
-        "DatumOprichtingInstellingVooropleiding": "DatumOprichtingInstelling" + vooropleiding,
-        "DatumOpheffingInstellingVooropleiding": "DatumOpheffingInstelling" + vooropleiding,
-        "DenominatieInstellingVooropleidingCode": "CodeDenominatieInstelling" + vooropleiding,
-        "NaamDenominatieInstellingVooropleiding": "DenominatieInstelling" + vooropleiding,
-    }
+    rename_fields = _get_rename_fields_instelling_vooropleiding(vooropleiding)
 
     instelling_vooropleiding = Dec_brinvestigingsnummer.rename(columns=rename_fields)
-    result = pd.merge(
+    return _join_unique(
         eencijfer,
         instelling_vooropleiding,
         left_on=[brin, vestiging],
         right_on=[brin, vestiging],
-        how="left",
-        suffixes=["", "_Vooropleiding"],
+        suffix="_Vooropleiding",
+        index=_get_reference_index('Dec_brinvestigingsnummer', ['Brinnummer', 'Vestigingsnummer']),
     )
-    if not len(result) == len(eencijfer):
-        raise Exception("Er ging iets mis met mergen...")
-
-    return result
@@ -3,19 +3,26 @@
 import logging
 import shutil
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 
 import typer
 from typing_extensions import Annotated
 
 from eencijfer import APP_NAME, CONFIG_FILE, __version__
-from eencijfer.assets.cohorten import create_cohorten_met_indicatoren
-from eencijfer.assets.eencijfer import _create_eencijfer_df
-from eencijfer.assets.eindexamencijfers import _create_eindexamencijfer_df
-from eencijfer.convert.eencijfer import _convert_to_parquet
+from eencijfer.assets.context import AssetContext
+from eencijfer.assets.duckdb_backend import _create_assets_duckdb
+from eencijfer.assets.eencijfer import AssetBackend
+from eencijfer.assets.graph import ASSETS, _build_assets, _get_assets_to_build
+from eencijfer.convert.eencijfer import (
+    ReadEngine,
+    _convert_to_parquet,
+    _create_dict_matching_eencijfer_and_definition_files,
+)
 from eencijfer.convert.pii import _replace_all_pgn_with_pseudo_id_remove_pii_local_id
 from eencijfer.io.db import _create_duckdb
 from eencijfer.io.files import ExportFormat, _convert_to_export_format, _save_to_file
+from eencijfer.io.history import _add_delivery_to_history, _get_delivery_year
+from eencijfer.io.manifest import _create_manifest_entries, _get_outdated_files, _load_manifest, _save_manifest
 from eencijfer.settings import config
 from eencijfer.utils.detect_eencijfer_files import _get_eencijfer_datafile
 from eencijfer.utils.init import _create_default_config
@@ -79,6 +86,52 @@ def convert(
     ] = True,
     remove_pii: Annotated[bool, typer.Option("--remove-pii/--do-not-remove-pii", "-p/-P")] = True,
     add_local_id: Annotated[bool, typer.Option("--add-local-id/--do-not-add-local-id", "-s/-S")] = False,
+    engine: Annotated[ReadEngine, typer.Option(help="Engine used for reading eencijfer-files.")] = ReadEngine.numpy,
+    memory_map: Annotated[
+        bool,
+        typer.Option(
+            "--memory-map/--no-memory-map",
+            help="Memory-map eencijfer-files (numpy- and arrow-engine, chunks are always memory-mapped).",
+        ),
+    ] = False,
+    chunk_size: Annotated[
+        Optional[int], typer.Option(help="Convert files in chunks of this many records to limit memory use.")
+    ] = None,
+    jobs: Annotated[int, typer.Option(help="Number of files converted in parallel.", min=1)] = 1,
+    shards: Annotated[
+        int, typer.Option(help="Number of parts a single file is split in and parsed in parallel.", min=1)
+    ] = 1,
+    use_cache: Annotated[
+        bool,
+        typer.Option(
+            "--use-cache/--no-cache",
+            help="Reuse earlier conversions of unchanged files, cached in cache_dir (contains PII).",
+        ),
+    ] = False,
+    incremental: Annotated[
+        bool,
+        typer.Option(
+            "--incremental/--full",
+            help="Only convert files that changed since the last conversion to result_dir.",
+        ),
+    ] = False,
+    koppeltabel: Annotated[
+        Optional[Path],
+        typer.Option(
+            help="Parquet-file with the pseudo-id per PersoonsgebondenNummer, reused and extended so pseudo-ids "
+            "stay the same in every delivery. Contains PII, keep it outside result_dir."
+        ),
+    ] = None,
+    history_dir: Annotated[
+        Optional[Path],
+        typer.Option(
+            help="Add the eencijfer to a dataset with all deliveries, partitioned by Leveringsjaar and "
+            "Inschrijvingsjaar. Every Inschrijvingsjaar is kept from the latest delivery."
+        ),
+    ] = None,
+    delivery_year: Annotated[
+        Optional[int], typer.Option(help="Year of delivery. Defaults to the last two digits of the EV-file.")
+    ] = None,
 ):
     """Convert eencijfer-files to desired exportformat, with or without PII."""
 
@@ -88,6 +141,9 @@ def convert(
     if result_dir is None:
         result_dir = config.getpath('default', 'result_dir')
 
+    if history_dir is not None and remove_pii and koppeltabel is None:
+        raise Exception("--history-dir needs --koppeltabel, otherwise pseudo-ids differ between deliveries.")
+
     working_dir = result_dir / '.temp_dir'
 
     db_name = config.getpath('default', 'db_name')
@@ -95,26 +151,80 @@ def convert(
     if not result_dir.is_dir():
         Path(result_dir).mkdir(parents=True, exist_ok=True)
 
-    if not working_dir.is_dir():
-        Path(working_dir).mkdir(parents=True, exist_ok=True)
+    if working_dir.is_dir():
+        logger.debug(f'Removing files of earlier run from {working_dir}')
+        shutil.rmtree(working_dir)
+    Path(working_dir).mkdir(parents=True, exist_ok=True)
+
+    eencijfer_definition_pairs = _create_dict_matching_eencijfer_and_definition_files(source_dir)
+    manifest_entries = _create_manifest_entries(
+        eencijfer_definition_pairs,
+        db_name=db_name,
+        use_column_converters=use_column_converters,
+        remove_pii=remove_pii,
+        add_local_id=add_local_id,
+        export_format=export_format,
+        engine=engine,
+    )
+
+    manifest = {}
+    files = list(eencijfer_definition_pairs)
+    if incremental:
+        manifest = _load_manifest(result_dir)
+        files = _get_outdated_files(
+            eencijfer_definition_pairs, manifest_entries, manifest, result_dir=result_dir, export_format=export_format
+        )
+        if len(files) == 0:
+            typer.echo(f"All files in {result_dir} are up to date.")
+            shutil.rmtree(working_dir)
+            return None
 
     _convert_to_parquet(
         source_dir=source_dir,
         result_dir=working_dir,
         export_format=ExportFormat.parquet,
         use_column_converters=use_column_converters,
+        engine=engine,
+        memory_map=memory_map,
+        chunk_size=chunk_size,
+        jobs=jobs,
+        shards=shards,
+        cache_dir=config.getpath('default', 'cache_dir') if use_cache else None,
+        files=files,
     )
+    converted_files = [file for file in files if Path(working_dir / file.name).with_suffix('.parquet').is_file()]
 
     eencijfer_fname = _get_eencijfer_datafile(working_dir)
     if eencijfer_fname:
         _replace_all_pgn_with_pseudo_id_remove_pii_local_id(
-            eencijfer_dir=working_dir, remove_pii=remove_pii, add_local_id=add_local_id
+            eencijfer_dir=working_dir, remove_pii=remove_pii, add_local_id=add_local_id, koppeltabel_fpath=koppeltabel
         )
+        if history_dir is not None:
+            _add_delivery_to_history(
+                Path(working_dir / eencijfer_fname).with_suffix('.parquet'),
+                history_dir=history_dir,
+                delivery_year=delivery_year or _get_delivery_year(eencijfer_fname),
+            )
 
     if export_format.value == 'duckdb':
-        _create_duckdb(source_dir=working_dir, result_dir=result_dir, db_name=db_name)
+        _create_duckdb(
+            source_dir=working_dir,
+            result_dir=result_dir,
+            db_name=db_name,
+            incremental=incremental,
+            history_dir=history_dir,
+        )
     else:
-        _convert_to_export_format(source_dir=working_dir, result_dir=result_dir, export_format=export_format)
+        _convert_to_export_format(
+            source_dir=working_dir,
+            result_dir=result_dir,
+            export_format=export_format,
+            use_arrow=engine.value == 'arrow',
+        )
+
+    for file in converted_files:
+        manifest[file.name] = manifest_entries[file.name]
+    _save_manifest(manifest, result_dir)
 
     logger.debug(f'Removing working dir {working_dir}')
     shutil.rmtree(working_dir)
@@ -129,22 +239,57 @@ def qa():
 
 
 @app.command()
-def create_assets(export_format: ExportFormat = ExportFormat.parquet):
+def create_assets(
+    assets: Annotated[
+        Optional[List[str]],
+        typer.Argument(help=f"Assets to create: {', '.join(ASSETS)}. Creates all assets when none are given."),
+    ] = None,
+    export_format: ExportFormat = ExportFormat.parquet,
+    backend: Annotated[
+        AssetBackend,
+        typer.Option(
+            help="Backend for creating the assets, polars needs polars installed. "
+            "duckdb creates all assets with SQL, out of core."
+        ),
+    ] = AssetBackend.pandas,
+    jobs: Annotated[
+        Optional[int], typer.Option(help="Number of assets created at the same time. Defaults to number of CPUs.")
+    ] = None,
+    from_year: Annotated[
+        Optional[int],
+        typer.Option(
+            help="Only read inschrijvingen from this Inschrijvingsjaar on and eindexamens from this Diplomajaar on. "
+            "Earlier enrolments of a student are then not used for the cohorten."
+        ),
+    ] = None,
+):
     """Create data-assets and save them to assets-directory."""
+    assets = assets or list(ASSETS)
+    # fails early on unknown assets, before anything is created.
+    _get_assets_to_build(assets)
     source_dir = config.getpath('default', 'source_dir')
 
     assets_dir = config.getpath('default', 'assets_dir')
     if not assets_dir.is_dir():
         Path(assets_dir).mkdir(parents=True, exist_ok=True)
 
-    eencijfer = _create_eencijfer_df(source_dir=source_dir)
-    _save_to_file(eencijfer, dir=assets_dir, fname='eencijfer', export_format=export_format)
-    cohorten = create_cohorten_met_indicatoren(source_dir=source_dir)
-    _save_to_file(cohorten, dir=assets_dir, fname='cohorten', export_format=export_format)
-    eindexamencijfers = _create_eindexamencijfer_df(source_dir=source_dir)
-    _save_to_file(
-        eindexamencijfers,
-        dir=assets_dir,
-        fname='eindexamencijfers',
-        export_format=export_format,
+    if backend.value == 'duckdb':
+        _create_assets_duckdb(
+            source_dir=source_dir,
+            reference_dir=source_dir,
+            assets_dir=assets_dir,
+            export_format=export_format,
+            db_name=config.get('default', 'db_name'),
+            assets=assets,
+            from_year=from_year,
+        )
+        return
+
+    # the enriched eencijfer is created once and shared by the assets.
+    context = AssetContext(source_dir=source_dir, backend=backend, from_year=from_year)
+    _build_assets(
+        assets,
+        context=context,
+        save=lambda name, data: _save_to_file(data, dir=assets_dir, fname=name, export_format=export_format),
+        jobs=jobs,
     )
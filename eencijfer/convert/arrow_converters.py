@@ -0,0 +1,147 @@
+"""Arrow versions of the converters for columns on read-time.
+
+Every function converts a pyarrow-array of stripped strings at once and gives the
+same values as the column-converter with the same name. Missing values become
+nulls. When that is not possible, a pa.ArrowInvalid is raised and the vectorized
+or per-value column-converter is used instead.
+"""
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from eencijfer import column_converter
+from eencijfer.convert.fixed_width import _mask_missing_values
+
+DATE_FORMAT = "%Y%m%d"
+DATE_LENGTH = 8
+
+
+def _to_integers(x: pa.Array) -> pa.Array:
+    """Parse integers, missing values become null.
+
+    Args:
+        x (pa.Array): column
+
+    Returns:
+        pa.Array: all values will be int64 or null
+    """
+    return pc.cast(_mask_missing_values(x), pa.int64())
+
+
+@column_converter(arrow=True)
+def convert_to_object(x: pa.Array) -> pa.Array:
+    """Convert column to string.
+
+    Args:
+        x (pa.Array): column
+
+    Returns:
+        pa.Array: all values will be string
+    """
+    return x
+
+
+@column_converter(arrow=True)
+def convert_to_int64(x: pa.Array) -> pa.Array:
+    """Convert column to int64.
+
+    Args:
+        x (pa.Array): column
+
+    Returns:
+        pa.Array: all values will be int64
+    """
+    return _to_integers(x)
+
+
+@column_converter(arrow=True)
+def convert_to_float64(x: pa.Array) -> pa.Array:
+    """Convert column to float64.
+
+    Args:
+        x (pa.Array): column
+
+    Returns:
+        pa.Array: all values will be float64
+    """
+    return pc.cast(_mask_missing_values(x), pa.float64())
+
+
+@column_converter(arrow=True)
+def convert_to_date(x: pa.Array) -> pa.Array:
+    """Convert column to date.
+
+    Args:
+        x (pa.Array): column
+
+    Raises:
+        pa.ArrowInvalid: Not all dates have 8 positions, strptime would accept these.
+
+    Returns:
+        pa.Array: all values will be dates.
+    """
+    present = _mask_missing_values(x)
+    if pc.any(pc.not_equal(pc.utf8_length(present), DATE_LENGTH)).as_py():
+        raise pa.ArrowInvalid(f"Not all dates match {DATE_FORMAT}.")
+    return pc.strptime(present, format=DATE_FORMAT, unit="us")
+
+
+@column_converter(arrow=True)
+def convert_to_none(x: pa.Array) -> pa.Array:
+    """Convert column to None.
+
+    Args:
+        x (pa.Array): column
+
+    Returns:
+        pa.Array: all values will be null
+    """
+    return pa.nulls(len(x))
+
+
+@column_converter(arrow=True)
+def convert_geslacht(x: pa.Array) -> pa.Array:
+    """Convert column to readable geslacht (man, vrouw).
+
+    Args:
+        x (pa.Array): column
+
+    Returns:
+        pa.Array: all values will be man, vrouw or onbekend
+    """
+    return pc.if_else(pc.equal(x, "M"), "man", pc.if_else(pc.equal(x, "V"), "vrouw", "onbekend"))
+
+
+@column_converter(arrow=True)
+def convert_opleidingsvorm(x: pa.Array) -> pa.Array:
+    """Converts integer codes to their corresponding educational form.
+
+    Unknown codes are returned as is.
+
+    Args:
+        x (pa.Array): column
+
+    Returns:
+        pa.Array: all values will be 'voltijd', 'deeltijd', 'duaal' or the original code.
+    """
+    codes = _mask_missing_values(x)
+    integers = pc.cast(codes, pa.int64())
+    return pc.if_else(
+        pc.equal(integers, 1),
+        "voltijd",
+        pc.if_else(pc.equal(integers, 2), "deeltijd", pc.if_else(pc.equal(integers, 3), "duaal", codes)),
+    )
+
+
+@column_converter(arrow=True)
+def convert_to_int_zero_to_nan(x: pa.Array) -> pa.Array:
+    """Converts all values to int, except 0. These will be null.
+
+    Args:
+        x (pa.Array): column
+
+    Returns:
+        pa.Array: all values will int or null.
+    """
+    integers = _to_integers(x)
+    return pc.if_else(pc.equal(integers, 0), pa.scalar(None, pa.int64()), integers)
@@ -0,0 +1,191 @@
+"""Compiled definition-files.
+
+A definition-file describes the fields of a fixed-width eencijfer-file. Reading
+the csv and looking up the column-converters is done once per definition-file;
+the result is cached until the definition-file changes.
+
+A definition-file can have an optional Dtype-column with a compact dtype for a
+field, for example `category` for codes with few distinct values, `Int16` for
+years or `date32` for dates. Fields without a Dtype keep the type of their
+column-converter.
+"""
+
+import logging
+from functools import lru_cache
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+
+from eencijfer import CONVERTERS
+
+logger = logging.getLogger(__name__)
+
+# Types in parquet-files for columns with a column-converter, all other columns are strings.
+CONVERTER_ARROW_TYPES = {
+    "convert_to_int64": pa.int64(),
+    "convert_to_float64": pa.float64(),
+    "convert_to_int_zero_to_nan": pa.float64(),
+    "convert_to_date": pa.timestamp("us"),
+    "convert_to_none": pa.null(),
+}
+
+# Types in parquet-files for the dtypes that can be set in the Dtype-column of a definition-file.
+DTYPE_ARROW_TYPES = {
+    "category": pa.dictionary(pa.int32(), pa.string()),
+    "Int8": pa.int8(),
+    "Int16": pa.int16(),
+    "Int32": pa.int32(),
+    "Int64": pa.int64(),
+    "Float32": pa.float32(),
+    "date32": pa.date32(),
+}
+
+# Dtypes that keep the values as strings, these are also used when column-converters are not used.
+STRING_DTYPES = ["category"]
+
+
+class Definition:
+    """Fields of an eencijfer-file as described in its definition-file.
+
+    names, starting_positions, offsets, widths and converter_names are tuples with
+    one value per field, in the order of the definition-file. converters maps every
+    name to its column-converter and dtypes maps every name to its type in
+    parquet-files. compact_dtypes maps the names of fields with a Dtype in the
+    definition-file to that dtype. A record should not contain data after record_length.
+    """
+
+    __slots__ = (
+        "path",
+        "names",
+        "starting_positions",
+        "offsets",
+        "widths",
+        "converter_names",
+        "converters",
+        "dtypes",
+        "compact_dtypes",
+        "record_length",
+    )
+
+    def __init__(self, definition_file: Path):
+        """Read definition-file and look up the column-converters.
+
+        Args:
+            definition_file (Path): Path to definition-file.
+        """
+        logger.debug(f"...reading definition file {definition_file}")
+        definition = pd.read_csv(definition_file)
+
+        converter_names = definition.Converter.tolist()
+        missing_converters = [
+            label for label, converter in zip(definition.Label, converter_names) if converter not in CONVERTERS
+        ]
+        if len(missing_converters) > 0:
+            logger.warning(f"❌ ====> missing converters voor: {missing_converters}")
+            logger.warning("❌ ====> setting converters to 'convert_to_string'")
+            converter_names = [
+                converter if converter in CONVERTERS else 'convert_to_object' for converter in converter_names
+            ]
+
+        compact_dtypes = {}
+        if "Dtype" in definition:
+            compact_dtypes = dict(definition.loc[definition.Dtype.notna(), ["Label", "Dtype"]].to_numpy())
+            unknown_dtypes = [label for label, dtype in compact_dtypes.items() if dtype not in DTYPE_ARROW_TYPES]
+            if len(unknown_dtypes) > 0:
+                logger.warning(f"❌ ====> unknown dtypes voor: {unknown_dtypes}")
+                logger.warning("❌ ====> using the dtypes of their converters")
+                compact_dtypes = {
+                    label: dtype for label, dtype in compact_dtypes.items() if label not in unknown_dtypes
+                }
+
+        last_positions = definition.StartingPosition + definition.NumberOfPositions
+
+        self.path = Path(definition_file)
+        self.names = tuple(definition.Label.tolist())
+        self.starting_positions = tuple(int(p) for p in definition.StartingPosition)
+        self.offsets = tuple(position - 1 for position in self.starting_positions)
+        self.widths = tuple(int(w) for w in definition.NumberOfPositions)
+        self.converter_names = tuple(converter_names)
+        self.converters = {name: CONVERTERS[converter] for name, converter in zip(self.names, self.converter_names)}
+        self.dtypes = {
+            name: CONVERTER_ARROW_TYPES.get(converter, pa.string())
+            for name, converter in zip(self.names, self.converter_names)
+        }
+        self.compact_dtypes = compact_dtypes
+        self.record_length = int(last_positions.max()) - 1
+
+    def __repr__(self) -> str:
+        """Short description of the definition."""
+        return f"Definition({self.path.name}, {len(self.names)} fields, record_length={self.record_length})"
+
+    def get_compact_dtypes(self, use_column_converters: bool = False) -> dict:
+        """Compact dtypes that are set after reading with this definition.
+
+        Without column-converters all fields are strings, so only dtypes that keep
+        the values as strings are used.
+
+        Args:
+            use_column_converters (bool, optional): wether column_converters are used or not. Defaults to False.
+
+        Returns:
+            dict: pandas-dtype for every field with a compact dtype.
+        """
+        return {
+            name: pd.ArrowDtype(DTYPE_ARROW_TYPES[dtype]) if dtype == "date32" else dtype
+            for name, dtype in self.compact_dtypes.items()
+            if use_column_converters or dtype in STRING_DTYPES
+        }
+
+    def schema(self, use_column_converters: bool = False) -> pa.Schema:
+        """Schema of the data read with this definition.
+
+        Args:
+            use_column_converters (bool, optional): wether column_converters are used or not. Defaults to False.
+
+        Returns:
+            pa.Schema: Schema with a field for every column in the definition-file.
+        """
+        compact_dtypes = self.get_compact_dtypes(use_column_converters)
+        fields = []
+        for name, dtype in self.dtypes.items():
+            if name in compact_dtypes:
+                dtype = DTYPE_ARROW_TYPES[self.compact_dtypes[name]]
+            elif not use_column_converters:
+                dtype = pa.string()
+            fields.append(pa.field(name, dtype))
+        return pa.schema(fields)
+
+
+@lru_cache(maxsize=128)
+def _compile_definition(definition_file: Path, mtime_ns: int) -> Definition:
+    """Compile definition-file, cached by path and modification time.
+
+    Args:
+        definition_file (Path): Path to definition-file.
+        mtime_ns (int): Modification time of the definition-file, only used as part of the cache-key.
+
+    Returns:
+        Definition: compiled definition.
+    """
+    logger.debug(f"...compiling definition {definition_file.name}")
+    return Definition(definition_file)
+
+
+def get_definition(definition_file: Path) -> Definition:
+    """Get compiled definition for a definition-file.
+
+    Args:
+        definition_file (Path): Path to definition-file.
+
+    Raises:
+        Exception: The definition-file does not exist.
+
+    Returns:
+        Definition: compiled definition.
+    """
+    definition_file = Path(definition_file)
+    if not definition_file.exists():
+        raise Exception(f"{definition_file} does not exist.")
+
+    return _compile_definition(definition_file.resolve(), definition_file.stat().st_mtime_ns)
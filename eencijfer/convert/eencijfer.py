@@ -1,13 +1,30 @@
 """Main eencijfer module."""
 
 import logging
+import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from enum import Enum
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
 
 import pandas as pd
-
-from eencijfer import CONVERTERS
-from eencijfer.io.files import ExportFormat, _save_to_file
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from eencijfer import __version__
+from eencijfer.convert.definition import get_definition
+from eencijfer.convert.fixed_width import (
+    FixedWidthRecords,
+    _check_record_length,
+    _read_buffer,
+    iter_fixed_width,
+    iter_fixed_width_tables,
+    read_fixed_width,
+    read_fixed_width_table,
+)
+from eencijfer.io.cache import _add_to_cache, _get_cache_key, _get_from_cache
+from eencijfer.io.files import ExportFormat, _save_chunks_to_parquet, _save_to_file
 from eencijfer.utils.detect_eencijfer_files import _get_list_of_definition_files, _get_list_of_eencijfer_files_in_dir
 
 logger = logging.getLogger(__name__)
@@ -15,6 +32,19 @@ logger = logging.getLogger(__name__)
 definition_files = _get_list_of_definition_files()
 
 
+class ReadEngine(str, Enum):
+    """Engine that is used to read fixed-width eencijfer-files.
+
+    Args:
+        str (_type_): _description_
+        Enum (_type_): _description_
+    """
+
+    pandas = "pandas"
+    numpy = "numpy"
+    arrow = "arrow"
+
+
 def _match_file_to_definition(fpath: Path, definition_files: list = definition_files) -> Optional[Path]:
     """Matches import-definitions to .asc-files in eencijfer-directory.
 
@@ -74,89 +104,233 @@ def _create_dict_matching_eencijfer_and_definition_files(source_dir: Path) -> di
     return result_dict
 
 
-def _create_definition_with_converter(
-    definition_file: Path,
-) -> pd.DataFrame:
-    """Creates a dataframe with metadata based an the definition-file.
+def _read_records(fpath: Path) -> FixedWidthRecords:
+    """Memory-map asc-file and find its records, without parsing any field.
+
+    Args:
+        fpath (Path): Path to asc-file.
+
+    Returns:
+        FixedWidthRecords: Records of the asc-file.
+    """
+    return FixedWidthRecords(_read_buffer(fpath, memory_map=True))
 
-    Adds a column to the data from a definition-file with a convert-function,
-    if no converter is given the column will be in string format.
+
+def _set_compact_dtypes(data: pd.DataFrame, compact_dtypes: dict, fpath: Path) -> pd.DataFrame:
+    """Set compact dtypes from the definition-file.
+
+    Chunks of a file are written with one schema, so a column whose values do not
+    fit the compact dtype is an error, with or without chunks.
 
     Args:
-        definition_file (Path): Path to definition-file.
+        data (pd.DataFrame): Data read from asc-file.
+        compact_dtypes (dict): pandas-dtype for every column with a compact dtype.
+        fpath (Path): Path to asc-file.
+
+    Raises:
+        Exception: values of a column do not fit its compact dtype.
 
     Returns:
-        pd.DataFrame: Definitionfile with converterfunction
+        pd.DataFrame: data with compact dtypes.
     """
-    # maak een dataframe met converter-convertfunction mapping
-    if not definition_file.exists():
-        raise Exception(f"{definition_file} does not exist.")
-
-    logger.debug("Create df with column_converter functions from CONVERTERS-dict.")
-    converter_functions = (
-        pd.DataFrame.from_dict(
-            CONVERTERS,
-            orient="index",
-        )
-        .reset_index()
-        .rename(columns={"index": "Converter", 0: "ConvertFunction"})
+    for name, dtype in compact_dtypes.items():
+        try:
+            data[name] = data[name].astype(dtype)
+        except (TypeError, ValueError) as e:
+            raise Exception(f"{name} in {fpath.name} does not fit the Dtype {dtype} in the definition-file: {e}") from e
+    return data
+
+
+def _sort_dictionary(column: pa.ChunkedArray) -> pa.ChunkedArray:
+    """Dictionary-encoded column with its dictionary sorted, like the categories of pandas.
+
+    Args:
+        column (pa.ChunkedArray): dictionary-encoded column.
+
+    Returns:
+        pa.ChunkedArray: the same values, with a sorted dictionary.
+    """
+    values = column.cast(column.type.value_type)
+    categories = pc.unique(values).drop_null()
+    categories = categories.take(pc.array_sort_indices(categories))
+    indices = pc.index_in(values, value_set=categories).cast(column.type.index_type)
+    return pa.chunked_array(
+        [pa.DictionaryArray.from_arrays(chunk, categories) for chunk in indices.chunks], type=column.type
     )
-    logger.debug(f"{converter_functions}")
-    logger.debug(f"...reading definition file {definition_file}")
-    definition = pd.read_csv(definition_file)
 
-    logger.debug("...add garbage column to detect garbage.")
-    definition['LastPosition'] = definition.StartingPosition + definition.NumberOfPositions
-    starting_position_garbage_colum = definition.LastPosition.max()
 
-    definition.loc[len(definition)] = ['GarbageColumn', starting_position_garbage_colum, 10, 'convert_to_object', 1000]
+def _cast_to_schema(table: pa.Table, schema: pa.Schema, fpath: Path) -> pa.Table:
+    """Cast columns to the types in the schema of the definition-file.
 
-    logger.debug(f"...add column with column_converter_functions to definition {definition_file.name}")
+    Chunks of a file are written with this schema, so a column whose values do not
+    fit its type is an error, with or without chunks. Dictionaries are sorted, so
+    categories are in the same order as with the other engines.
 
-    definition = pd.merge(
-        definition,
-        converter_functions,
-        left_on="Converter",
-        right_on="Converter",
-        how="left",
+    Args:
+        table (pa.Table): Data read from asc-file.
+        schema (pa.Schema): Schema with a field for every column in the definition-file.
+        fpath (Path): Path to asc-file.
+
+    Raises:
+        Exception: values of a column do not fit its type.
+
+    Returns:
+        pa.Table: table with the types of the schema.
+    """
+    for i, field in enumerate(schema):
+        column = table.column(i)
+        if column.type != field.type:
+            try:
+                column = column.cast(field.type)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+                raise Exception(
+                    f"{field.name} in {fpath.name} does not fit the type {field.type} in the definition-file: {e}"
+                ) from e
+        if pa.types.is_dictionary(field.type):
+            column = _sort_dictionary(column)
+        table = table.set_column(i, field, column)
+    return table
+
+
+def read_asc_table(
+    fpath: Path,
+    definition_file: Path,
+    use_column_converters: bool = False,
+    memory_map: bool = False,
+) -> pa.Table:
+    """Reads in asc-file based on definition-file into a pyarrow-table.
+
+    Works like read_asc, but parses the fields straight into arrow-arrays and
+    converts them with arrow column-converters, without pandas object-columns.
+
+    Args:
+        fpath (Path): Path to asc-file.
+        definition_file (Path): Path to definition-file.
+        use_column_converters (bool, optional): wether to use column_converters defined in the
+            definition-file or not. Defaults to False.
+        memory_map (bool, optional): Memory-map the asc-file. Defaults to False.
+
+    Raises:
+        AssertionError: Lines of the asc-file contain data after the last field of the definition-file.
+
+    Returns:
+        pa.Table: table with data from asc-file, with the schema of the definition-file.
+    """
+    definition = get_definition(definition_file)
+    logger.info(f"...start reading {fpath.name} with arrow-engine")
+
+    table = read_fixed_width_table(
+        fpath,
+        names=list(definition.names),
+        starting_positions=list(definition.starting_positions),
+        widths=list(definition.widths),
+        converters=definition.converters if use_column_converters else None,
+        memory_map=memory_map,
+        record_length=definition.record_length,
     )
-    logger.debug(f"{definition}")
+    return _cast_to_schema(table, definition.schema(use_column_converters), fpath)
 
-    missing_converters = definition[definition.ConvertFunction.isnull()].Label.tolist()
 
-    if len(missing_converters) > 0:
-        logger.warning(f"❌ ====> missing converters voor: {missing_converters}")
-        logger.warning("❌ ====> setting converters to 'convert_to_string'")
-        definition["ConvertFunction"] = definition["ConvertFunction"].fillna(CONVERTERS['convert_to_object'])
-    return definition
+def iter_asc_tables(
+    fpath: Path,
+    definition_file: Path,
+    chunk_size: int,
+    use_column_converters: bool = False,
+) -> Iterator[pa.Table]:
+    """Reads in asc-file in pyarrow-tables of chunk_size records, based on definition-file.
+
+    Args:
+        fpath (Path): Path to asc-file.
+        definition_file (Path): Path to definition-file.
+        chunk_size (int): Number of records per chunk.
+        use_column_converters (bool, optional): wether to use column_converters defined in the
+            definition-file or not. Defaults to False.
 
+    Raises:
+        AssertionError: Lines of the asc-file contain data after the last field of the definition-file.
 
-def read_asc(fpath: Path, definition_file: Path, use_column_converters: bool = False) -> pd.DataFrame:
+    Yields:
+        Iterator[pa.Table]: table with data from asc-file for every chunk.
+    """
+    definition = get_definition(definition_file)
+    logger.info(f"...start reading {fpath.name} with arrow-engine in chunks of {chunk_size} records")
+
+    schema = definition.schema(use_column_converters)
+    for table in iter_fixed_width_tables(
+        fpath,
+        names=list(definition.names),
+        starting_positions=list(definition.starting_positions),
+        widths=list(definition.widths),
+        chunk_size=chunk_size,
+        converters=definition.converters if use_column_converters else None,
+        record_length=definition.record_length,
+    ):
+        yield _cast_to_schema(table, schema, fpath)
+
+
+def read_asc(
+    fpath: Path,
+    definition_file: Path,
+    use_column_converters: bool = False,
+    engine: ReadEngine = ReadEngine.numpy,
+    memory_map: bool = False,
+    shards: int = 1,
+) -> pd.DataFrame:
     """Reads in asc-file based on definition-file.
 
     Converters contain column-names, widths and column-converters which are used for
     converting data to the right datatype. For example: convert strings to int64 or
-    set a '0-value' as a missing (NaN).
+    set a '0-value' as a missing (NaN). Columns with a Dtype in the definition-file
+    are then set to that compact dtype, for example a category or Int16.
+
+    Before parsing, the raw bytes are checked for data after the last field of the
+    definition-file. Such data means the definition-file does not match the asc-file,
+    otherwise all the data would fit into the defined columns.
 
     Args:
         fpath (Path): Path to asc-file.
         definition_file (Path): Path to definition-file.
         use_column_converters (Boolean): wether to use column_converters defined in the definition-file or not.
+        engine (ReadEngine, optional): Engine used for parsing the fixed-width file. The numpy-engine slices
+            the raw bytes using the positions in the definition-file, the arrow-engine does the same but
+            creates a pyarrow-table first. Defaults to ReadEngine.numpy.
+        memory_map (bool, optional): Memory-map the asc-file when using the numpy- or arrow-engine, so fields are
+            only decoded when a column is created. Defaults to False.
+        shards (int, optional): Split the asc-file in this many parts that are parsed in parallel processes
+            when using the numpy-engine. Defaults to 1.
+
+    Raises:
+        AssertionError: Lines of the asc-file contain data after the last field of the definition-file.
 
     Returns:
         pd.DataFrame: df with data from asc-file.
     """
 
-    definition = _create_definition_with_converter(definition_file)
+    definition = get_definition(definition_file)
 
-    widths = definition["NumberOfPositions"].tolist()
-    names = definition["Label"].tolist()
-    column_converters: dict = pd.Series(definition.ConvertFunction.values, index=definition.Label).to_dict()
+    widths = list(definition.widths)
+    names = list(definition.names)
+    column_converters = definition.converters
     logger.info(f"...start reading {fpath.name}")
 
     try:
+        if engine.value == 'arrow':
+            data = read_asc_table(fpath, definition_file, use_column_converters, memory_map=memory_map).to_pandas()
+        elif engine.value == 'numpy':
+            logger.info(f"...using numpy-engine for {fpath.name}")
+            data = read_fixed_width(
+                fpath,
+                names=names,
+                starting_positions=list(definition.starting_positions),
+                widths=widths,
+                converters=column_converters if use_column_converters else None,
+                memory_map=memory_map,
+                shards=shards,
+                record_length=definition.record_length,
+            )
         # if column_converters should be used, use them...
-        if use_column_converters:
+        elif use_column_converters:
+            _check_record_length(_read_records(fpath), definition.record_length, fpath)
             logger.info(f"...using column converters for {fpath.name}")
             data = pd.read_fwf(
                 fpath,
@@ -166,6 +340,7 @@ def read_asc(fpath: Path, definition_file: Path, use_column_converters: bool = F
                 encoding="latin1",
             )
         else:
+            _check_record_length(_read_records(fpath), definition.record_length, fpath)
             logger.info(f"...import all columns as strings from {fpath.name}")
             data = pd.read_fwf(
                 fpath,
@@ -179,35 +354,226 @@ def read_asc(fpath: Path, definition_file: Path, use_column_converters: bool = F
             logger.info(f"...no data found in {fpath.name}")
         else:
             logger.info(f"...data was read from {fpath.name}")
-            # A column is added at the end of the definition file, that will
-            # catch data that is not defined in the definition file. If there is
-            # data in the GarbageColumn this means the definition file does not contain
-            # the right definitions (otherwise all the data would fit into the defined
-            # columns).
-            # Later on the GarbageColumn will be removed if it is empty.
-
-            number_of_not_null_values_in_garbage_columns = data.GarbageColumn.notnull().sum()
-            if number_of_not_null_values_in_garbage_columns > 0:
-                logger.critical(f'!!!! The garbage-column for {fpath.name} is not empty, check your definitions !!!')
-                logger.critical('!!!! Below are some examples of the rows with non-empty GarbageColumns !!!')
-                logger.critical(' ')
-                examples_non_empty_garbage_columns = data[data.GarbageColumn.notnull()].head(10)
-                logger.critical(f'{examples_non_empty_garbage_columns}')
-                logger.critical(f"{examples_non_empty_garbage_columns.GarbageColumn}")
-                logger.critical('❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌')
-                logger.critical(f'!!!! ❌ ❌ ❌ The garbage-column for {fpath.name} is not empty, check your definitions ❌ ❌ ❌!!!')
-                logger.critical('❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌')
-                raise AssertionError(f'!!!! The garbage-column for {fpath.name} is not empty, check your definitions !!!')
-            else:
-                logger.debug("No garbage detected.")
-                logger.debug(f'The garbage-column for {fpath.name} is empty, removing GarbageColumn from dataframe.')
-                del data['GarbageColumn']
 
+    except AssertionError:
+        raise
     except Exception as e:
         logger.warning(f"...reading of {fpath.name} failed.")
         logger.warning(f"{e}")
+        return data
 
-    return data
+    # values that do not fit their Dtype fail the conversion, like they do in chunks.
+    return _set_compact_dtypes(data, definition.get_compact_dtypes(use_column_converters), fpath)
+
+
+def iter_asc(
+    fpath: Path,
+    definition_file: Path,
+    chunk_size: int,
+    use_column_converters: bool = False,
+    engine: ReadEngine = ReadEngine.numpy,
+) -> Iterator[pd.DataFrame]:
+    """Reads in asc-file in chunks, based on definition-file.
+
+    Works like read_asc, but never holds more than chunk_size records in memory.
+
+    Args:
+        fpath (Path): Path to asc-file.
+        definition_file (Path): Path to definition-file.
+        chunk_size (int): Number of records per chunk.
+        use_column_converters (Boolean): wether to use column_converters defined in the definition-file or not.
+        engine (ReadEngine, optional): Engine used for parsing the fixed-width file. Defaults to ReadEngine.numpy.
+
+    Raises:
+        AssertionError: Lines of the asc-file contain data after the last field of the definition-file.
+
+    Yields:
+        Iterator[pd.DataFrame]: df with data from asc-file for every chunk.
+    """
+    definition = get_definition(definition_file)
+
+    widths = list(definition.widths)
+    names = list(definition.names)
+    column_converters = definition.converters
+    logger.info(f"...start reading {fpath.name} in chunks of {chunk_size} records")
+
+    if engine.value == 'arrow':
+        chunks = (
+            table.to_pandas()
+            for table in iter_asc_tables(
+                fpath, definition_file, chunk_size, use_column_converters=use_column_converters
+            )
+        )
+    elif engine.value == 'numpy':
+        chunks = iter_fixed_width(
+            fpath,
+            names=names,
+            starting_positions=list(definition.starting_positions),
+            widths=widths,
+            chunk_size=chunk_size,
+            converters=column_converters if use_column_converters else None,
+            record_length=definition.record_length,
+        )
+    elif use_column_converters:
+        _check_record_length(_read_records(fpath), definition.record_length, fpath)
+        chunks = pd.read_fwf(
+            fpath,
+            widths=widths,
+            names=names,
+            converters=column_converters,
+            encoding="latin1",
+            chunksize=chunk_size,
+        )
+    else:
+        _check_record_length(_read_records(fpath), definition.record_length, fpath)
+        chunks = pd.read_fwf(
+            fpath,
+            widths=widths,
+            names=names,
+            dtype='str',
+            encoding="latin1",
+            chunksize=chunk_size,
+        )
+
+    compact_dtypes = definition.get_compact_dtypes(use_column_converters)
+    for chunk in chunks:
+        yield _set_compact_dtypes(chunk, compact_dtypes, fpath)
+
+
+def _create_arrow_schema(definition_file: Path, use_column_converters: bool = False) -> pa.Schema:
+    """Creates the schema of the parquet-file for an asc-file.
+
+    Every chunk of a file has to be written with the same schema, so the types
+    are based on the converters in the definition-file instead of on the data.
+
+    Args:
+        definition_file (Path): Path to definition-file.
+        use_column_converters (bool, optional): wether column_converters are used or not. Defaults to False.
+
+    Returns:
+        pa.Schema: Schema with a field for every column in the definition-file.
+    """
+    return get_definition(definition_file).schema(use_column_converters=use_column_converters)
+
+
+def _convert_file(
+    file: Path,
+    definition_file: Path,
+    result_dir: Path,
+    export_format: ExportFormat = ExportFormat.parquet,
+    use_column_converters: bool = False,
+    engine: ReadEngine = ReadEngine.numpy,
+    memory_map: bool = False,
+    chunk_size: Optional[int] = None,
+    shards: int = 1,
+    cache_dir: Optional[Path] = None,
+) -> int:
+    """Reads one eencijfer-file and saves it to the export format.
+
+    Runs in a worker-process when files are converted in parallel, so
+    exceptions are not handled here but by the caller.
+
+    Args:
+        file (Path): Path to asc-file.
+        definition_file (Path): Path to definition-file.
+        result_dir (Path): Directory where the result is saved.
+        export_format (ExportFormat, optional): The export format to use. Defaults to ExportFormat.parquet.
+        use_column_converters (bool, optional): wether to use column_converters. Defaults to False.
+        engine (ReadEngine, optional): Engine used for reading the asc-file. Defaults to ReadEngine.numpy.
+        memory_map (bool, optional): Memory-map the asc-file, chunks are always memory-mapped. Defaults to False.
+        chunk_size (Optional[int], optional): Convert in chunks of this many records. Defaults to None.
+        shards (int, optional): Parse the asc-file in this many parallel shards. Defaults to 1.
+        cache_dir (Optional[Path], optional): Directory of the cache with converted files, the cache is not
+            used if None. Defaults to None.
+
+    Returns:
+        int: Number of records that were saved.
+    """
+    target_fpath = Path(result_dir / file.name).with_suffix(f".{export_format.value}")
+
+    logger.info("**************************************")
+    logger.info("**************************************")
+    logger.info("")
+    logger.info(f"   Start reading: {file.name}")
+    logger.info("")
+    logger.info(f"   source_file:{file}")
+    logger.info(f"   definition_file:{definition_file}")
+    logger.info(f"   target_fpath:{target_fpath}")
+    logger.info("")
+    logger.info("**************************************")
+    logger.info("")
+
+    cache_key = None
+    if cache_dir is not None and export_format.value == 'parquet':
+        cache_key = _get_cache_key(
+            file,
+            definition_file,
+            version=__version__,
+            use_column_converters=use_column_converters,
+            engine=engine.value,
+            chunk_size=chunk_size,
+        )
+        cached_fpath = _get_from_cache(cache_key, cache_dir=cache_dir)
+        if cached_fpath is not None:
+            logger.warning(f"...using cached conversion of {file.name}.")
+            shutil.copyfile(cached_fpath, target_fpath)
+            return pq.read_metadata(target_fpath).num_rows
+
+    if engine.value == 'arrow' and chunk_size is not None and export_format.value == 'parquet':
+        number_of_rows = _save_chunks_to_parquet(
+            iter_asc_tables(
+                file,
+                definition_file,
+                chunk_size=chunk_size,
+                use_column_converters=use_column_converters,
+            ),
+            dir=result_dir,
+            fname=file.stem,
+            schema=_create_arrow_schema(definition_file, use_column_converters=use_column_converters),
+        )
+    elif engine.value == 'arrow':
+        table = read_asc_table(
+            file, definition_file, use_column_converters=use_column_converters, memory_map=memory_map
+        )
+        number_of_rows = table.num_rows
+        if number_of_rows > 0:
+            _save_to_file(table, dir=result_dir, fname=file.stem, export_format=export_format)
+    elif chunk_size is not None and export_format.value == 'parquet':
+        chunks = iter_asc(
+            file,
+            definition_file,
+            chunk_size=chunk_size,
+            use_column_converters=use_column_converters,
+            engine=engine,
+        )
+        number_of_rows = _save_chunks_to_parquet(
+            chunks,
+            dir=result_dir,
+            fname=file.stem,
+            schema=_create_arrow_schema(definition_file, use_column_converters=use_column_converters),
+        )
+    else:
+        raw_data = read_asc(
+            file,
+            definition_file,
+            use_column_converters=use_column_converters,
+            engine=engine,
+            memory_map=memory_map,
+            shards=shards,
+        )
+        number_of_rows = len(raw_data)
+        if number_of_rows > 0:
+            _save_to_file(raw_data, dir=result_dir, fname=file.stem, export_format=export_format)
+
+    if number_of_rows > 0:
+        logger.warning(f"...reading {file.name} succeeded.")
+        if cache_key is not None:
+            _add_to_cache(target_fpath, cache_key, cache_dir=cache_dir)
+    else:
+        logger.info(f"...there does not seem to be data in {file.name}!")
+
+    logger.info("**************************************")
+    return number_of_rows
 
 
 def _convert_to_parquet(
@@ -215,52 +581,81 @@ def _convert_to_parquet(
     result_dir: Path,
     export_format: ExportFormat = ExportFormat.parquet,
     use_column_converters: bool = False,
+    engine: ReadEngine = ReadEngine.numpy,
+    memory_map: bool = False,
+    chunk_size: Optional[int] = None,
+    jobs: int = 1,
+    shards: int = 1,
+    cache_dir: Optional[Path] = None,
+    files: Optional[list] = None,
 ) -> None:
     """Saves data to the export format.
 
     Main function that reads and converts to export-format, to the
-    result-directory specified in the config-file.
+    result-directory specified in the config-file. All files are independent,
+    so with jobs > 1 they are converted in worker-processes, largest file first.
 
     Args:
-        df (pd.DataFrame): The DataFrame to be saved.
-        fname (str, optional): The filename to use for saving. Defaults to "unknown".
-        export_format (str, optional): The export format to use. Defaults to 'parquet'.
-        config (configparser.ConfigParser, optional): The configuration parser
-          containing the result directory. Defaults to config.
+        source_dir (Path): Directory with eencijfer-files.
+        result_dir (Path): Directory where the results are saved.
+        export_format (ExportFormat, optional): The export format to use. Defaults to ExportFormat.parquet.
+        use_column_converters (bool, optional): wether to use column_converters. Defaults to False.
+        engine (ReadEngine, optional): Engine used for reading the asc-files. Defaults to ReadEngine.numpy.
+        memory_map (bool, optional): Memory-map the asc-files. Defaults to False.
+        chunk_size (Optional[int], optional): Convert in chunks of this many records. Defaults to None.
+        jobs (int, optional): Number of files converted in parallel. Defaults to 1.
+        shards (int, optional): Number of parallel shards every asc-file is parsed in. Defaults to 1.
+        cache_dir (Optional[Path], optional): Directory of the cache with converted files, the cache is not
+            used if None. Defaults to None.
+        files (Optional[list], optional): Only convert these eencijfer-files. Defaults to all files in source_dir.
 
     Returns:
         None: This function does not return a value.
     """
     # get dict with files and definitions:
     eencijfer_definition_pairs = _create_dict_matching_eencijfer_and_definition_files(source_dir)
+    if files is not None:
+        eencijfer_definition_pairs = {
+            file: definition_file for file, definition_file in eencijfer_definition_pairs.items() if file in files
+        }
+
+    options = dict(
+        result_dir=result_dir,
+        export_format=export_format,
+        use_column_converters=use_column_converters,
+        engine=engine,
+        memory_map=memory_map,
+        chunk_size=chunk_size,
+        shards=shards,
+        cache_dir=cache_dir,
+    )
 
-    for file, definition_file in eencijfer_definition_pairs.items():
-        target_fpath = Path(result_dir / file.name).with_suffix(f".{export_format.value}")
-
-        logger.info("**************************************")
-        logger.info("**************************************")
-        logger.info("")
-        logger.info(f"   Start reading: {file.name}")
-        logger.info("")
-        logger.info(f"   source_file:{file}")
-        logger.info(f"   definition_file:{definition_file}")
-        logger.info(f"   target_fpath:{target_fpath}")
-        logger.info("")
-        logger.info("**************************************")
-        logger.info("")
-
-        try:
-            raw_data = read_asc(file, definition_file, use_column_converters=use_column_converters)
-
-            if len(raw_data) > 0:
-                logger.warning(f"...reading {file.name} succeeded.")
-                _save_to_file(raw_data, dir=result_dir, fname=file.stem, export_format=export_format)
-
-            else:
-                logger.info(f"...there does not seem to be data in {file.name}!")
-        except Exception as e:
-            logger.warning(f"...inlezen van {file.name} mislukt.")
-            logger.warning(f"{e}")
+    results = {}
+    errors = {}
+    if jobs > 1:
+        files = sorted(eencijfer_definition_pairs, key=lambda file: file.stat().st_size, reverse=True)
+        logger.info(f"Converting {len(files)} files with {jobs} jobs...")
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = {
+                executor.submit(_convert_file, file, eencijfer_definition_pairs[file], **options): file
+                for file in files
+            }
+            for future in as_completed(futures):
+                file = futures[future]
+                try:
+                    results[file] = future.result()
+                except Exception as e:
+                    errors[file] = e
+    else:
+        for file, definition_file in eencijfer_definition_pairs.items():
+            try:
+                results[file] = _convert_file(file, definition_file, **options)
+            except Exception as e:
+                errors[file] = e
+
+    for file, e in errors.items():
+        logger.warning(f"...inlezen van {file.name} mislukt.")
+        logger.warning(f"{e}")
 
-        logger.info("**************************************")
+    logger.debug(f"{len(results)} files converted, {len(errors)} failed.")
     return None
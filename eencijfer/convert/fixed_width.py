@@ -0,0 +1,866 @@
+"""Fast reader for fixed-width eencijfer-files.
+
+Instead of letting `pd.read_fwf` infer and split every line in Python, the
+file is read as bytes and turned into a 2D-array with one row per record.
+Every field is then a simple slice of that array, based on the StartingPosition
+and NumberOfPositions in the definition-file. Fields can be turned into pandas-columns
+or, without decoding every value, into pyarrow-arrays.
+"""
+
+import copy
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterator, Optional, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from eencijfer import ARROW_CONVERTERS, CONVERTERS, VECTORIZED_CONVERTERS
+
+logger = logging.getLogger(__name__)
+
+# pd.read_fwf treats these strings as missing values, so do we.
+NA_VALUES = [
+    "",
+    "#N/A",
+    "#N/A N/A",
+    "#NA",
+    "-1.#IND",
+    "-1.#QNAN",
+    "-NaN",
+    "-nan",
+    "1.#IND",
+    "1.#QNAN",
+    "<NA>",
+    "N/A",
+    "NA",
+    "NULL",
+    "NaN",
+    "None",
+    "n/a",
+    "nan",
+    "null",
+]
+
+NA_ARRAY = pa.array(NA_VALUES, type=pa.string())
+
+NA_FIRST_CHARACTERS = np.array(sorted({ord(value[0]) for value in NA_VALUES if value}), dtype=np.uint32)
+
+NEWLINE = ord("\n")
+CARRIAGE_RETURN = ord("\r")
+SPACE = ord(" ")
+TAB = ord("\t")
+NUL = 0
+
+# bytes from here on differ between latin1 and utf-8.
+FIRST_NON_ASCII = 0x80
+
+# arrow-strings have 32-bit offsets, larger fields are stored as large_string.
+MAX_STRING_SIZE = 2**31 - 1
+
+# dtype of pd.read_fwf(dtype='str'), which differs between pandas-versions.
+STRING_DTYPE = pd.Series([""], dtype="str").dtype
+
+# number of bytes that are scanned at once when looking for line-endings.
+SCAN_SIZE = 2**26
+
+# number of records that are copied at once when lines differ in length.
+BLOCK_SIZE = 8192
+
+
+def _read_buffer(fpath: Path, memory_map: bool = False, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+    """Read raw bytes of a file.
+
+    Args:
+        fpath (Path): Path to file.
+        memory_map (bool, optional): Map the file into memory instead of reading it. Defaults to False.
+        start (int, optional): Position of the first byte that is read. Defaults to 0.
+        stop (Optional[int], optional): Position after the last byte that is read. Defaults to the end of the file.
+
+    Returns:
+        np.ndarray: uint8-array with the bytes of the file.
+    """
+    size = Path(fpath).stat().st_size
+    stop = size if stop is None else min(stop, size)
+    if start >= stop:
+        return np.empty(0, dtype=np.uint8)
+
+    if memory_map:
+        logger.debug(f"...memory-mapping {fpath.name}")
+        return np.memmap(fpath, dtype=np.uint8, mode="r", offset=start, shape=(stop - start,))
+
+    logger.debug(f"...reading bytes from {fpath.name}")
+    if start == 0 and stop == size:
+        return np.frombuffer(Path(fpath).read_bytes(), dtype=np.uint8)
+    with open(fpath, "rb") as f:
+        f.seek(start)
+        return np.frombuffer(f.read(stop - start), dtype=np.uint8)
+
+
+def _find_newlines(buffer: np.ndarray) -> np.ndarray:
+    """Find positions of all newlines, scanning the buffer in parts.
+
+    Args:
+        buffer (np.ndarray): Raw bytes of the file as uint8-array.
+
+    Returns:
+        np.ndarray: Positions of the newlines.
+    """
+    positions = [
+        np.flatnonzero(buffer[offset : offset + SCAN_SIZE] == NEWLINE) + offset
+        for offset in range(0, len(buffer), SCAN_SIZE)
+    ]
+    if len(positions) == 0:
+        return np.empty(0, dtype=np.int64)
+    return np.concatenate(positions)
+
+
+def _find_lines(buffer: np.ndarray) -> tuple:
+    """Find start and end of every line in buffer.
+
+    Args:
+        buffer (np.ndarray): Raw bytes of the file as uint8-array.
+
+    Returns:
+        tuple: Arrays with start-positions and end-positions (exclusive, without line-endings).
+    """
+    ends = _find_newlines(buffer)
+    starts = np.concatenate([[0], ends + 1])
+    if starts[-1] < len(buffer):
+        # last line does not end with a newline
+        ends = np.concatenate([ends, [len(buffer)]])
+    else:
+        starts = starts[:-1]
+
+    # strip carriage returns of windows line-endings
+    has_carriage_return = np.zeros(len(ends), dtype=bool)
+    non_empty = ends > starts
+    has_carriage_return[non_empty] = buffer[ends[non_empty] - 1] == CARRIAGE_RETURN
+    ends = ends - has_carriage_return
+
+    return starts, ends
+
+
+class FixedWidthRecords:
+    """Lines of a fixed-width file as views on the raw bytes.
+
+    Nothing is copied or decoded when the records are created, a field is only
+    sliced from the bytes when it is asked for. When all lines have the same
+    length, which is normally the case for eencijfer-files, the records are a
+    strided view on the buffer. A memory-mapped file is then never read into
+    memory as a whole.
+    """
+
+    def __init__(self, buffer: np.ndarray):
+        """Find the lines in buffer.
+
+        Args:
+            buffer (np.ndarray): Raw bytes of the file as uint8-array.
+        """
+        self.buffer = buffer
+        self.starts, ends = _find_lines(buffer)
+        self.lengths = ends - self.starts
+        self.line_numbers = np.arange(1, len(self.starts) + 1)
+        self.lines: Optional[np.ndarray] = self._create_strided_view()
+
+        # pd.read_fwf skips lines that contain nothing but whitespace.
+        blank_lines = self._find_blank_lines()
+        if blank_lines.any():
+            logger.debug(f"...skipping {blank_lines.sum()} blank lines.")
+            self.starts = self.starts[~blank_lines]
+            self.lengths = self.lengths[~blank_lines]
+            self.line_numbers = self.line_numbers[~blank_lines]
+            self.lines = None
+
+    def __len__(self) -> int:
+        """Number of records."""
+        return len(self.starts)
+
+    def __getitem__(self, rows: slice) -> "FixedWidthRecords":
+        """Select a range of records, without copying any bytes.
+
+        Args:
+            rows (slice): Records to select.
+
+        Returns:
+            FixedWidthRecords: Records that share the buffer with self.
+        """
+        subset = copy.copy(self)
+        subset.starts = self.starts[rows]
+        subset.lengths = self.lengths[rows]
+        subset.line_numbers = self.line_numbers[rows]
+        if self.lines is not None:
+            subset.lines = self.lines[rows]
+        return subset
+
+    def _create_strided_view(self) -> Optional[np.ndarray]:
+        """Create a 2D-view on the buffer if all lines have the same length.
+
+        Returns:
+            Optional[np.ndarray]: uint8-array with shape (number of lines, line length) or None.
+        """
+        if len(self.starts) == 0 or not (self.lengths == self.lengths[0]).all():
+            return None
+
+        stride = int(self.starts[1] - self.starts[0]) if len(self.starts) > 1 else int(self.lengths[0])
+        if not (np.diff(self.starts) == stride).all():
+            return None
+
+        return np.lib.stride_tricks.as_strided(
+            self.buffer[self.starts[0] :],
+            shape=(len(self.starts), int(self.lengths[0])),
+            strides=(stride, 1),
+            writeable=False,
+        )
+
+    def _gather(self, rows: Union[slice, np.ndarray], start: int, width: int) -> np.ndarray:
+        """Copy bytes of a field for a block of lines, padded with spaces.
+
+        Args:
+            rows (Union[slice, np.ndarray]): Lines to copy.
+            start (int): Position of the first byte of the field (0-based).
+            width (int): Number of bytes in the field.
+
+        Returns:
+            np.ndarray: uint8-array with shape (number of lines, width).
+        """
+        positions = start + np.arange(width)
+        index = self.starts[rows, None] + positions
+        in_line = positions < self.lengths[rows, None]
+
+        result = np.full(index.shape, SPACE, dtype=np.uint8)
+        result[in_line] = self.buffer[index[in_line]]
+        return result
+
+    def _find_blank_lines(self) -> np.ndarray:
+        """Find lines that are empty or contain nothing but whitespace.
+
+        Returns:
+            np.ndarray: Boolean array, True for blank lines.
+        """
+        blank_lines = self.lengths == 0
+        width = int(self.lengths.max()) if len(self) > 0 else 0
+        for block_start in range(0, len(self), BLOCK_SIZE):
+            block = slice(block_start, block_start + BLOCK_SIZE)
+            if self.lines is not None:
+                line_bytes = self.lines[block]
+            else:
+                line_bytes = self._gather(block, 0, width)
+            blank_lines[block] |= ((line_bytes == SPACE) | (line_bytes == TAB)).all(axis=1)
+        return blank_lines
+
+    def find_trailing_data(self, record_length: int) -> np.ndarray:
+        """Find records with data after record_length.
+
+        Only lines that are longer than record_length are checked, and only
+        the bytes after record_length are compared with whitespace.
+
+        Args:
+            record_length (int): Number of positions in a record.
+
+        Returns:
+            np.ndarray: Line numbers (1-based) of records with data after record_length.
+        """
+        candidates = np.flatnonzero(self.lengths > record_length)
+        has_trailing_data = np.zeros(len(candidates), dtype=bool)
+        for block_start in range(0, len(candidates), BLOCK_SIZE):
+            block = slice(block_start, block_start + BLOCK_SIZE)
+            rows = candidates[block]
+            width = int(self.lengths[rows].max()) - record_length
+            tail = self._gather(rows, record_length, width)
+            has_trailing_data[block] = ((tail != SPACE) & (tail != TAB)).any(axis=1)
+        return self.line_numbers[candidates[has_trailing_data]]
+
+    def field(self, start: int, width: int) -> np.ndarray:
+        """Bytes of a field for all records.
+
+        Lines that are too short for the field are padded with spaces.
+
+        Args:
+            start (int): Position of the first byte of the field (0-based).
+            width (int): Number of bytes in the field.
+
+        Returns:
+            np.ndarray: uint8-array with shape (number of records, width).
+        """
+        if self.lines is not None:
+            field_bytes = self.lines[:, start : start + width]
+            if field_bytes.shape[1] == width:
+                return field_bytes
+            padded = np.full((len(self), width), SPACE, dtype=np.uint8)
+            padded[:, : field_bytes.shape[1]] = field_bytes
+            return padded
+
+        result = np.empty((len(self), width), dtype=np.uint8)
+        for block_start in range(0, len(self), BLOCK_SIZE):
+            block = slice(block_start, block_start + BLOCK_SIZE)
+            result[block] = self._gather(block, start, width)
+        return result
+
+    def decode(self, start: int, width: int) -> np.ndarray:
+        """Decode a field from latin1-bytes to stripped strings.
+
+        In latin1 every byte is exactly the unicode code point, so the bytes can be
+        widened to UCS4 and viewed as a numpy unicode-array without a Python loop.
+
+        Args:
+            start (int): Position of the first byte of the field (0-based).
+            width (int): Number of bytes in the field.
+
+        Returns:
+            np.ndarray: Array with stripped strings.
+        """
+        code_points = self.field(start, width).astype(np.uint32)
+        values = code_points.view(f"<U{width}").ravel()
+        return np.char.strip(values, " \t")
+
+
+def _check_record_length(records: FixedWidthRecords, record_length: int, fpath: Path) -> None:
+    """Checks that no record contains data after record_length.
+
+    Data after the last field means the definition-file does not match the
+    file, otherwise all data would fit into the defined fields.
+
+    Args:
+        records (FixedWidthRecords): Records of a fixed-width file.
+        record_length (int): Number of positions in a record according to the definition-file.
+        fpath (Path): Path to fixed-width file.
+
+    Raises:
+        AssertionError: Some records contain data after record_length.
+
+    Returns:
+        None: None
+    """
+    line_numbers = records.find_trailing_data(record_length)
+    if len(line_numbers) == 0:
+        logger.debug(f"No data after position {record_length} in {fpath.name}.")
+        return None
+
+    examples = line_numbers[:10].tolist()
+    logger.critical(
+        '❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌'
+    )
+    logger.critical(f'!!!! ❌ {len(line_numbers)} lines of {fpath.name} contain data after position {record_length} ❌')
+    logger.critical(f'!!!! ❌ Check your definitions, for example lines {examples} ❌')
+    logger.critical(
+        '❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌❌'
+    )
+    raise AssertionError(
+        f'!!!! {len(line_numbers)} lines of {fpath.name} contain data after position {record_length}, '
+        f'for example lines {examples}. Check your definitions !!!'
+    )
+
+
+def _is_missing(values: np.ndarray) -> np.ndarray:
+    """Check which values pd.read_fwf would consider missing.
+
+    Only the values that start with the same character as one of the NA_VALUES are
+    compared with the full list, all others are quickly skipped.
+
+    Args:
+        values (np.ndarray): Array with stripped strings.
+
+    Returns:
+        np.ndarray: Boolean array, True for missing values.
+    """
+    first_characters = values.astype("<U1").view(np.uint32)
+    candidates = np.isin(first_characters, NA_FIRST_CHARACTERS)
+    is_missing = first_characters == 0
+    is_missing[candidates] = np.isin(values[candidates], NA_VALUES)
+    return is_missing
+
+
+def _to_string_series(values: np.ndarray) -> pd.Series:
+    """Convert unicode-array to string-column with NaN for missing values.
+
+    Args:
+        values (np.ndarray): Array with stripped strings.
+
+    Returns:
+        pd.Series: Column with same dtype as pd.read_fwf(dtype='str') gives.
+    """
+    result = values.astype(object)
+    result[_is_missing(values)] = np.nan
+    return pd.Series(result, dtype=STRING_DTYPE)
+
+
+def _convert_field(
+    values: np.ndarray, converter: Callable, vectorized_converter: Optional[Callable] = None
+) -> pd.Series:
+    """Apply column-converter on every value, like pd.read_fwf does.
+
+    If there is a vectorized column-converter, it converts all values at once. Only
+    when it raises a ValueError, the column-converter is called for every value.
+
+    Args:
+        values (np.ndarray): Array with stripped strings.
+        converter (Callable): Column-converter that is called for every value.
+        vectorized_converter (Optional[Callable], optional): Column-converter that converts
+            a pd.Series at once. Defaults to None.
+
+    Returns:
+        pd.Series: Converted values.
+    """
+    converted = pd.Series(values.astype(object), dtype=object)
+    if vectorized_converter is not None:
+        try:
+            converted = vectorized_converter(converted)
+        except ValueError:
+            logger.debug(f"...falling back to {converter.__name__} for every value")
+            vectorized_converter = None
+
+    if vectorized_converter is None:
+        try:
+            converted = converted.map(converter)
+        except ValueError:
+            # like pd.read_fwf, retry without passing missing values to the converter
+            converted = converted.mask(_is_missing(values), np.nan).map(converter, na_action="ignore").astype(object)
+
+    # pd.read_fwf checks for missing values after the conversion
+    if converted.dtype == object or isinstance(converted.dtype, pd.StringDtype):
+        converted = converted.mask(converted.isin(NA_VALUES), np.nan)
+
+    return pd.Series(converted.to_numpy())
+
+
+def _create_frame(
+    records: FixedWidthRecords,
+    names: list,
+    starting_positions: list,
+    widths: list,
+    converters: Optional[dict] = None,
+) -> pd.DataFrame:
+    """Create a dataframe from records, one field at a time.
+
+    Args:
+        records (FixedWidthRecords): Records of a fixed-width file.
+        names (list): Names of the fields.
+        starting_positions (list): 1-based starting position of every field.
+        widths (list): Number of positions of every field.
+        converters (Optional[dict], optional): Column-converter per name. Defaults to None.
+
+    Returns:
+        pd.DataFrame: df with a column per field.
+    """
+    columns = {}
+    for name, position, width in zip(names, starting_positions, widths):
+        columns[name] = _create_column(records, name, position, width, converters)
+
+    return pd.DataFrame(columns)
+
+
+def _create_column(
+    records: FixedWidthRecords,
+    name: str,
+    position: int,
+    width: int,
+    converters: Optional[dict] = None,
+) -> pd.Series:
+    """Decode and convert one field of the records.
+
+    Args:
+        records (FixedWidthRecords): Records of a fixed-width file.
+        name (str): Name of the field.
+        position (int): 1-based starting position of the field.
+        width (int): Number of positions of the field.
+        converters (Optional[dict], optional): Column-converter per name. Defaults to None.
+
+    Returns:
+        pd.Series: Values of the field.
+    """
+    values = records.decode(int(position) - 1, int(width))
+    if converters is None or name not in converters:
+        return _to_string_series(values)
+
+    converter = converters[name]
+    vectorized_converter = None
+    if CONVERTERS.get(getattr(converter, "__name__", None)) is converter:
+        vectorized_converter = VECTORIZED_CONVERTERS.get(converter.__name__)
+    return _convert_field(values, converter, vectorized_converter)
+
+
+def _mask_missing_values(values: pa.Array) -> pa.Array:
+    """Set values pd.read_fwf would consider missing to null.
+
+    Args:
+        values (pa.Array): Array with stripped strings.
+
+    Returns:
+        pa.Array: Array with nulls for missing values.
+    """
+    is_missing = pc.is_in(values, value_set=NA_ARRAY.cast(values.type))
+    if not pc.any(is_missing).as_py():
+        return values
+    return pc.if_else(is_missing, pa.scalar(None, values.type), values)
+
+
+def _to_string_array(records: FixedWidthRecords, start: int, width: int) -> pa.Array:
+    """Stripped values of a field as arrow-strings.
+
+    The bytes of ascii-fields are already valid utf-8, so the stripped bytes are
+    used as the data of the array and only the offsets are computed. Other fields
+    are decoded from latin1 first.
+
+    Args:
+        records (FixedWidthRecords): Records of a fixed-width file.
+        start (int): Position of the first byte of the field (0-based).
+        width (int): Number of bytes in the field.
+
+    Returns:
+        pa.Array: Array with stripped strings.
+    """
+    field_bytes = records.field(start, width)
+    if len(field_bytes) == 0 or field_bytes.max() >= FIRST_NON_ASCII or field_bytes.min() == NUL:
+        return pa.array(records.decode(start, width), type=pa.string())
+
+    is_data = (field_bytes != SPACE) & (field_bytes != TAB)
+    if is_data.all():
+        # nothing to strip, every value is the whole field.
+        begin = np.zeros(len(field_bytes), dtype=np.int64)
+        end = np.full(len(field_bytes), width, dtype=np.int64)
+        data = np.ascontiguousarray(field_bytes).ravel()
+    else:
+        has_data = is_data.any(axis=1)
+        begin = np.where(has_data, is_data.argmax(axis=1), 0)
+        end = np.where(has_data, width - is_data[:, ::-1].argmax(axis=1), 0)
+        if (is_data.sum(axis=1) == end - begin).all():
+            # no spaces within values, so the data are exactly the bytes that are not whitespace.
+            data = field_bytes[is_data]
+        else:
+            positions = np.arange(width)
+            data = field_bytes[(positions >= begin[:, None]) & (positions < end[:, None])]
+
+    string_type = pa.string() if len(data) <= MAX_STRING_SIZE else pa.large_string()
+    offsets = np.zeros(len(field_bytes) + 1, dtype=np.int32 if string_type == pa.string() else np.int64)
+    np.cumsum(end - begin, out=offsets[1:])
+    return pa.Array.from_buffers(string_type, len(field_bytes), [None, pa.py_buffer(offsets), pa.py_buffer(data)])
+
+
+def _create_arrow_column(
+    records: FixedWidthRecords,
+    name: str,
+    position: int,
+    width: int,
+    converters: Optional[dict] = None,
+) -> pa.Array:
+    """Convert one field of the records to a pyarrow-array.
+
+    Fields are converted with the arrow column-converter. Fields without one, or
+    for which it raises a pa.ArrowInvalid, are converted like the numpy-engine does.
+
+    Args:
+        records (FixedWidthRecords): Records of a fixed-width file.
+        name (str): Name of the field.
+        position (int): 1-based starting position of the field.
+        width (int): Number of positions of the field.
+        converters (Optional[dict], optional): Column-converter per name. Defaults to None.
+
+    Returns:
+        pa.Array: Values of the field.
+    """
+    values = _to_string_array(records, int(position) - 1, int(width))
+    if converters is None or name not in converters:
+        return _mask_missing_values(values)
+
+    converter = converters[name]
+    if CONVERTERS.get(getattr(converter, "__name__", None)) is converter and converter.__name__ in ARROW_CONVERTERS:
+        try:
+            converted = ARROW_CONVERTERS[converter.__name__](values)
+        except pa.ArrowInvalid:
+            logger.debug(f"...falling back to {converter.__name__} for {name}")
+        else:
+            # pd.read_fwf checks for missing values after the conversion
+            if pa.types.is_string(converted.type):
+                converted = _mask_missing_values(converted)
+            return converted
+
+    return pa.array(_create_column(records, name, position, width, converters), from_pandas=True)
+
+
+def _create_table(
+    records: FixedWidthRecords,
+    names: list,
+    starting_positions: list,
+    widths: list,
+    converters: Optional[dict] = None,
+) -> pa.Table:
+    """Create a pyarrow-table from records, one field at a time.
+
+    Args:
+        records (FixedWidthRecords): Records of a fixed-width file.
+        names (list): Names of the fields.
+        starting_positions (list): 1-based starting position of every field.
+        widths (list): Number of positions of every field.
+        converters (Optional[dict], optional): Column-converter per name. Defaults to None.
+
+    Returns:
+        pa.Table: table with a column per field.
+    """
+    columns = [
+        _create_arrow_column(records, name, position, width, converters)
+        for name, position, width in zip(names, starting_positions, widths)
+    ]
+    return pa.Table.from_arrays(columns, names=list(names))
+
+
+def _find_shards(buffer: np.ndarray, shards: int) -> list:
+    """Split buffer into byte-ranges of about equal size that start at the beginning of a line.
+
+    Args:
+        buffer (np.ndarray): Raw bytes of the file as uint8-array.
+        shards (int): Number of byte-ranges.
+
+    Returns:
+        list: Tuples with start and stop of every byte-range.
+    """
+    boundaries = [0]
+    for shard in range(1, shards):
+        target = max(len(buffer) * shard // shards, boundaries[-1])
+        newlines = np.flatnonzero(buffer[target : target + SCAN_SIZE] == NEWLINE)
+        while len(newlines) == 0 and target + SCAN_SIZE < len(buffer):
+            target += SCAN_SIZE
+            newlines = np.flatnonzero(buffer[target : target + SCAN_SIZE] == NEWLINE)
+        if len(newlines) == 0:
+            break
+        boundary = target + int(newlines[0]) + 1
+        if boundary > boundaries[-1]:
+            boundaries.append(boundary)
+    boundaries.append(len(buffer))
+
+    return [(start, stop) for start, stop in zip(boundaries[:-1], boundaries[1:]) if stop > start]
+
+
+def _read_shard(
+    fpath: Path,
+    start: int,
+    stop: int,
+    names: list,
+    starting_positions: list,
+    widths: list,
+    converters: Optional[dict] = None,
+    memory_map: bool = False,
+) -> pd.DataFrame:
+    """Read the records in a byte-range of a fixed-width file.
+
+    Args:
+        fpath (Path): Path to fixed-width file.
+        start (int): Position of the first byte of the first record.
+        stop (int): Position after the last byte of the last record.
+        names (list): Names of the fields.
+        starting_positions (list): 1-based starting position of every field.
+        widths (list): Number of positions of every field.
+        converters (Optional[dict], optional): Column-converter per name. Defaults to None.
+        memory_map (bool, optional): Memory-map the file. Defaults to False.
+
+    Returns:
+        pd.DataFrame: df with a column per field.
+    """
+    records = FixedWidthRecords(_read_buffer(fpath, memory_map=memory_map, start=start, stop=stop))
+    logger.debug(f"...{len(records)} records found in bytes {start}-{stop} of {fpath.name}")
+
+    return _create_frame(records, names, starting_positions, widths, converters)
+
+
+def _read_fixed_width_in_shards(
+    fpath: Path,
+    names: list,
+    starting_positions: list,
+    widths: list,
+    shards: int,
+    converters: Optional[dict] = None,
+    memory_map: bool = False,
+) -> pd.DataFrame:
+    """Read fixed-width file in shards, every shard in its own process.
+
+    The dtype of a converted column can depend on its values, for example when
+    some of them are missing. Columns for which the shards do not agree on the
+    dtype are converted again for the whole file, so the result is always the
+    same as reading the file at once.
+
+    Args:
+        fpath (Path): Path to fixed-width file.
+        names (list): Names of the fields.
+        starting_positions (list): 1-based starting position of every field.
+        widths (list): Number of positions of every field.
+        shards (int): Number of shards that are read in parallel.
+        converters (Optional[dict], optional): Column-converter per name. Defaults to None.
+        memory_map (bool, optional): Memory-map the file. Defaults to False.
+
+    Returns:
+        pd.DataFrame: df with a column per field.
+    """
+    byte_ranges = _find_shards(_read_buffer(fpath, memory_map=True), shards)
+    if len(byte_ranges) <= 1:
+        return read_fixed_width(fpath, names, starting_positions, widths, converters=converters, memory_map=memory_map)
+    logger.debug(f"...reading {fpath.name} in {len(byte_ranges)} shards")
+
+    with ProcessPoolExecutor(max_workers=len(byte_ranges)) as executor:
+        futures = [
+            executor.submit(_read_shard, fpath, start, stop, names, starting_positions, widths, converters, memory_map)
+            for start, stop in byte_ranges
+        ]
+        frames = [future.result() for future in futures]
+
+    data = pd.concat(frames, ignore_index=True)
+
+    records = None
+    for name, position, width in zip(names, starting_positions, widths):
+        if len({frame[name].dtype for frame in frames}) > 1:
+            logger.debug(f"...shards of {fpath.name} differ in dtype of {name}, converting it again")
+            if records is None:
+                records = FixedWidthRecords(_read_buffer(fpath, memory_map=memory_map))
+            data[name] = _create_column(records, name, position, width, converters)
+
+    return data
+
+
+def read_fixed_width(
+    fpath: Path,
+    names: list,
+    starting_positions: list,
+    widths: list,
+    converters: Optional[dict] = None,
+    memory_map: bool = False,
+    shards: int = 1,
+    record_length: Optional[int] = None,
+) -> pd.DataFrame:
+    """Read fixed-width file using the positions of the fields.
+
+    Args:
+        fpath (Path): Path to fixed-width file.
+        names (list): Names of the fields.
+        starting_positions (list): 1-based starting position of every field.
+        widths (list): Number of positions of every field.
+        converters (Optional[dict], optional): Column-converter per name. Defaults to None.
+        memory_map (bool, optional): Memory-map the file, so only the bytes of one field at a time
+            are decoded into memory. Defaults to False.
+        shards (int, optional): Split the file in this many parts that are read in parallel. Defaults to 1.
+        record_length (Optional[int], optional): Check that no record contains data after this position
+            before parsing any field. Defaults to None.
+
+    Returns:
+        pd.DataFrame: df with a column per field.
+    """
+    if shards > 1:
+        if record_length is not None:
+            _check_record_length(FixedWidthRecords(_read_buffer(fpath, memory_map=True)), record_length, fpath)
+        return _read_fixed_width_in_shards(
+            fpath, names, starting_positions, widths, shards, converters=converters, memory_map=memory_map
+        )
+
+    records = FixedWidthRecords(_read_buffer(fpath, memory_map=memory_map))
+    logger.debug(f"...{len(records)} records found in {fpath.name}")
+    if record_length is not None:
+        _check_record_length(records, record_length, fpath)
+
+    return _create_frame(records, names, starting_positions, widths, converters)
+
+
+def iter_fixed_width(
+    fpath: Path,
+    names: list,
+    starting_positions: list,
+    widths: list,
+    chunk_size: int,
+    converters: Optional[dict] = None,
+    record_length: Optional[int] = None,
+) -> Iterator[pd.DataFrame]:
+    """Read fixed-width file in chunks of chunk_size records.
+
+    Args:
+        fpath (Path): Path to fixed-width file.
+        names (list): Names of the fields.
+        starting_positions (list): 1-based starting position of every field.
+        widths (list): Number of positions of every field.
+        chunk_size (int): Number of records per chunk.
+        converters (Optional[dict], optional): Column-converter per name. Defaults to None.
+        record_length (Optional[int], optional): Check that no record contains data after this position
+            before parsing any field. Defaults to None.
+
+    Yields:
+        Iterator[pd.DataFrame]: df with a column per field for every chunk.
+    """
+    # the file is always memory-mapped, so no more than a chunk of it is read into memory at once.
+    records = FixedWidthRecords(_read_buffer(fpath, memory_map=True))
+    logger.debug(f"...{len(records)} records found in {fpath.name}, reading in chunks of {chunk_size}")
+    if record_length is not None:
+        _check_record_length(records, record_length, fpath)
+
+    for chunk_start in range(0, len(records), chunk_size):
+        chunk = _create_frame(
+            records[chunk_start : chunk_start + chunk_size], names, starting_positions, widths, converters
+        )
+        chunk.index += chunk_start
+        yield chunk
+
+
+def read_fixed_width_table(
+    fpath: Path,
+    names: list,
+    starting_positions: list,
+    widths: list,
+    converters: Optional[dict] = None,
+    memory_map: bool = False,
+    record_length: Optional[int] = None,
+) -> pa.Table:
+    """Read fixed-width file into a pyarrow-table using the positions of the fields.
+
+    Args:
+        fpath (Path): Path to fixed-width file.
+        names (list): Names of the fields.
+        starting_positions (list): 1-based starting position of every field.
+        widths (list): Number of positions of every field.
+        converters (Optional[dict], optional): Column-converter per name. Defaults to None.
+        memory_map (bool, optional): Memory-map the file. Defaults to False.
+        record_length (Optional[int], optional): Check that no record contains data after this position
+            before parsing any field. Defaults to None.
+
+    Returns:
+        pa.Table: table with a column per field.
+    """
+    records = FixedWidthRecords(_read_buffer(fpath, memory_map=memory_map))
+    logger.debug(f"...{len(records)} records found in {fpath.name}")
+    if record_length is not None:
+        _check_record_length(records, record_length, fpath)
+
+    return _create_table(records, names, starting_positions, widths, converters)
+
+
+def iter_fixed_width_tables(
+    fpath: Path,
+    names: list,
+    starting_positions: list,
+    widths: list,
+    chunk_size: int,
+    converters: Optional[dict] = None,
+    record_length: Optional[int] = None,
+) -> Iterator[pa.Table]:
+    """Read fixed-width file into pyarrow-tables of chunk_size records.
+
+    Args:
+        fpath (Path): Path to fixed-width file.
+        names (list): Names of the fields.
+        starting_positions (list): 1-based starting position of every field.
+        widths (list): Number of positions of every field.
+        chunk_size (int): Number of records per chunk.
+        converters (Optional[dict], optional): Column-converter per name. Defaults to None.
+        record_length (Optional[int], optional): Check that no record contains data after this position
+            before parsing any field. Defaults to None.
+
+    Yields:
+        Iterator[pa.Table]: table with a column per field for every chunk.
+    """
+    # the file is always memory-mapped, so no more than a chunk of it is read into memory at once.
+    records = FixedWidthRecords(_read_buffer(fpath, memory_map=True))
+    logger.debug(f"...{len(records)} records found in {fpath.name}, reading in chunks of {chunk_size}")
+    if record_length is not None:
+        _check_record_length(records, record_length, fpath)
+
+    for chunk_start in range(0, len(records), chunk_size):
+        yield _create_table(
+            records[chunk_start : chunk_start + chunk_size], names, starting_positions, widths, converters
+        )
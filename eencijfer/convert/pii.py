@@ -1,10 +1,14 @@
 """Tools for removing PII."""
 
 import logging
+import os
+import tempfile
 from pathlib import Path
+from typing import Optional
 
 import numpy as np
 import pandas as pd
+from pandas.api.extensions import take
 
 from eencijfer.io.files import ExportFormat, _save_to_file
 from eencijfer.utils.detect_eencijfer_files import _get_eencijfer_datafile, _get_eindexamen_datafile
@@ -15,17 +19,44 @@ logger = logging.getLogger(__name__)
 NEW_IDENTIFIER_SUFFIX = "_new"
 
 
+def _draw_pseudo_ids(size: int, taken: pd.Index, width: int) -> pd.Index:
+    """Draw random pseudo-ids that are not taken yet.
+
+    Args:
+        size (int): number of pseudo-ids.
+        taken (pd.Index): pseudo-ids and identifiers that can not be drawn.
+        width (int): number of digits of the pseudo-ids, filled with 0.
+
+    Returns:
+        pd.Index: unique pseudo-ids.
+    """
+    pseudo_ids = pd.Index([], dtype="str")
+    while len(pseudo_ids) < size:
+        drawn = pd.Index(np.random.randint(0, 10**width, size=size - len(pseudo_ids), dtype=np.int64)).astype(str)
+        drawn = drawn.str.zfill(width).unique()
+        pseudo_ids = pseudo_ids.append(drawn[~drawn.isin(taken) & ~drawn.isin(pseudo_ids)])
+    return pseudo_ids
+
+
 def _create_pgn_pseudo_id_table(
     data: pd.DataFrame,
     identifier: str = "PersoonsgebondenNummer",
     new_identifier_suffix: str = NEW_IDENTIFIER_SUFFIX,
+    koppeltabel: Optional[pd.DataFrame] = None,
 ) -> pd.DataFrame:
     """Creates a table with a random ID based on identifier.
 
+    The random IDs are a permutation of the identifiers, filled with 0 until 7
+    positions. When an existing koppeltabel is given, identifiers in it keep
+    their ID and new identifiers get a random ID with as many digits, that is
+    neither an ID nor an identifier yet. A permutation of only the new
+    identifiers would give away who they are.
+
     Args:
         data (pd.DataFrame): Table with identifier.
         identifier (str, optional): . Defaults to "PersoonsgebondenNummer".
         new_identifier_suffix (str, optional): Suffix that's added temporarily. Defaults to NEW_IDENTIFIER_SUFFIX.
+        koppeltabel (Optional[pd.DataFrame], optional): Earlier koppeltabel to extend. Defaults to None.
 
     Returns:
         pd.DataFrame: Dataframe with 2 columns: identifier and identifier + suffix
@@ -35,24 +66,35 @@ def _create_pgn_pseudo_id_table(
     logger.debug(f"naam new identifier = {new_identifier}")
     if identifier not in data:
         raise Exception(f"Identifier {identifier} does not exist in dataset.")
-
-    koppeltabel = data[
-        [
-            identifier,
-        ]
-    ].drop_duplicates()
-    if not len(koppeltabel) == data[identifier].nunique():
-        raise Exception("Creating table failed...")
-    logger.debug("Create identifier by creating  random numbers and fill with 0 until 7 positions.")
-    identifier_array = koppeltabel[identifier].tolist()
-    koppeltabel[new_identifier] = np.random.permutation(identifier_array)
-    koppeltabel[new_identifier] = koppeltabel[new_identifier].astype(str)
-    koppeltabel[new_identifier] = koppeltabel[new_identifier].str.zfill(7)
-    if not len(koppeltabel) == koppeltabel[new_identifier].nunique():
+    if data[identifier].isna().any():
+        raise Exception(f"Identifier {identifier} contains missing values.")
+
+    identifiers = pd.Index(pd.unique(data[identifier]))
+    if koppeltabel is None:
+        logger.debug("Create identifier by permuting the identifiers and fill with 0 until 7 positions.")
+        koppeltabel = pd.DataFrame(
+            {
+                identifier: identifiers,
+                new_identifier: identifiers.take(np.random.permutation(len(identifiers))).astype(str).str.zfill(7),
+            }
+        )
+    else:
+        new_identifiers = identifiers[pd.Index(koppeltabel[identifier]).get_indexer(identifiers) == -1]
+        logger.debug(f"Create identifier for {len(new_identifiers)} new identifiers by drawing random numbers.")
+        taken = (
+            pd.Index(koppeltabel[new_identifier].astype(str))
+            .append(pd.Index(koppeltabel[identifier].astype(str)))
+            .append(new_identifiers.astype(str))
+        )
+        width = min(max(7, taken.str.len().max()), 18)
+        extension = pd.DataFrame(
+            {identifier: new_identifiers, new_identifier: _draw_pseudo_ids(len(new_identifiers), taken, width)}
+        )
+        if extension[new_identifier].isin(taken).any():
+            raise Exception("New identifier collides with an existing identifier.")
+        koppeltabel = pd.concat([koppeltabel, extension], ignore_index=True)
+    if not koppeltabel[new_identifier].is_unique:
         raise Exception("New identifier contains duplicates.")
-    logger.debug("Create index.")
-    koppeltabel = koppeltabel.reset_index()
-    del koppeltabel["index"]
 
     return koppeltabel
 
@@ -71,16 +113,57 @@ def _replace_pgn_with_pseudo_id(
         pd.DataFrame: Table with identifier replaced.
     """
 
-    pgn_pseudoid_dict: dict = pd.Series(
-        koppeltabel[identifier].values, index=koppeltabel[identifier + NEW_IDENTIFIER_SUFFIX]
-    ).to_dict()
-
     logger.debug(f"Replace values in {identifier} with pseudo ids.")
-    data[identifier] = data[identifier].map(pgn_pseudoid_dict)
+    # every identifier is looked up once, rows get the pseudo-id of their identifier by its code.
+    codes, identifiers = pd.factorize(data[identifier])
+    positions = pd.Index(koppeltabel[identifier]).get_indexer(identifiers)
+    pseudo_ids = take(koppeltabel[identifier + NEW_IDENTIFIER_SUFFIX].array, positions, allow_fill=True)
+    data[identifier] = take(pseudo_ids, codes, allow_fill=True)
 
     return data
 
 
+def _load_koppeltabel(fpath: Path) -> Optional[pd.DataFrame]:
+    """Koppeltabel of earlier deliveries, if there is one.
+
+    Args:
+        fpath (Path): Path to koppeltabel.
+
+    Returns:
+        Optional[pd.DataFrame]: koppeltabel, None if the file does not exist.
+    """
+    if not Path(fpath).is_file():
+        logger.info(f"No koppeltabel found at {fpath}, creating a new one.")
+        return None
+    logger.info(f"Reusing pseudo-ids of koppeltabel {fpath}.")
+    return pd.read_parquet(fpath)
+
+
+def _save_koppeltabel(koppeltabel: pd.DataFrame, fpath: Path) -> None:
+    """Save koppeltabel, only readable by the owner.
+
+    Args:
+        koppeltabel (pd.DataFrame): table with pseudo-id per id.
+        fpath (Path): Path to koppeltabel.
+
+    Returns:
+        None: None
+    """
+    Path(fpath).parent.mkdir(parents=True, exist_ok=True)
+    # write to a temporary file first, so the koppeltabel is never readable by others or partially written.
+    handle, temp_fpath = tempfile.mkstemp(dir=Path(fpath).parent, suffix=".tmp")
+    os.close(handle)
+    try:
+        os.chmod(temp_fpath, 0o600)
+        koppeltabel.to_parquet(temp_fpath)
+        os.replace(temp_fpath, fpath)
+    finally:
+        if Path(temp_fpath).exists():
+            os.remove(temp_fpath)
+    logger.info(f"Saved koppeltabel with {len(koppeltabel)} pseudo-ids to {fpath}.")
+    return None
+
+
 def _empty_id_fields(
     data: pd.DataFrame,
 ) -> pd.DataFrame:
@@ -112,6 +195,7 @@ def _replace_all_pgn_with_pseudo_id_remove_pii_local_id(
     eencijfer_dir: Path,
     remove_pii: bool = True,
     add_local_id: bool = False,
+    koppeltabel_fpath: Optional[Path] = None,
 ) -> None:
     """Replaces id's with pseudo-id's, removes PII, adds local-'s.
 
@@ -119,6 +203,8 @@ def _replace_all_pgn_with_pseudo_id_remove_pii_local_id(
         eencijfer_dir (Path): Path to directory with eencijfer-parquet-files.
         remove_pii (bool, optional): Remove person identifiable information. Defaults to True.
         add_local_id (bool, optional): Add local id. Defaults to False.
+        koppeltabel_fpath (Optional[Path], optional): Path to koppeltabel that is reused and extended, so
+            pseudo-ids are the same in every delivery. Defaults to None, then pseudo-ids are not kept.
 
     Raises:
         Exception: _description_
@@ -158,10 +244,17 @@ def _replace_all_pgn_with_pseudo_id_remove_pii_local_id(
             logger.warning('Not removing local_id! Data still contains PII.')
 
         logger.info('Creating table with pseudo-ids...')
+        # one table for the identifiers in both files, also students that are only in the eindexamens get a pseudo-id.
+        identifiers = []
         if eencijfer_fname:
-            koppeltabel = _create_pgn_pseudo_id_table(eencijfer)
-        else:
-            koppeltabel = _create_pgn_pseudo_id_table(vakken)
+            identifiers.append(eencijfer[["PersoonsgebondenNummer"]])
+        if vakken_fname:
+            identifiers.append(vakken[["PersoonsgebondenNummer"]])
+        koppeltabel = _create_pgn_pseudo_id_table(
+            pd.concat(identifiers), koppeltabel=_load_koppeltabel(koppeltabel_fpath) if koppeltabel_fpath else None
+        )
+        if koppeltabel_fpath:
+            _save_koppeltabel(koppeltabel, koppeltabel_fpath)
 
         if eencijfer_fname:
             logger.info(f'...removing pgn from {eencijfer_fpath}')
@@ -0,0 +1,198 @@
+"""Vectorized versions of the converters for columns on read-time.
+
+Every function converts a whole column of stripped strings at once and gives the
+same result as calling the column-converter with the same name on every value,
+the way pd.read_fwf does. When that is not possible, a ValueError is raised and
+the column-converter is called for every value instead.
+"""
+
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from eencijfer import column_converter
+from eencijfer.convert.fixed_width import NA_VALUES
+
+DATE_FORMAT = "%Y%m%d"
+
+# missing values that pd.to_datetime turns into NaT, it raises on all others
+NAT_VALUES = ["", "NaN", "nan"]
+
+
+def _skip_missing(x: pd.Series, missing: pd.Series, func: Callable) -> pd.Series:
+    """Apply func on values that are not missing.
+
+    When a column-converter raises a ValueError, pd.read_fwf retries without
+    passing missing values to the converter. The result is always of dtype object.
+
+    Args:
+        x (pd.Series): column
+        missing (pd.Series): boolean mask of missing values
+        func (Callable): vectorized conversion
+
+    Returns:
+        pd.Series: converted values, NaN for missing values.
+    """
+    return func(x[~missing]).reindex(x.index).astype(object)
+
+
+def _to_integers(x: pd.Series) -> pd.Series:
+    """Parse integers, numpy calls int() on every string in C.
+
+    Args:
+        x (pd.Series): column
+
+    Returns:
+        pd.Series: all values will be int64
+    """
+    try:
+        return x.astype("int64")
+    except OverflowError as e:
+        # int() returns python integers for these, which do not fit in int64
+        raise ValueError("Integer too large for int64.") from e
+
+
+def _convert_integers(x: pd.Series, func: Callable) -> pd.Series:
+    """Convert integer columns; int() fails on every missing value.
+
+    Args:
+        x (pd.Series): column
+        func (Callable): conversion of a column of integers
+
+    Returns:
+        pd.Series: converted values
+    """
+    missing = x.isin(NA_VALUES)
+    if missing.any():
+        return _skip_missing(x, missing, lambda present: func(_to_integers(present)))
+    return func(_to_integers(x))
+
+
+@column_converter(vectorized=True)
+def convert_to_object(x: pd.Series) -> pd.Series:
+    """Convert column to string.
+
+    Args:
+        x (pd.Series): column
+
+    Returns:
+        pd.Series: all values will be string
+    """
+    return x.astype(object)
+
+
+@column_converter(vectorized=True)
+def convert_to_int64(x: pd.Series) -> pd.Series:
+    """Convert column to int64.
+
+    Args:
+        x (pd.Series): column
+
+    Returns:
+        pd.Series: all values will be int64
+    """
+    return _convert_integers(x, lambda integers: integers)
+
+
+@column_converter(vectorized=True)
+def convert_to_float64(x: pd.Series) -> pd.Series:
+    """Convert column to float64.
+
+    Args:
+        x (pd.Series): column
+
+    Returns:
+        pd.Series: all values will be float64
+    """
+    return x.astype("float64")
+
+
+@column_converter(vectorized=True)
+def convert_to_date(x: pd.Series) -> pd.Series:
+    """Convert column to date.
+
+    Args:
+        x (pd.Series): column
+
+    Returns:
+        pd.Series: all values will be dates.
+    """
+    missing = x.isin(NA_VALUES)
+    if (missing & ~x.isin(NAT_VALUES)).any():
+        return _skip_missing(x, missing, lambda present: pd.to_datetime(present, format=DATE_FORMAT))
+    return pd.to_datetime(x.mask(missing), format=DATE_FORMAT)
+
+
+@column_converter(vectorized=True)
+def convert_to_none(x: pd.Series) -> pd.Series:
+    """Convert column to None.
+
+    Args:
+        x (pd.Series): column
+
+    Returns:
+        pd.Series: all values will be None
+    """
+    return pd.Series([None] * len(x), index=x.index, dtype=object)
+
+
+@column_converter(vectorized=True)
+def convert_geslacht(x: pd.Series) -> pd.Series:
+    """Convert column to readable geslacht (man, vrouw).
+
+    Args:
+        x (pd.Series): column
+
+    Returns:
+        pd.Series: all values will be man or vrouw
+    """
+    values = np.select([x == "M", x == "V"], ["man", "vrouw"], default="onbekend")
+    return pd.Series(values, index=x.index, dtype=object)
+
+
+@column_converter(vectorized=True)
+def convert_opleidingsvorm(x: pd.Series) -> pd.Series:
+    """Converts integer codes to their corresponding educational form.
+
+    Unknown codes are returned as is.
+
+    Args:
+        x (pd.Series): column
+
+    Returns:
+        pd.Series: all values will be 'voltijd', 'deeltijd', 'duaal' or the original code.
+    """
+
+    def _convert(codes: pd.Series) -> pd.Series:
+        integers = _to_integers(codes)
+        values = np.select(
+            [integers == 1, integers == 2, integers == 3],
+            ["voltijd", "deeltijd", "duaal"],
+            default=codes.to_numpy(dtype=object),
+        )
+        return pd.Series(values, index=codes.index, dtype=object)
+
+    missing = x.isin(NA_VALUES)
+    if missing.any():
+        return _skip_missing(x, missing, _convert)
+    return _convert(x)
+
+
+@column_converter(vectorized=True)
+def convert_to_int_zero_to_nan(x: pd.Series) -> pd.Series:
+    """Converts all values to int, except 0. These will be Nan.
+
+    Args:
+        x (pd.Series): column
+
+    Returns:
+        pd.Series: all values will int or Nan.
+    """
+
+    def _zero_to_nan(integers: pd.Series) -> pd.Series:
+        if (integers == 0).any():
+            return integers.where(integers != 0)
+        return integers
+
+    return _convert_integers(x, _zero_to_nan)
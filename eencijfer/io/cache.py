@@ -0,0 +1,131 @@
+"""On-disk cache of converted eencijfer-files.
+
+Converting the same delivery again gives the same parquet-file, so the result
+of a conversion is stored under a key that is based on the eencijfer-file, the
+definition-file and the options that change the result. The least recently used
+files are removed when the cache grows larger than max_cache_size (in bytes).
+
+The cache contains data before PII is removed, so files are only readable by
+the owner.
+"""
+
+import logging
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+from eencijfer.settings import config
+from eencijfer.utils.fingerprint import _combine_fingerprints, _get_file_fingerprint
+
+logger = logging.getLogger(__name__)
+
+cache_dir = config.getpath('default', 'cache_dir')
+max_cache_size = config.getint('default', 'max_cache_size')
+
+
+def _get_cache_key(fpath: Path, definition_file: Path, **options) -> str:
+    """Key of the converted eencijfer-file in the cache.
+
+    Args:
+        fpath (Path): Path to eencijfer-file.
+        definition_file (Path): Path to definition-file.
+        **options: options that change the result of the conversion.
+
+    Returns:
+        str: key of the converted file.
+    """
+    return _combine_fingerprints(
+        _get_file_fingerprint(fpath),
+        _get_file_fingerprint(definition_file),
+        *[f"{name}={value}" for name, value in sorted(options.items())],
+    )
+
+
+def _get_from_cache(key: str, cache_dir: Path = cache_dir) -> Optional[Path]:
+    """Path to cached file, if there is one.
+
+    Args:
+        key (str): key of the converted file.
+        cache_dir (Path, optional): Directory of the cache. Defaults to cache_dir in the config-file.
+
+    Returns:
+        Optional[Path]: Path to cached file, None if it is not in the cache.
+    """
+    cached_fpath = Path(cache_dir) / f"{key}.parquet"
+    if not cached_fpath.is_file():
+        return None
+
+    # last access is kept in the modification time, for removing least recently used files.
+    os.utime(cached_fpath)
+    return cached_fpath
+
+
+def _add_to_cache(
+    fpath: Path, key: str, cache_dir: Path = cache_dir, max_cache_size: int = max_cache_size
+) -> Optional[Path]:
+    """Copy converted file to the cache.
+
+    Args:
+        fpath (Path): Path to converted file.
+        key (str): key of the converted file.
+        cache_dir (Path, optional): Directory of the cache. Defaults to cache_dir in the config-file.
+        max_cache_size (int, optional): Maximum size of the cache in bytes. Defaults to max_cache_size in
+            the config-file.
+
+    Returns:
+        Optional[Path]: Path to cached file, None if the file is larger than the cache.
+    """
+    if fpath.stat().st_size > max_cache_size:
+        logger.info(f"...{fpath.name} is larger than the cache, not caching it.")
+        return None
+
+    Path(cache_dir).mkdir(parents=True, exist_ok=True)
+    Path(cache_dir).chmod(0o700)
+    cached_fpath = Path(cache_dir) / f"{key}.parquet"
+
+    # write to a temporary file first, so other processes never see a partial file.
+    handle, temp_fpath = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    os.close(handle)
+    try:
+        shutil.copyfile(fpath, temp_fpath)
+        os.chmod(temp_fpath, 0o600)
+        os.replace(temp_fpath, cached_fpath)
+    finally:
+        if Path(temp_fpath).exists():
+            os.remove(temp_fpath)
+    logger.debug(f"...{fpath.name} added to cache as {cached_fpath.name}")
+
+    _evict_from_cache(cache_dir=cache_dir, max_cache_size=max_cache_size)
+    return cached_fpath
+
+
+def _evict_from_cache(cache_dir: Path = cache_dir, max_cache_size: int = max_cache_size) -> None:
+    """Remove least recently used files until the cache is not larger than max_cache_size.
+
+    Args:
+        cache_dir (Path, optional): Directory of the cache. Defaults to cache_dir in the config-file.
+        max_cache_size (int, optional): Maximum size of the cache in bytes. Defaults to max_cache_size in
+            the config-file.
+
+    Returns:
+        None: removes files.
+    """
+    cached_files = []
+    for cached_fpath in Path(cache_dir).glob("*.parquet"):
+        try:
+            stat = cached_fpath.stat()
+        except FileNotFoundError:
+            continue
+        cached_files.append((stat.st_mtime_ns, stat.st_size, cached_fpath))
+
+    total_size = sum(size for _, size, _ in cached_files)
+    for _, size, cached_fpath in sorted(cached_files, key=lambda cached_file: cached_file[0]):
+        if total_size <= max_cache_size:
+            break
+        logger.debug(f"...removing {cached_fpath.name} from cache")
+        cached_fpath.unlink(missing_ok=True)
+        total_size -= size
+
+    return None
@@ -2,6 +2,7 @@
 
 import logging
 from pathlib import Path
+from typing import Optional
 
 import duckdb
 
@@ -14,13 +15,19 @@ from eencijfer.utils.detect_eencijfer_files import (
 logger = logging.getLogger(__name__)
 
 
-def _create_duckdb(source_dir: Path, result_dir: Path, db_name: str) -> None:
+def _create_duckdb(
+    source_dir: Path, result_dir: Path, db_name: str, incremental: bool = False, history_dir: Optional[Path] = None
+) -> None:
     """Create a duckdb-db and load parquet-files.
 
     Args:
         source_dir (Path): _description_
         result_dir (Path): _description_
         db_name (str): _description_
+        incremental (bool, optional): Replace only the tables of the parquet-files in source_dir in
+            an existing db, instead of creating a new db. Defaults to False.
+        history_dir (Optional[Path], optional): Directory with the history of deliveries, made available
+            as the view eencijfer_historie. Defaults to None.
 
     Returns:
         _type_: _description_
@@ -33,12 +40,12 @@ def _create_duckdb(source_dir: Path, result_dir: Path, db_name: str) -> None:
     duckdb_path: Path = result_dir / db_name
     logger.debug(f'Creating a duckdb at {duckdb_path}')
 
-    if duckdb_path.is_file():
+    if duckdb_path.is_file() and not incremental:
         logger.warning(f'...removing existing duckdb at {duckdb_path}')
         duckdb_path.unlink()
 
     if eencijfer_files is not None:
-        if duckdb_path.is_file():
+        if duckdb_path.is_file() and not incremental:
             logger.warning(f'...removing existing duckdb at {duckdb_path}')
             duckdb_path.unlink()
 
@@ -50,6 +57,9 @@ def _create_duckdb(source_dir: Path, result_dir: Path, db_name: str) -> None:
     if eindexamen_fname is not None:
         _create_view(duckdb_path=duckdb_path, source_table=eindexamen_fname, view_name='eindexamen')
 
+    if history_dir is not None and any(Path(history_dir).glob('*/*/*.parquet')):
+        _create_history_view(duckdb_path=duckdb_path, history_dir=history_dir)
+
     return None
 
 
@@ -66,7 +76,7 @@ def _import_parquet_to_duckdb(eencijfer_files: list, duckdb_path: Path) -> None:
             table = (file.stem).replace('-', '_')
             logger.debug(f"...writing {file} to table {table}")
             query = f"""
-                CREATE TABLE
+                CREATE OR REPLACE TABLE
                     {table}
                 AS
                     SELECT *
@@ -87,6 +97,34 @@ def _create_view(duckdb_path: Path, source_table: str, view_name: str) -> None:
     with duckdb.connect(duckdb_path.as_posix()) as con:
         logger.debug(f'Creating a view named {view_name} for {source_table}...')
         logger.debug(f'... at {duckdb_path}.')
-        query = f"CREATE VIEW {view_name} AS SELECT * from '{source_table}';"
+        query = f"CREATE OR REPLACE VIEW {view_name} AS SELECT * from '{source_table}';"
+        con.execute(query)
+    return None
+
+
+def _create_history_view(duckdb_path: Path, history_dir: Path, view_name: str = 'eencijfer_historie') -> None:
+    """Create view on the hive-partitioned history of deliveries.
+
+    Filters on Leveringsjaar and Inschrijvingsjaar are pushed down to the partitions,
+    only the files of matching partitions are read.
+
+    Args:
+        duckdb_path (Path): Path to duckdb-file.
+        history_dir (Path): Directory with the history of deliveries.
+        view_name (str, optional): Name of the view. Defaults to 'eencijfer_historie'.
+
+    Returns:
+        None: None
+    """
+    with duckdb.connect(duckdb_path.as_posix()) as con:
+        logger.debug(f'Creating a view named {view_name} for {history_dir}...')
+        query = f"""
+            CREATE OR REPLACE VIEW {view_name} AS
+                SELECT *
+                FROM read_parquet(
+                    '{Path(history_dir).resolve().as_posix()}/*/*/*.parquet',
+                    hive_partitioning = true,
+                    hive_types = {{'Leveringsjaar': SMALLINT, 'Inschrijvingsjaar': BIGINT}}
+                )"""
         con.execute(query)
     return None
@@ -1,10 +1,17 @@
-"""Tools to save to files."""
+"""Tools to read and save files."""
 
 import logging
+import os
+import tempfile
 from enum import Enum
 from pathlib import Path
+from typing import Iterable, Iterator, Optional, Union
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 
 from eencijfer.settings import config
 from eencijfer.utils.detect_eencijfer_files import _get_list_of_eencijfer_files_in_dir
@@ -41,16 +48,75 @@ class ExportFormat(str, Enum):
     duckdb = "duckdb"
 
 
+def _get_from_year_filter(column: str, from_year: Optional[int]) -> Optional[ds.Expression]:
+    """Filter on rows from a year on.
+
+    Args:
+        column (str): column with the year, like Inschrijvingsjaar.
+        from_year (Optional[int]): first year, None for all years.
+
+    Returns:
+        Optional[ds.Expression]: filter for _read_parquet, None for all rows.
+    """
+    return None if from_year is None else ds.field(column) >= from_year
+
+
+def _read_parquet(
+    source: Path,
+    columns: Optional[list] = None,
+    filter: Optional[ds.Expression] = None,
+) -> pd.DataFrame:
+    """Read only the columns and rows that are needed from a parquet-file or -dataset.
+
+    Columns that are not asked for are not decoded. Partitions and row-groups of
+    which the statistics do not match the filter are skipped.
+
+    Args:
+        source (Path): parquet-file or directory with a parquet-dataset.
+        columns (Optional[list], optional): columns to read. Defaults to None, all columns.
+        filter (Optional[ds.Expression], optional): filter on the rows, like
+            ds.field("Inschrijvingsjaar") >= 2020. Defaults to None.
+
+    Returns:
+        pd.DataFrame: data, like pd.read_parquet gives it.
+    """
+    dataset = ds.dataset(source, format="parquet")
+    return dataset.to_table(columns=columns, filter=filter).to_pandas()
+
+
+def _iter_parquet_row_groups(
+    fpath: Path, columns: Optional[list] = None, filter: Optional[ds.Expression] = None
+) -> Iterator[pd.DataFrame]:
+    """Read a parquet-file per row-group, in the order of the file.
+
+    Row-groups of which the statistics do not match the filter are not read.
+
+    Args:
+        fpath (Path): parquet-file.
+        columns (Optional[list], optional): columns to read. Defaults to None, all columns.
+        filter (Optional[ds.Expression], optional): filter on the rows. Defaults to None.
+
+    Yields:
+        Iterator[pd.DataFrame]: data of a row-group.
+    """
+    fragment = next(ds.dataset(fpath, format="parquet").get_fragments())
+    for row_group in fragment.split_by_row_group(filter):
+        yield row_group.to_table(columns=columns, filter=filter).to_pandas()
+
+
 def _save_to_file(
-    df: pd.DataFrame,
+    df: Union[pd.DataFrame, pa.Table],
     dir: Path,
     fname: str,
     export_format: ExportFormat = ExportFormat.parquet,
 ):
     """Saves data in the export_format in the result-directory.
 
+    A pyarrow-table is written with the arrow-writers for csv and parquet, without
+    converting it to pandas first.
+
     Args:
-        df (pd.DataFrame): _description_
+        df (Union[pd.DataFrame, pa.Table]): _description_
         fname (str, optional): _description_. Defaults to "unknown".
         export_format (ExportFormat, optional): _description_. Defaults to ExportFormat.parquet.
         config (configparser.ConfigParser, optional): _description_. Defaults to config.
@@ -64,12 +130,18 @@ def _save_to_file(
     if export_format.value == 'csv':
         target_fpath = Path(fpath).with_suffix('.csv')
         logger.info(f"Saving {fname} to {target_fpath}...")
-        df.to_csv(target_fpath, sep=",", index=False)
+        if isinstance(df, pa.Table):
+            pa_csv.write_csv(df, target_fpath)
+        else:
+            df.to_csv(target_fpath, sep=",", index=False)
 
     if export_format.value == 'parquet':
         target_fpath = Path(fpath).with_suffix('.parquet')
         logger.info(f"Saving {fname} to {target_fpath}...")
-        df.to_parquet(target_fpath)
+        if isinstance(df, pa.Table):
+            pq.write_table(df, target_fpath)
+        else:
+            df.to_parquet(target_fpath)
 
     if export_format.value == 'xlsx':
         target_fpath = Path(fpath).with_suffix('.xlsx')
@@ -80,16 +152,75 @@ def _save_to_file(
                             Try using another export-format by using:\
                             eencijfer convert --export-format csv."
             )
+        if isinstance(df, pa.Table):
+            df = df.to_pandas()
         df.to_excel(target_fpath, index=False)
 
     return None
 
 
+def _save_chunks_to_parquet(
+    chunks: Iterable[Union[pd.DataFrame, pa.Table]],
+    dir: Path,
+    fname: str,
+    schema: Optional[pa.Schema] = None,
+) -> int:
+    """Saves chunks of data as row groups of a single parquet-file.
+
+    Only one chunk at a time is held in memory. No file is written if
+    there is no data. The chunks are written to a temporary file that replaces
+    the target only when all chunks succeeded, so a failing chunk never leaves
+    a partial file behind.
+
+    Args:
+        chunks (Iterable[Union[pd.DataFrame, pa.Table]]): Chunks of data with the same columns.
+        dir (Path): Directory where the file is saved.
+        fname (str): Name of the file, without suffix.
+        schema (Optional[pa.Schema], optional): Schema every chunk is cast to. Defaults to the
+            schema of the first chunk.
+
+    Returns:
+        int: Number of rows that were saved.
+    """
+    target_fpath = Path(dir / fname).with_suffix('.parquet')
+    writer = None
+    number_of_rows = 0
+
+    handle, temp_fpath = tempfile.mkstemp(dir=dir, prefix=f"{fname}.", suffix=".tmp")
+    os.close(handle)
+    try:
+        for chunk in chunks:
+            if len(chunk) == 0:
+                continue
+            if isinstance(chunk, pa.Table):
+                table = chunk if schema is None else chunk.cast(schema)
+            else:
+                table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+            if writer is None:
+                logger.info(f"Saving {fname} to {target_fpath} in chunks...")
+                writer = pq.ParquetWriter(temp_fpath, table.schema)
+            writer.write_table(table, row_group_size=len(chunk))
+            number_of_rows += len(chunk)
+            logger.debug(f"...{number_of_rows} rows saved to {target_fpath}")
+        if writer is not None:
+            writer.close()
+            writer = None
+            os.replace(temp_fpath, target_fpath)
+    finally:
+        if writer is not None:
+            writer.close()
+        if Path(temp_fpath).exists():
+            os.remove(temp_fpath)
+
+    return number_of_rows
+
+
 def _convert_to_export_format(
     source_dir: Path,
     result_dir: Path,
     export_format: ExportFormat = ExportFormat.parquet,
     naming_style: NamingStyle = NamingStyle.Original,
+    use_arrow: bool = False,
 ):
     """Convert files in directory to exportformat.
 
@@ -97,6 +228,8 @@ def _convert_to_export_format(
         source_dir (Path): Path to directory with parquet files. Defaults to None.
         result_dir (Path): Path to directory with files in export-format. Defaults to None.
         export_format (ExportFormat, optional): _description_. Defaults to ExportFormat.parquet.
+        use_arrow (bool, optional): Read and write files as pyarrow-tables instead of pandas-dataframes.
+            Defaults to False.
 
     Returns:
         None: None
@@ -120,7 +253,7 @@ def _convert_to_export_format(
         logger.info("")
 
         try:
-            raw_data = pd.read_parquet(file)
+            raw_data = pq.read_table(file) if use_arrow else pd.read_parquet(file)
 
             if len(raw_data) > 0:
                 logger.debug(f"...reading {file.name} succeeded.")
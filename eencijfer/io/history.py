@@ -0,0 +1,142 @@
+"""History of eencijfer-deliveries in one parquet-dataset.
+
+Every year DUO delivers a new eencijfer with all enrolment-years. Instead of
+keeping a full copy per delivery, the converted eencijfer is added to a
+hive-partitioned dataset:
+
+    history_dir/Leveringsjaar=2024/Inschrijvingsjaar=2020/part-0.parquet
+
+Every Inschrijvingsjaar is kept once, from the latest delivery that contains
+it: adding a delivery removes the partitions of older deliveries for the
+enrolment-years it contains. Enrolment-years that are no longer delivered are
+kept from the older delivery.
+
+The history is read through the view eencijfer_historie in the duckdb-file,
+filters on Leveringsjaar and Inschrijvingsjaar only read the matching partitions.
+"""
+
+import logging
+import re
+import shutil
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+DELIVERY_YEAR = "Leveringsjaar"
+ENROLMENT_YEAR = "Inschrijvingsjaar"
+NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+PARTITIONING = ds.partitioning(pa.schema([(DELIVERY_YEAR, pa.int16()), (ENROLMENT_YEAR, pa.int64())]), flavor="hive")
+
+
+def _get_delivery_year(fname: str) -> int:
+    """Year of delivery from the name of the eencijfer-file, like EV21RI24.
+
+    Args:
+        fname (str): name of the eencijfer-file, with or without suffix.
+
+    Raises:
+        Exception: name does not end with the two digits of the year.
+
+    Returns:
+        int: year of delivery.
+    """
+    match = re.search(r"(\d{2})$", Path(fname).stem)
+    if match is None:
+        raise Exception(f"Year of delivery can not be derived from {fname}, set it with --delivery-year.")
+    return 2000 + int(match.group(1))
+
+
+def _get_history_partitions(history_dir: Path) -> dict:
+    """Deliveries per partition of Inschrijvingsjaar in the history.
+
+    Args:
+        history_dir (Path): directory with the history.
+
+    Returns:
+        dict: sorted years of delivery per name of partition, like Inschrijvingsjaar=2020.
+    """
+    partitions: dict = {}
+    for delivery_dir in Path(history_dir).glob(f"{DELIVERY_YEAR}=*"):
+        delivery_year = int(delivery_dir.name.split("=")[1])
+        for partition_dir in delivery_dir.glob(f"{ENROLMENT_YEAR}=*"):
+            partitions.setdefault(partition_dir.name, []).append(delivery_year)
+    return {name: sorted(years) for name, years in partitions.items()}
+
+
+def _get_partition_name(value) -> str:
+    """Name of the partition of an Inschrijvingsjaar.
+
+    Args:
+        value: Inschrijvingsjaar, None for a missing year.
+
+    Returns:
+        str: name of the partition, like Inschrijvingsjaar=2020.
+    """
+    return f"{ENROLMENT_YEAR}={NULL_PARTITION if value is None else value}"
+
+
+def _add_delivery_to_history(fpath: Path, history_dir: Path, delivery_year: int) -> list:
+    """Add a converted eencijfer to the history, replacing older deliveries of the same enrolment-years.
+
+    Adding a delivery again replaces it. Enrolment-years of which a later delivery is
+    already in the history are not added.
+
+    Args:
+        fpath (Path): converted eencijfer (parquet).
+        history_dir (Path): directory with the history.
+        delivery_year (int): year of delivery.
+
+    Returns:
+        list: names of the partitions that were written.
+    """
+    table = pq.read_table(fpath)
+    Path(history_dir).mkdir(parents=True, exist_ok=True)
+
+    delivery_dir = Path(history_dir) / f"{DELIVERY_YEAR}={delivery_year}"
+    if delivery_dir.is_dir():
+        logger.info(f"...replacing delivery {delivery_year} in {history_dir}")
+        shutil.rmtree(delivery_dir)
+
+    partitions = _get_history_partitions(history_dir)
+    delivered_years = pc.unique(table[ENROLMENT_YEAR]).to_pylist()
+    enrolment_years = [
+        value
+        for value in delivered_years
+        if max(partitions.get(_get_partition_name(value), [delivery_year])) <= delivery_year
+    ]
+    skipped = len(delivered_years) - len(enrolment_years)
+    if skipped:
+        logger.info(f"...{skipped} enrolment-years of delivery {delivery_year} are in a later delivery, skipping them")
+
+    table = table.filter(
+        pc.is_in(table[ENROLMENT_YEAR], value_set=pa.array(enrolment_years, table.schema.field(ENROLMENT_YEAR).type))
+    )
+    table = table.append_column(DELIVERY_YEAR, pa.repeat(pa.scalar(delivery_year, pa.int16()), len(table)))
+    table = table.set_column(
+        table.schema.get_field_index(ENROLMENT_YEAR), ENROLMENT_YEAR, table[ENROLMENT_YEAR].cast(pa.int64())
+    )
+    logger.info(f"Adding {len(table)} rows of delivery {delivery_year} to {history_dir}...")
+    ds.write_dataset(
+        table,
+        history_dir,
+        format="parquet",
+        partitioning=PARTITIONING,
+        basename_template="part-{i}.parquet",
+        existing_data_behavior="delete_matching",
+    )
+
+    written = [_get_partition_name(value) for value in enrolment_years]
+    for name in written:
+        for older in partitions.get(name, []):
+            if older < delivery_year:
+                logger.debug(f"...removing {name} of delivery {older}, it is in delivery {delivery_year}")
+                shutil.rmtree(Path(history_dir) / f"{DELIVERY_YEAR}={older}" / name)
+    for older_dir in Path(history_dir).glob(f"{DELIVERY_YEAR}=*"):
+        if not any(older_dir.iterdir()):
+            older_dir.rmdir()
+    return written
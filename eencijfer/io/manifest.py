@@ -0,0 +1,179 @@
+"""Manifest of converted files, for converting only what changed.
+
+The manifest is a json-file in the result-directory. For every eencijfer-file it
+records the fingerprints of the eencijfer-file and its definition-file, the
+options that were used and the outputs that were written. A file only has to be
+converted again when one of those changed or an output is missing.
+
+The eencijfer (EV) and the eindexamens (VAKHAVW) share the table with
+pseudo-ids, so they are always converted together.
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Optional
+
+import duckdb
+
+from eencijfer.io.files import ExportFormat
+from eencijfer.utils.fingerprint import _get_file_fingerprint
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FNAME = '.eencijfer_manifest.json'
+
+
+def _load_manifest(result_dir: Path) -> dict:
+    """Load manifest from result-directory.
+
+    Args:
+        result_dir (Path): Directory with converted files.
+
+    Returns:
+        dict: Entry per eencijfer-file, empty if there is no (readable) manifest.
+    """
+    manifest_fpath = Path(result_dir) / MANIFEST_FNAME
+    if not manifest_fpath.is_file():
+        return {}
+
+    try:
+        return json.loads(manifest_fpath.read_text())
+    except json.JSONDecodeError:
+        logger.warning(f"...manifest {manifest_fpath} can not be read, converting all files.")
+        return {}
+
+
+def _save_manifest(manifest: dict, result_dir: Path) -> None:
+    """Save manifest to result-directory.
+
+    Args:
+        manifest (dict): Entry per eencijfer-file.
+        result_dir (Path): Directory with converted files.
+
+    Returns:
+        None: writes out a file.
+    """
+    manifest_fpath = Path(result_dir) / MANIFEST_FNAME
+    temp_fpath = manifest_fpath.with_suffix('.tmp')
+    temp_fpath.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    temp_fpath.replace(manifest_fpath)
+    return None
+
+
+def _get_outputs(file: Path, export_format: ExportFormat, db_name: str) -> list:
+    """Names of the outputs of an eencijfer-file in the result-directory.
+
+    Args:
+        file (Path): Path to eencijfer-file.
+        export_format (ExportFormat): The export format.
+        db_name (str): Name of the duckdb-file.
+
+    Returns:
+        list: Names of outputs, for duckdb the file and the table.
+    """
+    if export_format.value == 'duckdb':
+        return [str(db_name), file.stem.replace('-', '_')]
+    return [Path(file.name).with_suffix(f".{export_format.value}").name]
+
+
+def _outputs_exist(outputs: list, result_dir: Path, export_format: ExportFormat) -> bool:
+    """Checks whether all outputs are present in the result-directory.
+
+    Args:
+        outputs (list): Names of outputs.
+        result_dir (Path): Directory with converted files.
+        export_format (ExportFormat): The export format.
+
+    Returns:
+        bool: True if all outputs exist.
+    """
+    if export_format.value != 'duckdb':
+        return all((Path(result_dir) / output).is_file() for output in outputs)
+
+    db_name, table = outputs
+    duckdb_path = Path(result_dir) / db_name
+    if not duckdb_path.is_file():
+        return False
+    with duckdb.connect(duckdb_path.as_posix(), read_only=True) as con:
+        tables = con.execute(
+            "SELECT table_name FROM information_schema.tables WHERE table_name = ?", [table]
+        ).fetchall()
+    return len(tables) > 0
+
+
+def _is_pseudonymized_together(file: Path) -> bool:
+    """Checks whether file shares the table with pseudo-ids with other files.
+
+    Args:
+        file (Path): Path to eencijfer-file.
+
+    Returns:
+        bool: True for the eencijfer and the eindexamens.
+    """
+    return 'EV' in file.stem or 'VAKH' in file.stem
+
+
+def _create_manifest_entries(eencijfer_definition_pairs: dict, db_name: str, **options) -> dict:
+    """Create manifest-entry for every eencijfer-file.
+
+    Args:
+        eencijfer_definition_pairs (dict): eencijfer-file and definition-file pairs.
+        db_name (str): Name of the duckdb-file.
+        **options: options that change the outputs, including export_format.
+
+    Returns:
+        dict: entry per name of eencijfer-file.
+    """
+    export_format = options['export_format']
+    # enums are recorded by their value, so the manifest is plain json.
+    recorded_options = {name: getattr(value, 'value', value) for name, value in options.items()}
+
+    entries = {}
+    for file, definition_file in eencijfer_definition_pairs.items():
+        entries[file.name] = {
+            'source': _get_file_fingerprint(file),
+            'definition': _get_file_fingerprint(definition_file),
+            'options': recorded_options,
+            'outputs': _get_outputs(file, export_format=export_format, db_name=db_name),
+        }
+    return entries
+
+
+def _get_outdated_files(
+    eencijfer_definition_pairs: dict,
+    entries: dict,
+    manifest: dict,
+    result_dir: Path,
+    export_format: ExportFormat,
+) -> list:
+    """Get eencijfer-files that have to be converted again.
+
+    Args:
+        eencijfer_definition_pairs (dict): eencijfer-file and definition-file pairs.
+        entries (dict): manifest-entries for the current files and options.
+        manifest (dict): manifest of the previous conversion.
+        result_dir (Path): Directory with converted files.
+        export_format (ExportFormat): The export format.
+
+    Returns:
+        list: Paths of the eencijfer-files that changed or of which an output is missing.
+    """
+    outdated = []
+    for file in eencijfer_definition_pairs:
+        previous_entry: Optional[dict] = manifest.get(file.name)
+        if previous_entry != entries[file.name]:
+            logger.info(f"...{file.name} or its definition or options changed.")
+            outdated.append(file)
+        elif not _outputs_exist(previous_entry['outputs'], result_dir=result_dir, export_format=export_format):
+            logger.info(f"...output of {file.name} is missing.")
+            outdated.append(file)
+        else:
+            logger.info(f"...{file.name} did not change, skipping it.")
+
+    if any(_is_pseudonymized_together(file) for file in outdated):
+        outdated = outdated + [
+            file for file in eencijfer_definition_pairs if _is_pseudonymized_together(file) and file not in outdated
+        ]
+
+    return outdated
@@ -0,0 +1,241 @@
+"""Registry of converted reference-tables (Dec-files).
+
+The transformations of the assets look up codes in the same reference-tables.
+Every table is read and its key is validated once per process. Tables are
+read again when the file changes, based on its size and modification time.
+
+Tables are handed out as copies, so changing a copy never changes the table in
+the registry. Reference-tables are small, copying them costs little.
+
+Codes are looked up with _join_unique: the row of the reference-table is found
+through the index on its key and only the new columns are added, the columns of
+the (wide) eencijfer are not copied like they are by a merge. Without
+copy-on-write (pandas < 3) the result shares these columns with the eencijfer.
+"""
+
+import logging
+import threading
+from pathlib import Path
+from typing import Optional, Union
+
+import pandas as pd
+from pandas.api.extensions import take
+
+from eencijfer.settings import config
+
+logger = logging.getLogger(__name__)
+
+_reference_tables: dict = {}
+_lock = threading.Lock()
+
+
+def _get_reference_entry(name: str, key: Optional[Union[str, list]], source_dir: Optional[Path]) -> dict:
+    """Entry of reference-table in the registry, (re)loaded when the file changed.
+
+    Args:
+        name (str): name of reference-table, like Dec_isat.
+        key (Optional[Union[str, list]]): column(s) that should be unique.
+        source_dir (Optional[Path]): directory with converted reference-tables.
+
+    Raises:
+        Exception: key of the reference-table is not unique.
+
+    Returns:
+        dict: entry with the table and the indexes on its keys.
+    """
+    source_dir = source_dir or config.getpath('default', 'source_dir')
+    fpath = (Path(source_dir) / name).with_suffix('.parquet').resolve()
+    stat = fpath.stat()
+    version = (stat.st_size, stat.st_mtime_ns)
+
+    with _lock:
+        entry = _reference_tables.get(fpath)
+        if entry is None or entry["version"] != version:
+            logger.debug(f"...reading reference-table {name}")
+            entry = {"version": version, "table": pd.read_parquet(fpath), "indexes": {}}
+            _reference_tables[fpath] = entry
+
+        keys = tuple([key] if isinstance(key, str) else key or [])
+        if keys and keys not in entry["indexes"]:
+            index = _get_key_index(entry["table"], list(keys))
+            if index.has_duplicates:
+                raise Exception(f"{name} is not unique on {', '.join(keys)}.")
+            entry["indexes"][keys] = index
+    return entry
+
+
+def _get_reference_table(
+    name: str, key: Optional[Union[str, list]] = None, source_dir: Optional[Path] = None
+) -> pd.DataFrame:
+    """Reference-table, read once and validated once per process.
+
+    Args:
+        name (str): name of reference-table, like Dec_isat.
+        key (Optional[Union[str, list]], optional): column(s) that should be unique. Defaults to None.
+        source_dir (Optional[Path], optional): directory with converted reference-tables.
+            Defaults to source_dir in the config-file.
+
+    Raises:
+        Exception: key of the reference-table is not unique.
+
+    Returns:
+        pd.DataFrame: copy of the reference-table.
+    """
+    return _get_reference_entry(name, key, source_dir)["table"].copy()
+
+
+def _get_reference_index(name: str, key: Union[str, list], source_dir: Optional[Path] = None) -> pd.Index:
+    """Unique index on the key of a reference-table, position i is row i of the table.
+
+    Args:
+        name (str): name of reference-table, like Dec_isat.
+        key (Union[str, list]): column(s) of the index.
+        source_dir (Optional[Path], optional): directory with converted reference-tables.
+            Defaults to source_dir in the config-file.
+
+    Raises:
+        Exception: key of the reference-table is not unique.
+
+    Returns:
+        pd.Index: index on the key, a MultiIndex for more than one column.
+    """
+    keys = tuple([key] if isinstance(key, str) else key)
+    return _get_reference_entry(name, key, source_dir)["indexes"][keys]
+
+
+def _get_key_index(data: pd.DataFrame, columns: list) -> pd.Index:
+    """Index on one or more columns of data.
+
+    Args:
+        data (pd.DataFrame): data with columns.
+        columns (list): columns of the index.
+
+    Returns:
+        pd.Index: index on the columns, a MultiIndex for more than one column.
+    """
+    if len(columns) == 1:
+        return pd.Index(data[columns[0]])
+    return pd.MultiIndex.from_frame(data[columns])
+
+
+def _copy_on_write() -> bool:
+    """Whether pandas uses copy-on-write, it always does from pandas 3 on.
+
+    Returns:
+        bool: True with copy-on-write.
+    """
+    return int(pd.__version__.split(".")[0]) >= 3 or pd.get_option("mode.copy_on_write") is True
+
+
+def _get_key_kind(values: pd.Series) -> Optional[str]:
+    """Kind of the values of a key, keys of different kinds never match.
+
+    Args:
+        values (pd.Series): values of a key-column.
+
+    Returns:
+        Optional[str]: numeric, string or datetime, None when the kind can not be determined.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        values = pd.Series(values.cat.categories)
+    if pd.api.types.is_bool_dtype(values.dtype):
+        return None
+    if pd.api.types.is_numeric_dtype(values.dtype):
+        return "numeric"
+    if pd.api.types.is_datetime64_any_dtype(values.dtype):
+        return "datetime"
+    inferred = pd.api.types.infer_dtype(values, skipna=True)
+    if inferred in ["integer", "floating", "mixed-integer-float", "decimal"]:
+        return "numeric"
+    if inferred == "string":
+        return "string"
+    if inferred in ["datetime", "datetime64", "date"]:
+        return "datetime"
+    return None
+
+
+def _check_key_dtypes(data: pd.DataFrame, reference: pd.DataFrame, left_on: list, right_on: list) -> None:
+    """Check that the keys of data and reference can match, like pd.merge does.
+
+    Args:
+        data (pd.DataFrame): data to add the columns of the reference-table to.
+        reference (pd.DataFrame): reference-table.
+        left_on (list): key-columns in data.
+        right_on (list): key-columns in reference.
+
+    Raises:
+        Exception: a key in data is of another kind than the key in reference, for example int64 and str.
+
+    Returns:
+        None: None
+    """
+    for left, right in zip(left_on, right_on):
+        left_kind, right_kind = _get_key_kind(data[left]), _get_key_kind(reference[right])
+        if left_kind is not None and right_kind is not None and left_kind != right_kind:
+            raise Exception(
+                f"Can not join {left} ({data[left].dtype}) on {right} ({reference[right].dtype}) "
+                "of the reference-table, the dtypes of the keys do not match."
+            )
+    return None
+
+
+def _join_unique(
+    data: pd.DataFrame,
+    reference: pd.DataFrame,
+    left_on: Union[str, list],
+    right_on: Union[str, list],
+    suffix: str = "_y",
+    index: Optional[pd.Index] = None,
+) -> pd.DataFrame:
+    """Left join with a reference-table that is unique on its key.
+
+    Gives the same columns as pd.merge(how="left"): a key with the same name on
+    both sides is not added again and other columns of the reference-table that
+    are already in data get the suffix. Rows without a match get missing values.
+
+    Args:
+        data (pd.DataFrame): data to add the columns of the reference-table to.
+        reference (pd.DataFrame): reference-table.
+        left_on (Union[str, list]): key-column(s) in data.
+        right_on (Union[str, list]): key-column(s) in reference.
+        suffix (str, optional): suffix for columns of reference that are already in data. Defaults to "_y".
+        index (Optional[pd.Index], optional): index on the key of reference, like the one from
+            _get_reference_index. Defaults to None, then it is created from reference.
+
+    Raises:
+        Exception: reference is not unique on its key or the dtypes of the keys do not match.
+
+    Returns:
+        pd.DataFrame: data with the columns of the reference-table.
+    """
+    left_on = [left_on] if isinstance(left_on, str) else list(left_on)
+    right_on = [right_on] if isinstance(right_on, str) else list(right_on)
+    _check_key_dtypes(data, reference, left_on, right_on)
+
+    index = _get_key_index(reference, right_on) if index is None else index
+    if not index.is_unique:
+        raise Exception(f"Reference-table is not unique on {', '.join(right_on)}.")
+    positions = index.get_indexer(_get_key_index(data, left_on))
+
+    shared_keys = [right for left, right in zip(left_on, right_on) if left == right]
+    columns = {
+        (column + suffix if column in data.columns else column): take(
+            reference[column].array, positions, allow_fill=True
+        )
+        for column in reference.columns
+        if column not in shared_keys
+    }
+    # with copy-on-write concat does not copy data, without it copy=False is needed for that.
+    copy = {} if _copy_on_write() else {"copy": False}
+    return pd.concat([data, pd.DataFrame(columns, index=data.index)], axis=1, **copy)
+
+
+def _clear_reference_tables() -> None:
+    """Remove all reference-tables from the registry.
+
+    Returns:
+        None: None
+    """
+    with _lock:
+        _reference_tables.clear()
+    return None
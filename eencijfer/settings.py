@@ -4,7 +4,7 @@ import configparser
 import logging
 from pathlib import Path
 
-from eencijfer import CONFIG_FILE, PACKAGE_PROVIDED_IMPORT_DEFINTIONS_DIR
+from eencijfer import APP_DIR, CONFIG_FILE, PACKAGE_PROVIDED_IMPORT_DEFINTIONS_DIR
 
 logger = logging.getLogger(__name__)
 
@@ -13,6 +13,8 @@ default_assets_dir = Path().absolute() / "assets"
 default_result_dir = Path().absolute() / "result"
 default_import_definitions_dir = PACKAGE_PROVIDED_IMPORT_DEFINTIONS_DIR
 default_db_name = 'eencijfer.duckdb'
+default_cache_dir = APP_DIR / "cache"
+default_max_cache_size = 10 * 2**30
 
 
 def _get_config(
@@ -24,6 +26,8 @@ def _get_config(
     import_definitions_dir: Path = default_import_definitions_dir,
     use_column_converter: bool = False,
     remove_pii: bool = True,
+    cache_dir: Path = default_cache_dir,
+    max_cache_size: int = default_max_cache_size,
 ) -> configparser.ConfigParser:
     config = configparser.ConfigParser(converters={"path": lambda x: Path(x), "list": lambda x: x.split(',')})
 
@@ -46,6 +50,10 @@ def _get_config(
             config.set('default', 'use_column_converter', str(use_column_converter))
         if not config.has_option('default', 'remove_pii'):
             config.set('default', 'remove_pii', str(remove_pii))
+        if not config.has_option('default', 'cache_dir'):
+            config.set('default', 'cache_dir', cache_dir.as_posix())
+        if not config.has_option('default', 'max_cache_size'):
+            config.set('default', 'max_cache_size', str(max_cache_size))
 
     except Exception as e:
         logger.debug(f"{e}")
@@ -0,0 +1,64 @@
+"""Fingerprints of files, to detect whether they changed."""
+
+import hashlib
+import logging
+from functools import lru_cache
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# number of bytes that are hashed at once.
+BLOCK_SIZE = 2**20
+
+
+@lru_cache(maxsize=256)
+def _hash_file_content(fpath: Path, size: int, mtime_ns: int) -> str:
+    """Hash the content of a file, cached as long as size and mtime do not change.
+
+    Args:
+        fpath (Path): Path to file.
+        size (int): Size of the file, only used as part of the cache-key.
+        mtime_ns (int): Modification time of the file, only used as part of the cache-key.
+
+    Returns:
+        str: hex-digest of the content.
+    """
+    logger.debug(f"...hashing {fpath.name}")
+    digest = hashlib.blake2b(digest_size=16)
+    with open(fpath, "rb") as f:
+        for block in iter(lambda: f.read(BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _get_file_fingerprint(fpath: Path) -> str:
+    """Fingerprint of a file, based on its size and content.
+
+    The modification time is not part of the fingerprint, so a copy of the same
+    file gives the same fingerprint.
+
+    Args:
+        fpath (Path): Path to file.
+
+    Returns:
+        str: fingerprint of the file.
+    """
+    fpath = Path(fpath).resolve()
+    stat = fpath.stat()
+    return f"{stat.st_size}-{_hash_file_content(fpath, stat.st_size, stat.st_mtime_ns)}"
+
+
+def _combine_fingerprints(*parts: str) -> str:
+    """Combine fingerprints and options into one key.
+
+    Args:
+        *parts (str): fingerprints or other values that are part of the key.
+
+    Returns:
+        str: hex-digest of all parts.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
@@ -6,6 +6,7 @@ from typing import Optional
 
 import pandas as pd
 
+from eencijfer.convert.definition import get_definition
 from eencijfer.convert.eencijfer import _get_list_of_eencijfer_files_in_dir, _match_file_to_definition
 from eencijfer.settings import config
 
@@ -23,6 +24,36 @@ def _get_definition(row: pd.Series, col_name: str = 'path') -> Optional[Path]:
     return definition
 
 
+def _get_record_length(definition_file: Optional[Path]) -> Optional[int]:
+    """Gives the length of a record according to the definition-file.
+
+    Args:
+        definition_file (Optional[Path]): Path to definition-file.
+
+    Returns:
+        Optional[int]: Number of positions in a record, None if there is no definition-file.
+    """
+    if not isinstance(definition_file, Path):
+        return None
+    return get_definition(definition_file).record_length
+
+
+def _get_line_length(fpath: Path) -> Optional[int]:
+    """Gives the length of the first line in an eencijfer-file.
+
+    Args:
+        fpath (Path): Path to eencijfer-file.
+
+    Returns:
+        Optional[int]: Number of positions in the first line, None if the file is empty.
+    """
+    with open(fpath, 'rb') as f:
+        line = f.readline().rstrip(b'\r\n')
+    if len(line) == 0:
+        return None
+    return len(line)
+
+
 def compare_eencijfer_files_and_definitions(config: configparser.ConfigParser = config) -> pd.DataFrame:
     """Compare definition files and eencijfer files.
 
@@ -33,7 +64,7 @@ def compare_eencijfer_files_and_definitions(config: configparser.ConfigParser =
         pd.DataFrame: prints out df.
     """
 
-    source_dir = config.get_path('default', 'source_dir')
+    source_dir = config.getpath('default', 'source_dir')
 
     eencijfer_fpaths = _get_list_of_eencijfer_files_in_dir(source_dir=source_dir)
     if eencijfer_fpaths is not None:
@@ -41,11 +72,14 @@ def compare_eencijfer_files_and_definitions(config: configparser.ConfigParser =
     eencijfer_df: pd.DataFrame = pd.DataFrame({'eencijfer_file': eencijfer_files, 'path': eencijfer_fpaths})
 
     eencijfer_df['definition'] = eencijfer_df.apply(_get_definition, axis=1)
+    eencijfer_df['record_length'] = eencijfer_df.definition.apply(_get_record_length)
+    eencijfer_df['line_length'] = eencijfer_df.path.apply(_get_line_length)
 
     definition_dir = config.getpath('default', 'import_definitions_dir')
     definition_fpaths = [p for p in definition_dir.iterdir() if p.suffix in [".csv"]]
     definition_files = [f.stem for f in definition_fpaths]
     definition_df = pd.DataFrame({'eencijfer_file': definition_files, 'definition': definition_fpaths})
+    definition_df['record_length'] = definition_df.definition.apply(_get_record_length)
 
     definition_without_eencijfer = definition_df[
         ~definition_df.definition.isin(eencijfer_df.definition.tolist())
@@ -0,0 +1,325 @@
+"""Tests for creating the data-assets."""
+
+import duckdb
+import numpy as np
+import pandas as pd
+import pytest
+
+from eencijfer.assets.cohorten import _get_first_rows, create_cohorten_met_indicatoren
+from eencijfer.assets.context import AssetContext
+from eencijfer.assets.duckdb_backend import (
+    _create_cohorten_view,
+    _create_eencijfer_view,
+    _create_eindexamencijfers_view,
+    _read_asset,
+)
+from eencijfer.assets.eencijfer import AssetBackend, _create_eencijfer_df
+from eencijfer.assets.eindexamencijfers import _create_eindexamencijfer_df, _keep_laatste_poging_over_row_groups
+from eencijfer.assets.graph import Asset, _build_assets, _get_assets_to_build
+from eencijfer.assets.transformations.vooropleiding import _add_vooropleiding_kort
+from eencijfer.settings import config
+
+
+@pytest.fixture
+def source_dir(tmp_path, monkeypatch):
+    """Directory with a small converted eencijfer, eindexamens and the reference-tables they need.
+
+    Students 1 and 4 start in the first year, student 1 comes back in the second year and
+    student 4 leaves for another instelling.
+    """
+    eencijfer = pd.DataFrame(
+        {
+            "PersoonsgebondenNummer": ["1", "2", "3", "4", "1", "4"],
+            "Inschrijvingsjaar": [2020, 2020, 2021, 2021, 2021, 2022],
+            "Opleidingscode": [34001, 80011, 34001, 34002, 34001, 34001],
+            "Opleidingsvorm": pd.Categorical(["voltijd", "voltijd", "deeltijd", "voltijd", "voltijd", "voltijd"]),
+            "Opleidingsfase": ["B", "A", "B", None, "B", "B"],
+            "OpleidingActueelEquivalent": ["34001", "80011", "34001", "34002", "34001", "34001"],
+            "OpleidingHistorischEquivalent": [None, "80010", None, None, None, None],
+            "CrohoOnderdeelActueleOpleiding": ["6", "6", "6", None, "6", "6"],
+            "TypeHogerOnderwijsBinnenSoortHogerOnderwijs": ["ba", "ad", "ba", "ba", "ba", "ba"],
+            "IndicatieActiefOpPeildatum": [1, 1, 1, 1, 1, 1],
+            "SoortInschrijvingHogerOnderwijs": [1, 1, 2, 1, 1, 1],
+            "EersteJaarInHetHogerOnderwijs": [2020, 2019, 2021, 2021, 2020, 2021],
+            "EersteJaarAanDezeInstelling": pd.array([2020, 2019, None, 2021, 2020, 2022], dtype="Int16"),
+            "Diplomajaar": [2020.0, None, None, None, 2023.0, None],
+            "DatumTekeningDiploma": pd.to_datetime(["2020-08-31", None, None, None, "2023-08-31", None]),
+            "OpleidingsfaseActueelVanHetDiploma": ["D", None, None, None, "B", None],
+            "SoortDiplomaSoortHogerOnderwijs": [1, 0, 0, 0, 4, 0],
+            "HoogsteVooropleidingVoorHetHo": ["00201", "00500", "00401", "00500", "00201", "00500"],
+            "HoogsteVooropleiding": ["00201", "00500", "00402", None, "00201", None],
+            "InstellingVanDeHoogsteVooropleiding": ["00AA", "00BB", "00AA", None, "00AA", None],
+            "VestigingsnummerVanDeHoogsteVooropleiding": ["00", "01", "00", None, "00", None],
+            "EersteJaarAanDezeActueleInstelling": [2020, 2019, 2021, 2021, 2020, 2021],
+            "ActueleInstelling": ["21RI", "21RI", "21RI", "21RI", "21RI", "22XX"],
+            "ISCEDF2013Rubriek": ["0413", "0413", "0413", "0714", "0413", "0413"],
+        }
+    )
+    eencijfer.to_parquet(tmp_path / "EV299XX24.parquet")
+    pd.DataFrame(
+        {
+            "PersoonsgebondenNummer": ["1", "1", "2"],
+            "Diplomajaar": [2019, 2019, 2019],
+            "VooropleidingOorspronkelijkeCode": ["00201", "00201", "00402"],
+            "VakCode": ["1000", "1001", "1002"],
+            "VakAfkorting": ["ne", "en", "wi"],
+            "CijferSchoolexamen": [65.0, None, 80.0],
+            "CijferEersteCentraalExamen": [60.0, 50.0, None],
+            "CijferTweedeCentraalExamen": [70.0, None, None],
+            "CijferDerdeCentraalExamen": [None, None, None],
+        }
+    ).to_parquet(tmp_path / "VAKHAVW99XX.parquet")
+    pd.DataFrame(
+        {
+            "VooropleidingCode": ["00201", "00402", "00500"],
+            "OmschrijvingVooropleiding": ["havo ALG", "vwo CM", "mbo niveau 4"],
+        }
+    ).to_parquet(tmp_path / "Dec_vopl.parquet")
+    pd.DataFrame(
+        {
+            "VooropleidingOorspronkelijkeCode": ["00201", "00402"],
+            "Onderwijssector": ["VO", "VO"],
+            "OmschrijvingVooropleidingOorspronkelijkeCode": ["havo ALG", "vwo CM"],
+        }
+    ).to_parquet(tmp_path / "Dec_vooropl.parquet")
+    pd.DataFrame(
+        {
+            "Brinnummer": ["00AA", "00BB"],
+            "Vestigingsnummer": ["00", "01"],
+            "NaamInstellingVooropleiding": ["Lyceum", "ROC"],
+            "PostcodeInstellingVooropleiding": ["1234", "4321"],
+            "PlaatsInstellingVooropleiding": ["Ergens", "Nergens"],
+            "DatumOprichtingInstellingVooropleiding": pd.to_datetime(["1990-01-01", "2000-01-01"]),
+            "DatumOpheffingInstellingVooropleiding": pd.to_datetime([None, "2020-01-01"]),
+            "DenominatieInstellingVooropleidingCode": ["OPB", "PC"],
+            "NaamDenominatieInstellingVooropleiding": ["Openbaar", "Protestants-Christelijk"],
+        }
+    ).to_parquet(tmp_path / "Dec_brinvestigingsnummer.parquet")
+    pd.DataFrame(
+        {"Opleidingscode": ["34001", "34002", "80011"], "NaamOpleiding": ["B Economie", "B Bedrijfskunde", "Ad Zorg"]}
+    ).to_parquet(tmp_path / "Dec_isat.parquet")
+    pd.DataFrame(
+        {
+            "Opleidingscode": [34001, 34002, 80011],
+            "ISCEDF2013Detailgroep": ["0413", "0413", "0988"],
+            "ISCEDF2013DetailgroepOmschrijving": ["Management", "Management", "Zorg"],
+            "ISCEDF2013Rubriek": ["041", "041", "098"],
+            "ISCEDF2013RubriekOmschrijving": ["Bedrijfskunde", "Bedrijfskunde", "Zorg"],
+        }
+    ).to_parquet(tmp_path / "Dec_ho_ISCED.parquet")
+
+    monkeypatch.setitem(config['default'], 'source_dir', tmp_path.as_posix())
+    return tmp_path
+
+
+def test_eencijfer_is_enriched(source_dir):
+    """Every row of the eencijfer remains and gets information about vooropleiding and opleiding."""
+    eencijfer = _create_eencijfer_df(source_dir)
+
+    assert eencijfer.PersoonsgebondenNummer.tolist() == ["1", "2", "3", "4", "1", "4"]
+    assert eencijfer.Vooropleiding.tolist()[:3] == ["havo", "mbo", "vwo"]
+    assert eencijfer.HoogsteVooropleidingProfiel[0] == "ALG" and pd.isna(eencijfer.HoogsteVooropleidingProfiel[1])
+    assert eencijfer.NaamInstellingHoogsteVooropleiding.tolist()[:3] == ["Lyceum", "ROC", "Lyceum"]
+    assert eencijfer.NaamOpleidingCroho.tolist()[:4] == ["B Economie", "Ad Zorg", "B Economie", "B Bedrijfskunde"]
+    assert eencijfer.opleiding.tolist()[:4] == ["34001", "80010", "34001", "34002"]
+    assert eencijfer.TypeOpleiding.tolist()[:4] == ["bachelor", "associate degree", "bachelor", "onbekend"]
+    assert eencijfer.InPACohortDefinitie.tolist() == ["Ja", "Nee", "Nee", "Nee", "Nee", "Nee"]
+    assert eencijfer.ISCEDF2013Rubriek_opleiding.tolist()[:4] == ["041", "098", "041", "041"]
+
+
+def test_polars_backend_equals_pandas_backend(source_dir):
+    """The lazy polars-query gives the same eencijfer as the pandas-pipeline."""
+    pytest.importorskip("polars")
+
+    expected = _create_eencijfer_df(source_dir, backend=AssetBackend.pandas)
+    result = _create_eencijfer_df(source_dir, backend=AssetBackend.polars)
+
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def _normalize(data: pd.DataFrame) -> pd.DataFrame:
+    """Values as strings, so assets of both backends can be compared regardless of dtypes."""
+    return data.astype(object).map(lambda value: None if pd.isna(value) else str(value).removesuffix(".0"))
+
+
+def test_duckdb_backend_equals_pandas_backend(source_dir):
+    """The SQL-views give the same assets, in the same order, as the pandas-pipelines."""
+    with duckdb.connect() as con:
+        _create_eencijfer_view(con, source_dir=source_dir, reference_dir=source_dir)
+        _create_cohorten_view(con)
+        _create_eindexamencijfers_view(con, source_dir=source_dir, reference_dir=source_dir)
+        assets = {name: _read_asset(con, name) for name in ["eencijfer", "cohorten", "eindexamencijfers"]}
+
+    expected = {
+        "eencijfer": _create_eencijfer_df(source_dir),
+        "cohorten": create_cohorten_met_indicatoren(_create_eencijfer_df(source_dir)),
+        "eindexamencijfers": _create_eindexamencijfer_df(source_dir),
+    }
+    for name, data in assets.items():
+        pd.testing.assert_frame_equal(_normalize(data), _normalize(expected[name]))
+
+    assert assets["cohorten"].PersoonsgebondenNummer.tolist() == ["1", "4"]
+    assert assets["cohorten"].UitvalEerstejaar.tolist() == [0, 1]
+    assert assets["eindexamencijfers"].Cijfer.tolist() == [70, 65, 50, 80]
+
+
+def test_only_rows_from_from_year_are_read(source_dir):
+    """Both backends skip inschrijvingen before from_year, eindexamens are filtered on Diplomajaar."""
+    with duckdb.connect() as con:
+        _create_eencijfer_view(con, source_dir=source_dir, reference_dir=source_dir, from_year=2021)
+        eencijfer = _read_asset(con, "eencijfer")
+
+    expected = _create_eencijfer_df(source_dir, from_year=2021)
+    pd.testing.assert_frame_equal(_normalize(eencijfer), _normalize(expected))
+    assert expected.Inschrijvingsjaar.tolist() == [2021, 2021, 2021, 2022]
+    assert len(_create_eindexamencijfer_df(source_dir, from_year=2019)) == 4
+    with pytest.raises(Exception, match="No eindexamens found from 2020 on"):
+        _create_eindexamencijfer_df(source_dir, from_year=2020)
+
+
+def test_eencijfer_is_created_once_and_not_changed_by_assets(source_dir):
+    """All assets of a run share one enriched eencijfer, so building an asset should not change it."""
+    context = AssetContext(source_dir)
+    eencijfer = context.eencijfer
+    expected = eencijfer.copy()
+
+    create_cohorten_met_indicatoren(context.eencijfer)
+
+    assert context.eencijfer is eencijfer
+    pd.testing.assert_frame_equal(context.eencijfer, expected)
+
+
+def test_assets_are_built_after_their_dependencies():
+    """Requested assets come after the assets they are made from, unknown and cyclic assets raise."""
+    assert [asset.name for asset in _get_assets_to_build(["cohorten", "eindexamencijfers"])] == [
+        "eencijfer",
+        "cohorten",
+        "eindexamencijfers",
+    ]
+
+    with pytest.raises(Exception, match="Unknown asset"):
+        _get_assets_to_build(["onbekend"])
+
+    cyclic = {
+        "a": Asset("a", build=lambda context: None, assets=("b",)),
+        "b": Asset("b", build=lambda context: None, assets=("a",)),
+    }
+    with pytest.raises(Exception, match="depends on itself"):
+        _get_assets_to_build(["a"], assets=cyclic)
+
+
+def test_only_requested_assets_are_saved(source_dir):
+    """Dependencies of requested assets are built but not saved, other assets are not built at all."""
+    context = AssetContext(source_dir)
+    saved = {}
+
+    _build_assets(["cohorten"], context=context, save=saved.__setitem__, jobs=2)
+
+    assert list(saved) == ["cohorten"]
+    assert set(context.assets) == {"eencijfer", "cohorten"}
+    assert saved["cohorten"].PersoonsgebondenNummer.tolist() == ["1", "4"]
+
+
+def test_missing_sources_are_reported_before_building(source_dir):
+    """Assets are not built when one of the converted files they read is missing."""
+    (source_dir / "Dec_vooropl.parquet").unlink()
+    context = AssetContext(source_dir)
+
+    with pytest.raises(Exception, match="Dec_vooropl"):
+        _build_assets(["eencijfer", "eindexamencijfers"], context=context, save=lambda name, data: None)
+
+    assert context.assets == {}
+
+
+def test_vooropleiding_kort_is_determined_per_description():
+    """Every row gets the short notation of its description, rows without description get none."""
+    vooropleiding = pd.DataFrame({"OmschrijvingVooropleiding": ["havo ALG", "mbo niveau 4", None, "havo ALG", "WO-BA"]})
+
+    result = _add_vooropleiding_kort(vooropleiding)
+
+    assert result.Vooropleiding.tolist()[:2] == ["havo", "mbo"]
+    assert pd.isna(result.Vooropleiding[2])
+    assert result.Vooropleiding.tolist()[3:] == ["havo", "wo-ba"]
+
+
+def test_last_attempt_is_kept_across_row_groups(source_dir):
+    """The last attempt per vak is kept, of equal attempts the one in the first row-group, in the order of the rows."""
+    eindexamens = pd.DataFrame(
+        {
+            "PersoonsgebondenNummer": ["1", "1", "1"],
+            "Diplomajaar": [2018, 2019, 2019],
+            "VooropleidingOorspronkelijkeCode": ["00201", "00201", "00201"],
+            "VakCode": ["1000", "1000", "1001"],
+            "VakAfkorting": ["ne", "ne", "en"],
+            "CijferSchoolexamen": [60.0, 70.0, None],
+            "CijferEersteCentraalExamen": [40.0, 50.0, 55.0],
+            "CijferTweedeCentraalExamen": [45.0, None, None],
+            "CijferDerdeCentraalExamen": [None, None, None],
+        }
+    )
+    eindexamens.to_parquet(source_dir / "VAKHAVW99XX.parquet", row_group_size=1)
+
+    result = _create_eindexamencijfer_df(source_dir)
+
+    assert result[["VakAfkorting", "SoortExamen", "Cijfer", "Poging"]].values.tolist() == [
+        ["ne", "CSE", 45.0, 2.0],
+        ["ne", "School", 60.0, 1.0],
+        ["en", "CSE", 55.0, 1.0],
+    ]
+
+
+def test_only_keys_in_more_row_groups_are_resolved():
+    """A later attempt in a later row-group replaces the cijfer, an equal or earlier attempt does not."""
+
+    def cijfers(vakken, pogingen):
+        return pd.DataFrame(
+            {
+                "PersoonsgebondenNummer": "1",
+                "Vooropleiding": "havo",
+                "SoortExamen": "CSE",
+                "VakAfkorting": vakken,
+                "VakCode": vakken,
+                "Poging": pogingen,
+                "Cijfer": [float(len(vakken) * 10 + i) for i in range(len(vakken))],
+            }
+        )
+
+    result = _keep_laatste_poging_over_row_groups(
+        [cijfers(["ne", "en", "wi"], [1, 2, 2]), cijfers(["ne", "en", "du"], [2, 2, 1]), cijfers(["wi"], [1])]
+    )
+
+    assert result[["VakAfkorting", "Poging", "Cijfer"]].values.tolist() == [
+        ["en", 2, 31.0],
+        ["wi", 2, 32.0],
+        ["ne", 2, 30.0],
+        ["du", 1, 32.0],
+    ]
+    with pytest.raises(Exception, match="No eindexamens"):
+        _keep_laatste_poging_over_row_groups([])
+
+
+def test_first_row_per_student_by_group_offsets():
+    """The row with the lowest value is first, missing values last and equal values in the order of the rows."""
+    studenten = np.array([1, 0, 1, 1, 0, 2])
+    diplomajaar = np.array([2021.0, np.nan, 2020.0, 2020.0, 2019.0, 2022.0])
+    mask = pd.Series([True, True, True, True, True, False])
+
+    first_rows, n_rows = _get_first_rows(studenten, 4, mask, diplomajaar)
+
+    assert first_rows.tolist() == [4, 2, -1, -1]
+    assert n_rows.tolist() == [2, 3, 0, 0]
+    assert _get_first_rows(studenten, 4, mask)[0].tolist() == [1, 0, -1, -1]
+
+
+def test_indicators_for_every_horizon(source_dir):
+    """Student 1 gets a diploma in the fourth year and is not enrolled in the third year, student 4 leaves."""
+    cohorten = create_cohorten_met_indicatoren(_create_eencijfer_df(source_dir)).set_index("PersoonsgebondenNummer")
+
+    assert [cohorten.loc["1", f"EenDiplomaBinnen{jaren}jaar"] for jaren in range(1, 11)] == [0, 0, 0] + [1] * 7
+    assert cohorten["EenDiplomaBinnen10jaar"].dtype == "int8"
+    assert cohorten.loc["1", "StatusNa1Jaar"] == "StudeertNogAanHsl"
+    assert cohorten.loc["1", "StatusNa2Jaar"] == "Uitgevallen"
+    assert cohorten.loc["1", "StatusNa4Jaar"] == "DiplomaBehaald"
+    assert (cohorten.loc["4", [f"StatusNa{jaren}Jaar" for jaren in range(1, 11)]] == "Uitgevallen").all()
+    assert isinstance(cohorten["StatusNa10Jaar"].dtype, pd.CategoricalDtype)
+    assert all(cohorten[f"StatusNa{jaren}Jaar"].dtype == cohorten["StatusNa10Jaar"].dtype for jaren in range(1, 11))
@@ -0,0 +1,453 @@
+"""Tests for converting eencijfer-files."""
+
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from eencijfer import ARROW_CONVERTERS, CONVERTERS, VECTORIZED_CONVERTERS
+from eencijfer.convert.definition import get_definition
+from eencijfer.convert.eencijfer import (
+    ReadEngine,
+    _convert_file,
+    _convert_to_parquet,
+    _create_arrow_schema,
+    iter_asc,
+    iter_asc_tables,
+    read_asc,
+    read_asc_table,
+)
+from eencijfer.convert.fixed_width import (
+    FixedWidthRecords,
+    _convert_field,
+    _create_arrow_column,
+    _create_column,
+    _find_shards,
+    _read_buffer,
+)
+from eencijfer.convert.pii import _create_pgn_pseudo_id_table, _replace_all_pgn_with_pseudo_id_remove_pii_local_id
+from eencijfer.io.cache import _evict_from_cache, _get_from_cache
+from eencijfer.io.files import _save_chunks_to_parquet
+
+DEFINITION = """Label,StartingPosition,NumberOfPositions,Converter
+PersoonsgebondenNummer,1,12,convert_to_object
+Inschrijvingsjaar,13,4,convert_to_int64
+Geslacht,17,1,convert_geslacht
+Diplomajaar,18,4,convert_to_int_zero_to_nan
+DatumInschrijving,22,8,convert_to_date
+Naam,30,10,convert_to_object
+"""
+
+RECORDS = [
+    "000000000001" + "2020" + "M" + "0000" + "20200901" + "Groningen ",
+    "000000000002" + "2021" + "V" + "2024" + "20210901" + "Zoë",
+    "",
+    "000000000003" + "2022" + "X" + "0000" + "        " + "NA        ",
+]
+
+
+@pytest.fixture
+def eencijfer_file(tmp_path):
+    """Small fixed-width file with matching definition-file."""
+    definition_file = tmp_path / "EV____24.csv"
+    definition_file.write_text(DEFINITION)
+    fpath = tmp_path / "EV____24.asc"
+    fpath.write_bytes("\r\n".join(RECORDS).encode("latin1"))
+    return fpath, definition_file
+
+
+@pytest.mark.parametrize("memory_map", [False, True])
+@pytest.mark.parametrize("use_column_converters", [False, True])
+def test_numpy_engine_equals_pandas_engine(eencijfer_file, use_column_converters, memory_map):
+    """The numpy-engine gives the same result as pd.read_fwf."""
+    fpath, definition_file = eencijfer_file
+
+    expected = read_asc(fpath, definition_file, use_column_converters, engine=ReadEngine.pandas)
+    result = read_asc(fpath, definition_file, use_column_converters, engine=ReadEngine.numpy, memory_map=memory_map)
+
+    assert len(result) == 3
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_failing_chunk_leaves_no_parquet_file(tmp_path):
+    """A chunk that can not be saved removes the rows already written, no partial file is left."""
+
+    def chunks():
+        yield pd.DataFrame({"Inschrijvingsjaar": [2020, 2021]})
+        raise ValueError("chunk can not be read")
+
+    with pytest.raises(ValueError, match="chunk can not be read"):
+        _save_chunks_to_parquet(chunks(), dir=tmp_path, fname="Dec_test")
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_records_are_a_view_when_lines_have_equal_length(tmp_path):
+    """Fields of equally long lines are sliced from the buffer without copying."""
+    fpath = tmp_path / "Dec_isat.asc"
+    fpath.write_bytes(b"12345Opleiding A\r\n23456Opleiding B\r\n")
+
+    records = FixedWidthRecords(_read_buffer(fpath, memory_map=True))
+
+    assert len(records) == 2
+    assert np.shares_memory(records.field(0, 5), records.buffer)
+    assert records.decode(5, 20).tolist() == ["Opleiding A", "Opleiding B"]
+
+
+@pytest.mark.parametrize("engine", [ReadEngine.pandas, ReadEngine.numpy])
+@pytest.mark.parametrize("use_column_converters", [False, True])
+def test_chunked_parquet_equals_read_asc(eencijfer_file, tmp_path, engine, use_column_converters):
+    """Converting in chunks gives the same parquet-file as reading the whole file."""
+    fpath, definition_file = eencijfer_file
+
+    chunks = iter_asc(fpath, definition_file, chunk_size=2, use_column_converters=use_column_converters, engine=engine)
+    schema = _create_arrow_schema(definition_file, use_column_converters=use_column_converters)
+    number_of_rows = _save_chunks_to_parquet(chunks, dir=tmp_path, fname=fpath.stem, schema=schema)
+
+    expected = read_asc(fpath, definition_file, use_column_converters, engine=engine)
+    result = pd.read_parquet(tmp_path / "EV____24.parquet")
+
+    assert number_of_rows == 3
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+@pytest.mark.parametrize("engine", [ReadEngine.numpy, ReadEngine.arrow])
+def test_chunks_are_read_without_loading_the_whole_file(eencijfer_file, tmp_path, monkeypatch, engine):
+    """Without --memory-map the chunked conversion still maps the file instead of reading all its bytes."""
+    fpath, definition_file = eencijfer_file
+    expected = read_asc(fpath, definition_file, True, engine=engine)
+
+    def read_bytes(self):
+        raise AssertionError(f"{self.name} is read into memory as a whole")
+
+    monkeypatch.setattr(Path, "read_bytes", read_bytes)
+    number_of_rows = _convert_file(
+        fpath, definition_file, tmp_path, use_column_converters=True, engine=engine, chunk_size=2
+    )
+
+    assert number_of_rows == 3
+    pd.testing.assert_frame_equal(pd.read_parquet(tmp_path / "EV____24.parquet"), expected, check_dtype=False)
+
+
+@pytest.mark.parametrize("name", sorted(VECTORIZED_CONVERTERS))
+@pytest.mark.parametrize(
+    "values",
+    [
+        ["1", "2", "3"],
+        ["0", "12", "-4"],
+        ["0", "", "2"],
+        ["20200901", "NaN", "20211231"],
+        ["20200901", "NA", ""],
+        ["M", "V", "X"],
+        ["1.5", ".5", "1e3"],
+        ["", "", ""],
+        ["a", "", "b"],
+    ],
+)
+def test_vectorized_converter_equals_column_converter(name, values):
+    """Vectorized column-converters give the same result as calling the column-converter on every value."""
+    values = np.array(values)
+    converter = CONVERTERS[name]
+
+    try:
+        expected = _convert_field(values, converter)
+    except ValueError:
+        with pytest.raises(ValueError):
+            _convert_field(values, converter, VECTORIZED_CONVERTERS[name])
+        return
+
+    result = _convert_field(values, converter, VECTORIZED_CONVERTERS[name])
+    pd.testing.assert_series_equal(result, expected)
+    assert [type(value) for value in result] == [type(value) for value in expected]
+
+
+def _to_values(column) -> list:
+    """Values of a pandas- or arrow-column, with None for missing values."""
+    if not isinstance(column, pd.Series):
+        column = column.to_pandas()
+    return column.astype(object).where(column.notna(), None).tolist()
+
+
+@pytest.mark.parametrize("name", sorted(ARROW_CONVERTERS))
+@pytest.mark.parametrize(
+    "values",
+    [
+        ["1", "2", "3"],
+        ["0", "12", "-4"],
+        ["0", "", "2"],
+        ["+5", "1", "2"],
+        ["20200901", "NaN", "20211231"],
+        ["20200901", "NA", ""],
+        ["2020091", "20200901", ""],
+        ["M", "V", "X"],
+        ["1.5", ".5", "1e3"],
+        ["", "", ""],
+        ["a", "", "b"],
+        [" a b", "c ", "Zoë"],
+    ],
+)
+def test_arrow_converter_equals_column_converter(name, values):
+    """Arrow column-converters give the same values as calling the column-converter on every value."""
+    records = FixedWidthRecords(np.frombuffer("\n".join(f"{value:<8}" for value in values).encode("latin1"), np.uint8))
+    converters = {"Veld": CONVERTERS[name]}
+
+    try:
+        expected = _create_column(records, "Veld", 1, 8, converters)
+    except ValueError:
+        with pytest.raises(ValueError):
+            _create_arrow_column(records, "Veld", 1, 8, converters)
+        return
+
+    assert _to_values(_create_arrow_column(records, "Veld", 1, 8, converters)) == _to_values(expected)
+
+
+@pytest.mark.parametrize("use_column_converters", [False, True])
+def test_arrow_engine_equals_numpy_engine(eencijfer_file, tmp_path, use_column_converters):
+    """The arrow-engine gives the same values as the numpy-engine, with the schema of the definition-file."""
+    fpath, definition_file = eencijfer_file
+
+    expected = read_asc(fpath, definition_file, use_column_converters, engine=ReadEngine.numpy)
+    table = read_asc_table(fpath, definition_file, use_column_converters)
+
+    assert table.schema == _create_arrow_schema(definition_file, use_column_converters=use_column_converters)
+    for name in expected:
+        assert _to_values(table.column(name)) == _to_values(expected[name])
+
+    chunks = iter_asc_tables(fpath, definition_file, chunk_size=2, use_column_converters=use_column_converters)
+    _save_chunks_to_parquet(chunks, dir=tmp_path, fname=fpath.stem)
+
+    assert pq.read_table(tmp_path / "EV____24.parquet").equals(table)
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_convert_collects_errors_per_file(tmp_path, jobs):
+    """A file that cannot be read does not stop the conversion of the other files."""
+    source_dir = tmp_path / "source"
+    source_dir.mkdir()
+    (source_dir / "Dec_isat.asc").write_bytes(b"12345Opleiding A\r\n23456Opleiding B\r\n")
+    (source_dir / "Dec_vopl.asc").mkdir()
+
+    _convert_to_parquet(source_dir, tmp_path, jobs=jobs)
+
+    assert pd.read_parquet(tmp_path / "Dec_isat.parquet").NaamOpleiding.tolist() == ["Opleiding A", "Opleiding B"]
+    assert not (tmp_path / "Dec_vopl.parquet").exists()
+
+
+@pytest.mark.parametrize("memory_map", [False, True])
+@pytest.mark.parametrize("use_column_converters", [False, True])
+def test_shards_equal_serial_result(eencijfer_file, use_column_converters, memory_map):
+    """Reading a file in parallel shards gives exactly the same result as reading it at once."""
+    fpath, definition_file = eencijfer_file
+
+    expected = read_asc(fpath, definition_file, use_column_converters, memory_map=memory_map)
+    result = read_asc(fpath, definition_file, use_column_converters, memory_map=memory_map, shards=3)
+
+    pd.testing.assert_frame_equal(result, expected)
+    for column in expected:
+        assert [type(value) for value in result[column]] == [type(value) for value in expected[column]]
+
+
+def test_shards_start_at_beginning_of_line():
+    """Byte-ranges of shards are split right after a line-ending and cover the whole buffer."""
+    buffer = np.frombuffer(b"aaaa\r\nbbbb\r\ncccc\r\ndddd", dtype=np.uint8)
+
+    assert _find_shards(buffer, 2) == [(0, 12), (12, 22)]
+    assert _find_shards(buffer, 10) == [(0, 6), (6, 12), (12, 18), (18, 22)]
+
+
+def test_definition_is_compiled_once_until_file_changes(eencijfer_file):
+    """Compiled definitions are cached by path and modification time."""
+    _, definition_file = eencijfer_file
+
+    definition = get_definition(definition_file)
+
+    assert get_definition(definition_file) is definition
+    assert definition.names[-1] == "Naam"
+    assert definition.offsets[:3] == (0, 12, 16)
+    assert definition.record_length == 39
+
+    definition_file.write_text(DEFINITION.replace("Naam,30,10", "Naam,30,12"))
+    os.utime(definition_file, ns=(0, definition_file.stat().st_mtime_ns + 1_000_000))
+
+    assert get_definition(definition_file).record_length == 41
+
+
+def test_unchanged_file_is_read_from_cache(tmp_path, monkeypatch):
+    """A second conversion of the same file does not parse it again."""
+    source_dir = tmp_path / "source"
+    source_dir.mkdir()
+    (source_dir / "Dec_isat.asc").write_bytes(b"12345Opleiding A\r\n23456Opleiding B\r\n")
+    cache_dir = tmp_path / "cache"
+    (tmp_path / "first").mkdir()
+    (tmp_path / "second").mkdir()
+
+    _convert_to_parquet(source_dir, tmp_path / "first", cache_dir=cache_dir)
+    assert len(list(cache_dir.glob("*.parquet"))) == 1
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("file should not be parsed again")
+
+    monkeypatch.setattr("eencijfer.convert.eencijfer.read_asc", _fail)
+    _convert_to_parquet(source_dir, tmp_path / "second", cache_dir=cache_dir)
+
+    assert (tmp_path / "second" / "Dec_isat.parquet").read_bytes() == (
+        tmp_path / "first" / "Dec_isat.parquet"
+    ).read_bytes()
+
+
+def test_cache_removes_least_recently_used_files(tmp_path):
+    """Files that were used longest ago are removed when the cache is too large."""
+    for i, name in enumerate(["old", "used", "new"]):
+        fpath = tmp_path / f"{name}.parquet"
+        fpath.write_bytes(b"x" * 10)
+        os.utime(fpath, ns=(i * 10**9, i * 10**9))
+
+    _get_from_cache("old", cache_dir=tmp_path)
+    _evict_from_cache(cache_dir=tmp_path, max_cache_size=20)
+
+    assert sorted(p.stem for p in tmp_path.glob("*.parquet")) == ["new", "old"]
+
+
+@pytest.mark.parametrize("engine", list(ReadEngine))
+def test_data_after_last_field_is_reported_with_line_numbers(eencijfer_file, engine):
+    """Lines that are longer than the definition are only an error when they contain data."""
+    fpath, definition_file = eencijfer_file
+    fpath.write_bytes("\r\n".join([RECORDS[0] + "   \t", RECORDS[1], "", RECORDS[3] + " extra"]).encode("latin1"))
+
+    with pytest.raises(AssertionError, match=r"1 lines of EV____24.asc .* lines \[4\]"):
+        read_asc(fpath, definition_file, use_column_converters=True, engine=engine)
+    with pytest.raises(AssertionError, match=r"lines \[4\]"):
+        next(iter_asc(fpath, definition_file, use_column_converters=False, engine=engine, chunk_size=2))
+
+
+def test_trailing_whitespace_is_not_data():
+    """Spaces and tabs after the record are ignored."""
+    records = FixedWidthRecords(np.frombuffer(b"abc  \nabc\t \n\nabcd\nab\n", dtype=np.uint8))
+
+    assert records.find_trailing_data(3).tolist() == [4]
+
+
+@pytest.mark.parametrize("engine", list(ReadEngine))
+@pytest.mark.parametrize("use_column_converters", [False, True])
+def test_compact_dtypes_from_definition(eencijfer_file, tmp_path, engine, use_column_converters):
+    """Fields with a Dtype in the definition-file get that dtype, also in chunked parquet-files."""
+    fpath, definition_file = eencijfer_file
+    lines = DEFINITION.splitlines()
+    dtypes = ["Dtype", "", "Int16", "category", "Int16", "date32", ""]
+    definition_file.write_text("\n".join(f"{line},{dtype}" for line, dtype in zip(lines, dtypes)) + "\n")
+
+    data = read_asc(fpath, definition_file, use_column_converters, engine=engine)
+
+    assert data.Geslacht.dtype == "category"
+    if use_column_converters:
+        assert data.Inschrijvingsjaar.tolist() == [2020, 2021, 2022]
+        assert data.Inschrijvingsjaar.dtype == "Int16"
+        assert data.Diplomajaar.isna().tolist() == [True, False, True]
+        assert str(data.DatumInschrijving.dtype) == "date32[day][pyarrow]"
+    else:
+        assert data.Inschrijvingsjaar.tolist() == ["2020", "2021", "2022"]
+
+    chunks = iter_asc(fpath, definition_file, chunk_size=2, use_column_converters=use_column_converters, engine=engine)
+    schema = _create_arrow_schema(definition_file, use_column_converters=use_column_converters)
+    _save_chunks_to_parquet(chunks, dir=tmp_path, fname=fpath.stem, schema=schema)
+
+    pd.testing.assert_frame_equal(pd.read_parquet(tmp_path / "EV____24.parquet"), data, check_categorical=False)
+
+
+@pytest.mark.parametrize("chunk_size", [None, 2])
+def test_categories_are_sorted_with_every_engine(eencijfer_file, tmp_path, chunk_size):
+    """All engines give the categories in sorted order, not in the order the values appear."""
+    fpath, definition_file = eencijfer_file
+    fpath.write_bytes("\r\n".join(RECORDS[3::-1]).encode("latin1"))
+    lines = DEFINITION.splitlines()
+    dtypes = ["Dtype", "", "", "category", "", "", ""]
+    definition_file.write_text("\n".join(f"{line},{dtype}" for line, dtype in zip(lines, dtypes)) + "\n")
+
+    results = {}
+    for engine in ReadEngine:
+        result_dir = tmp_path / engine.value
+        result_dir.mkdir()
+        _convert_file(
+            fpath, definition_file, result_dir, use_column_converters=True, engine=engine, chunk_size=chunk_size
+        )
+        results[engine] = pd.read_parquet(result_dir / "EV____24.parquet")
+
+    expected = results[ReadEngine.pandas]
+    if chunk_size is None:
+        assert expected.Geslacht.cat.categories.tolist() == ["man", "onbekend", "vrouw"]
+    for result in results.values():
+        pd.testing.assert_frame_equal(result, expected)
+        assert result.Geslacht.cat.categories.tolist() == expected.Geslacht.cat.categories.tolist()
+
+
+@pytest.mark.parametrize("chunk_size", [None, 2])
+@pytest.mark.parametrize("engine", list(ReadEngine))
+def test_values_that_do_not_fit_the_dtype_are_an_error(eencijfer_file, tmp_path, engine, chunk_size):
+    """A Dtype that is too small fails the conversion with the name of the column, also in chunks."""
+    fpath, definition_file = eencijfer_file
+    lines = DEFINITION.splitlines()
+    dtypes = ["Dtype", "", "Int8", "", "", "", ""]
+    definition_file.write_text("\n".join(f"{line},{dtype}" for line, dtype in zip(lines, dtypes)) + "\n")
+
+    with pytest.raises(Exception, match="Inschrijvingsjaar in EV____24.asc does not fit"):
+        _convert_file(
+            fpath, definition_file, tmp_path, use_column_converters=True, engine=engine, chunk_size=chunk_size
+        )
+    assert not (tmp_path / "EV____24.parquet").exists()
+
+
+def test_pseudo_ids_are_kept_in_koppeltabel_for_next_delivery(tmp_path):
+    """Students keep their pseudo-id in the next delivery, new students get new pseudo-ids."""
+    koppeltabel_fpath = tmp_path / "koppeltabel" / "koppeltabel.parquet"
+    pseudo_ids = {}
+    for delivery, pgns in [("2023", ["000000000001", "000000000002"]), ("2024", ["000000000002", "000000000003"])]:
+        eencijfer_dir = tmp_path / delivery
+        eencijfer_dir.mkdir()
+        pd.DataFrame({"PersoonsgebondenNummer": pgns, "Burgerservicenummer": ["1", "2"]}).to_parquet(
+            eencijfer_dir / "EV299XX24.parquet"
+        )
+        pd.DataFrame({"PersoonsgebondenNummer": pgns[1:] + ["000000000009"], "VakCode": ["1", "2"]}).to_parquet(
+            eencijfer_dir / "VAKHAVW99XX.parquet"
+        )
+
+        _replace_all_pgn_with_pseudo_id_remove_pii_local_id(eencijfer_dir, koppeltabel_fpath=koppeltabel_fpath)
+
+        eencijfer = pd.read_parquet(eencijfer_dir / "EV299XX24.parquet")
+        vakken = pd.read_parquet(eencijfer_dir / "VAKHAVW99XX.parquet")
+        pseudo_ids[delivery] = dict(zip(pgns, eencijfer.PersoonsgebondenNummer))
+        assert eencijfer.Burgerservicenummer.isna().all()
+        assert vakken.PersoonsgebondenNummer[0] == pseudo_ids[delivery][pgns[1]]
+        assert vakken.PersoonsgebondenNummer.notna().all()
+
+    assert pseudo_ids["2023"]["000000000002"] == pseudo_ids["2024"]["000000000002"]
+    assert pseudo_ids["2024"]["000000000003"] not in pseudo_ids["2023"].values()
+    koppeltabel = pd.read_parquet(koppeltabel_fpath)
+    assert koppeltabel.PersoonsgebondenNummer.tolist() == [
+        "000000000001",
+        "000000000002",
+        "000000000009",
+        "000000000003",
+    ]
+    assert koppeltabel.PersoonsgebondenNummer_new.is_unique
+    assert koppeltabel_fpath.stat().st_mode & 0o777 == 0o600
+
+
+def test_new_student_does_not_get_own_identifier_as_pseudo_id():
+    """A koppeltabel extended by one student gives that student a pseudo-id that is not an identifier."""
+    koppeltabel = _create_pgn_pseudo_id_table(
+        pd.DataFrame({"PersoonsgebondenNummer": ["000000000001", "000000000002"]})
+    )
+
+    for _ in range(20):
+        extended = _create_pgn_pseudo_id_table(
+            pd.DataFrame({"PersoonsgebondenNummer": ["000000000002", "000000000003"]}), koppeltabel=koppeltabel
+        )
+
+        assert extended.iloc[:2].equals(koppeltabel)
+        pseudo_id = extended.PersoonsgebondenNummer_new.iloc[2]
+        assert len(pseudo_id) == 12
+        assert pseudo_id not in ["000000000001", "000000000002", "000000000003"]
+        assert pseudo_id not in koppeltabel.PersoonsgebondenNummer_new.tolist()
@@ -0,0 +1,138 @@
+"""Tests for reading and writing results."""
+
+import os
+
+import duckdb
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from eencijfer.io.db import _create_history_view
+from eencijfer.io.files import ExportFormat, _get_from_year_filter, _iter_parquet_row_groups, _read_parquet
+from eencijfer.io.history import _add_delivery_to_history, _get_delivery_year
+from eencijfer.io.manifest import _create_manifest_entries, _get_outdated_files, _load_manifest, _save_manifest
+from eencijfer.io.reference import _get_reference_index, _get_reference_table, _join_unique
+
+
+def test_only_changed_files_and_files_pseudonymized_together_are_outdated(tmp_path):
+    """Unchanged files are skipped, EV and VAKHAVW are always converted together."""
+    pairs = {}
+    for name in ["Dec_isat", "Dec_vopl", "EV____24", "VAKHAVW_____"]:
+        file = tmp_path / f"{name}.asc"
+        file.write_text(name)
+        definition_file = tmp_path / f"{name}.csv"
+        definition_file.write_text("Label,StartingPosition,NumberOfPositions,Converter\n")
+        pairs[file] = definition_file
+        (tmp_path / f"{name}.parquet").write_text("")
+
+    options = dict(use_column_converters=True, remove_pii=True, export_format=ExportFormat.parquet)
+    _save_manifest(_create_manifest_entries(pairs, db_name="eencijfer.duckdb", **options), tmp_path)
+
+    (tmp_path / "Dec_vopl.parquet").unlink()
+    (tmp_path / "VAKHAVW_____.asc").write_text("changed")
+    entries = _create_manifest_entries(pairs, db_name="eencijfer.duckdb", **options)
+
+    outdated = _get_outdated_files(
+        pairs, entries, _load_manifest(tmp_path), result_dir=tmp_path, export_format=ExportFormat.parquet
+    )
+
+    assert sorted(file.stem for file in outdated) == ["Dec_vopl", "EV____24", "VAKHAVW_____"]
+
+
+def test_reference_table_is_read_once_and_again_when_it_changes(tmp_path):
+    """Copies of a reference-table do not change the registry, a changed file is read again."""
+    fpath = tmp_path / "Dec_isat.parquet"
+    pd.DataFrame({"Opleidingscode": ["34001", "80011"], "NaamOpleiding": ["B Economie", "Ad Zorg"]}).to_parquet(fpath)
+
+    table = _get_reference_table("Dec_isat", key="Opleidingscode", source_dir=tmp_path)
+    table["NaamOpleiding"] = "changed"
+    table = _get_reference_table("Dec_isat", source_dir=tmp_path)
+    table.loc[0, "NaamOpleiding"] = "changed in place"
+    assert _get_reference_table("Dec_isat", source_dir=tmp_path).NaamOpleiding.tolist() == ["B Economie", "Ad Zorg"]
+    assert _get_reference_index("Dec_isat", "Opleidingscode", source_dir=tmp_path).get_loc("80011") == 1
+
+    pd.DataFrame({"Opleidingscode": ["34001", "34001"], "NaamOpleiding": ["B Economie", "B Bedrijfskunde"]}).to_parquet(
+        fpath
+    )
+    os.utime(fpath, ns=(0, 0))
+    assert _get_reference_table("Dec_isat", source_dir=tmp_path).NaamOpleiding.tolist() == [
+        "B Economie",
+        "B Bedrijfskunde",
+    ]
+    with pytest.raises(Exception, match="not unique on Opleidingscode"):
+        _get_reference_table("Dec_isat", key="Opleidingscode", source_dir=tmp_path)
+
+
+def test_join_unique_gives_the_same_result_as_a_left_merge():
+    """Columns, suffixes, missing matches and dtypes are the same as with pd.merge."""
+    data = pd.DataFrame(
+        {"Brin": ["00AA", "00BB", None, "00AA"], "Vestiging": ["00", "01", None, "01"], "Naam": list("abcd")}
+    )
+    reference = pd.DataFrame(
+        {"Brin": ["00AA", "00AA"], "Vestiging": ["00", "01"], "Naam": ["Lyceum", "College"], "Aantal": [10, 20]}
+    )
+
+    result = _join_unique(data, reference, left_on=["Brin", "Vestiging"], right_on=["Brin", "Vestiging"], suffix="_ref")
+    expected = pd.merge(data, reference, on=["Brin", "Vestiging"], how="left", suffixes=["", "_ref"])
+    pd.testing.assert_frame_equal(result, expected)
+
+    result = _join_unique(data, reference.iloc[:1], left_on="Brin", right_on="Brin", suffix="_ref")
+    expected = pd.merge(data, reference.iloc[:1], on="Brin", how="left", suffixes=["", "_ref"])
+    pd.testing.assert_frame_equal(result, expected)
+
+    with pytest.raises(Exception, match="not unique on Brin"):
+        _join_unique(data, reference, left_on="Brin", right_on="Brin")
+
+
+def test_join_unique_on_keys_of_other_dtypes_is_an_error():
+    """Integer codes never match string codes, like pd.merge the join fails instead of adding only missing values."""
+    data = pd.DataFrame({"Opleidingscode": [34001, 80011]})
+    reference = pd.DataFrame({"Opleidingscode": ["34001", "80011"], "NaamOpleiding": ["B Economie", "Ad Zorg"]})
+
+    with pytest.raises(ValueError):
+        pd.merge(data, reference, on="Opleidingscode", how="left")
+    with pytest.raises(Exception, match=r"Opleidingscode \(int64\) on Opleidingscode \(\w+\)"):
+        _join_unique(data, reference, left_on="Opleidingscode", right_on="Opleidingscode")
+
+    result = _join_unique(
+        data.astype(float), reference.astype({"Opleidingscode": int}), "Opleidingscode", "Opleidingscode"
+    )
+    assert result.NaamOpleiding.tolist() == ["B Economie", "Ad Zorg"]
+
+
+def test_every_enrolment_year_is_kept_from_the_latest_delivery(tmp_path):
+    """A delivery replaces the enrolment-years it contains, older years stay from the older delivery."""
+    history_dir = tmp_path / "history"
+    pd.DataFrame({"PersoonsgebondenNummer": ["1", "1", "2"], "Inschrijvingsjaar": [2021, 2022, 2022]}).to_parquet(
+        tmp_path / "EV21RI23.parquet"
+    )
+    pd.DataFrame({"PersoonsgebondenNummer": ["1", "3"], "Inschrijvingsjaar": [2022, 2023]}).to_parquet(
+        tmp_path / "EV21RI24.parquet"
+    )
+
+    for fname in ["EV21RI23", "EV21RI24", "EV21RI23"]:
+        _add_delivery_to_history(tmp_path / f"{fname}.parquet", history_dir, _get_delivery_year(fname))
+
+    duckdb_path = tmp_path / "eencijfer.db"
+    _create_history_view(duckdb_path, history_dir)
+    with duckdb.connect(duckdb_path.as_posix()) as con:
+        history = con.sql("SELECT * FROM eencijfer_historie ORDER BY Inschrijvingsjaar").df()
+        recent = con.sql("SELECT count(*) FROM eencijfer_historie WHERE Inschrijvingsjaar >= 2022").fetchone()[0]
+    assert history.Inschrijvingsjaar.tolist() == [2021, 2022, 2023]
+    assert history.Leveringsjaar.tolist() == [2023, 2024, 2024]
+    assert recent == 2
+
+
+def test_row_groups_before_from_year_are_skipped(tmp_path):
+    """Only the asked columns are read and row-groups are skipped on their statistics, in the order of the file."""
+    fpath = tmp_path / "VAKHAVW99XX.parquet"
+    table = pa.table({"Diplomajaar": [2018, 2019, 2020, 2021, 2022, 2023], "VakCode": ["1", "2", "3", "4", "5", "6"]})
+    pq.write_table(table, fpath, row_group_size=2)
+
+    row_groups = list(
+        _iter_parquet_row_groups(fpath, columns=["VakCode"], filter=_get_from_year_filter("Diplomajaar", 2021))
+    )
+
+    assert [row_group.VakCode.tolist() for row_group in row_groups] == [["4"], ["5", "6"]]
+    assert _read_parquet(fpath, filter=_get_from_year_filter("Diplomajaar", None)).equals(pd.read_parquet(fpath))